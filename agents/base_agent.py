@@ -1,15 +1,14 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict
-import openai
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
+from utils.batch import run_shared
+from utils.config import Config
+from utils.deadline import DeadlineExceeded
+from utils.model_client import CircuitOpenError, get_model_client
+from utils.tracing import span
 
 class BaseAgent(ABC):
     def __init__(self):
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        openai.api_key = self.openai_api_key
+        self.openai_api_key = Config.OPENAI_API_KEY
         
     @abstractmethod
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -22,16 +21,21 @@ class BaseAgent(ABC):
         """
         Get a completion from OpenAI's API
         """
+        messages = [
+            {"role": "system", "content": "You are a helpful AI assistant specialized in video creation."},
+            {"role": "user", "content": prompt}
+        ]
         try:
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a helpful AI assistant specialized in video creation."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens
-            )
-            return response.choices[0].message.content
+            with span(f"{type(self).__name__}.completion", "model", max_tokens=max_tokens):
+                # Identical prompts within a batch are sent to the model once
+                return await run_shared(
+                    "completions",
+                    (prompt, max_tokens),
+                    lambda: get_model_client().complete(messages=messages, max_tokens=max_tokens)
+                )
+        except (DeadlineExceeded, CircuitOpenError):
+            # The job cannot succeed any more, let create_video fail fast
+            raise
         except Exception as e:
             print(f"Error getting completion: {str(e)}")
-            return "" 
\ No newline at end of file
+            return ""
\ No newline at end of file
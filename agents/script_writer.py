@@ -1,5 +1,7 @@
 from typing import Dict, Any
 from .base_agent import BaseAgent
+from utils.config import Config
+from utils.prompt_builder import PromptBuilder
 
 class ScriptWriterAgent(BaseAgent):
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -10,12 +12,16 @@ class ScriptWriterAgent(BaseAgent):
         strategy = input_data.get("strategy", {})
         videos = input_data.get("videos", [])
         
-        # Generate main script
-        script_prompt = f"""
+        # Generate main script from the parts of concept and strategy it needs
+        script_prompt = PromptBuilder(Config.PROMPT_TOKEN_BUDGETS["script"]).add_context(
+            "concept", concept, fields=["target_audience", "main_message", "key_points", "length", "emotional_tone", "call_to_action"]
+        ).add_context(
+            "strategy", strategy, fields=["hook", "content_structure", "transitions", "engagement"]
+        ).render("""
         Create a detailed video script based on:
         Concept: {concept}
         Strategy: {strategy}
-        Available Videos: {len(videos)} clips
+        Available Videos: {clip_count} clips
         
         Include:
         1. Opening hook (5-7 seconds)
@@ -24,14 +30,16 @@ class ScriptWriterAgent(BaseAgent):
         4. Closing call to action
         
         Format as a JSON with timestamps and sections.
-        """
+        """, clip_count=len(videos))
         
         script_response = await self.get_completion(script_prompt)
         
         # Generate voiceover script
-        voiceover_prompt = f"""
+        voiceover_prompt = PromptBuilder(Config.PROMPT_TOKEN_BUDGETS["voiceover"]).add_context(
+            "script", script_response
+        ).render("""
         Based on the following script, create a natural, engaging voiceover script:
-        {script_response}
+        {script}
         
         Requirements:
         1. Conversational tone
@@ -41,14 +49,16 @@ class ScriptWriterAgent(BaseAgent):
         5. Breathing/pause markers
         
         Format as a JSON with timestamps and text.
-        """
+        """)
         
         voiceover_response = await self.get_completion(voiceover_prompt)
         
         # Generate SEO-optimized description
-        description_prompt = f"""
+        description_prompt = PromptBuilder(Config.PROMPT_TOKEN_BUDGETS["description"]).add_context(
+            "script", script_response
+        ).render("""
         Create an SEO-optimized video description based on:
-        Script: {script_response}
+        Script: {script}
         
         Include:
         1. Compelling first 2-3 lines
@@ -58,7 +68,7 @@ class ScriptWriterAgent(BaseAgent):
         5. Links and timestamps
         
         Format as a JSON with sections.
-        """
+        """)
         
         description_response = await self.get_completion(description_prompt)
         
@@ -1,12 +1,18 @@
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
+from utils.config import Config
+from utils.prompt_builder import PromptBuilder
 
 class SEOMetadataAgent(BaseAgent):
     async def generate_titles(self, concept: Dict[str, Any], script: Dict[str, Any]) -> List[str]:
         """
         Generate SEO-optimized titles for the video
         """
-        title_prompt = f"""
+        title_prompt = PromptBuilder(Config.PROMPT_TOKEN_BUDGETS["seo_titles"]).add_context(
+            "concept", concept, fields=["target_audience", "main_message", "key_points"]
+        ).add_context(
+            "script", script, fields=["title", "hook", "opening", "sections"]
+        ).render("""
         Based on the following video concept and script, generate 5 SEO-optimized titles for YouTube:
         Concept: {concept}
         Script: {script}
@@ -19,7 +25,7 @@ class SEOMetadataAgent(BaseAgent):
         5. Follow YouTube best practices
         
         Format the response as a JSON array of strings.
-        """
+        """)
         
         titles_response = await self.get_completion(title_prompt)
         try:
@@ -34,7 +40,11 @@ class SEOMetadataAgent(BaseAgent):
         """
         Generate relevant tags for the video
         """
-        tags_prompt = f"""
+        tags_prompt = PromptBuilder(Config.PROMPT_TOKEN_BUDGETS["seo_tags"]).add_context(
+            "concept", concept, fields=["target_audience", "main_message", "key_points"]
+        ).add_context(
+            "description", description
+        ).render("""
         Based on the following video concept and description, generate 15 relevant tags for YouTube:
         Concept: {concept}
         Description: {description}
@@ -46,7 +56,7 @@ class SEOMetadataAgent(BaseAgent):
         4. Follow YouTube tag best practices
         
         Format the response as a JSON array of strings.
-        """
+        """)
         
         tags_response = await self.get_completion(tags_prompt)
         try:
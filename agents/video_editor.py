@@ -1,7 +1,11 @@
 from typing import Dict, Any, List
+import asyncio
 import os
 import subprocess
+import uuid
 from .base_agent import BaseAgent
+from utils.deadline import remaining_time
+from utils.tracing import span
 
 class VideoEditorAgent(BaseAgent):
     def __init__(self):
@@ -15,10 +19,12 @@ class VideoEditorAgent(BaseAgent):
         """
         try:
             # Create a file list for ffmpeg
-            list_file = os.path.join(self.output_dir, "filelist.txt")
+            # Unique per call so concurrent jobs do not overwrite each other's list
+            list_file = os.path.join(self.output_dir, f"filelist_{uuid.uuid4().hex}.txt")
             with open(list_file, "w") as f:
                 for path in video_paths:
-                    f.write(f"file '{path}'\n")
+                    # ffmpeg resolves relative entries against the list file's directory
+                    f.write(f"file '{os.path.abspath(path)}'\n")
             
             # Use ffmpeg to concatenate videos
             cmd = [
@@ -29,7 +35,8 @@ class VideoEditorAgent(BaseAgent):
                 "-c", "copy",
                 output_path
             ]
-            subprocess.run(cmd, check=True)
+            with span("ffmpeg.concat", "subprocess", clips=len(video_paths)):
+                await asyncio.to_thread(subprocess.run, cmd, check=True, timeout=remaining_time())
             
             # Clean up
             os.remove(list_file)
@@ -55,7 +62,8 @@ class VideoEditorAgent(BaseAgent):
                 "-codec:a", "copy",
                 output_path
             ]
-            subprocess.run(cmd, check=True)
+            with span("ffmpeg.text_overlay", "subprocess"):
+                await asyncio.to_thread(subprocess.run, cmd, check=True, timeout=remaining_time())
             
             return output_path
         except Exception as e:
@@ -86,7 +94,8 @@ class VideoEditorAgent(BaseAgent):
             }
         
         # Generate output filename
-        output_filename = f"final_video_{os.path.basename(video_paths[0]).split('_')[0]}.mp4"
+        # Clips are shared between jobs, so the first clip id alone is not unique
+        output_filename = f"final_video_{os.path.basename(video_paths[0]).split('_')[0]}_{uuid.uuid4().hex[:8]}.mp4"
         output_path = os.path.join(self.output_dir, output_filename)
         
         # Combine videos
@@ -1,38 +1,53 @@
 from typing import Dict, Any, List
+import asyncio
 import os
-import requests
 from .base_agent import BaseAgent
+from utils.batch import run_shared
+from utils.config import Config
+from utils.deadline import remaining_time
+from utils.tracing import span
 
 class VideoSearcherAgent(BaseAgent):
     def __init__(self):
         super().__init__()
-        self.pexels_api_key = os.getenv("PEXELS_API_KEY")
+        self.pexels_api_key = Config.PEXELS_API_KEY
         self.headers = {"Authorization": self.pexels_api_key}
         
     async def search_videos(self, query: str, per_page: int = 5) -> List[Dict]:
         """
         Search videos on Pexels
         """
-        url = f"https://api.pexels.com/videos/search?query={query}&per_page={per_page}"
-        response = requests.get(url, headers=self.headers)
-        if response.status_code == 200:
-            return response.json().get("videos", [])
-        return []
+        return await run_shared("searches", (query, per_page), lambda: asyncio.to_thread(self._search_videos, query, per_page))
+    
+    def _search_videos(self, query: str, per_page: int) -> List[Dict]:
+        import requests
+        url = f"{Config.PEXELS_API_BASE}/videos/search?query={query}&per_page={per_page}"
+        with span("pexels.search", "http", query=query):
+            response = requests.get(url, headers=self.headers, timeout=remaining_time(Config.HTTP_TIMEOUT))
+            if response.status_code == 200:
+                return response.json().get("videos", [])
+            return []
     
     async def download_video(self, video_url: str, filename: str) -> str:
         """
         Download a video from Pexels
         """
-        response = requests.get(video_url, stream=True)
-        if response.status_code == 200:
-            os.makedirs("downloads", exist_ok=True)
-            filepath = os.path.join("downloads", filename)
-            with open(filepath, "wb") as f:
-                for chunk in response.iter_content(chunk_size=1024):
-                    if chunk:
-                        f.write(chunk)
-            return filepath
-        return ""
+        # Jobs in the same batch reuse a clip that was already downloaded
+        return await run_shared("downloads", video_url, lambda: asyncio.to_thread(self._download_video, video_url, filename))
+    
+    def _download_video(self, video_url: str, filename: str) -> str:
+        import requests
+        with span("pexels.download", "http", filename=filename):
+            response = requests.get(video_url, stream=True, timeout=remaining_time(Config.HTTP_TIMEOUT))
+            if response.status_code == 200:
+                os.makedirs("downloads", exist_ok=True)
+                filepath = os.path.join("downloads", filename)
+                with open(filepath, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1024):
+                        if chunk:
+                            f.write(chunk)
+                return filepath
+            return ""
     
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
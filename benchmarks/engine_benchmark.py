@@ -0,0 +1,92 @@
+"""
+Measure the throughput of the task execution engine.
+
+A marketing department runs a stream of tasks through an ExecutionEngine:
+agents process them and QA agents review the results. Tasks are submitted
+as fast as backpressure allows. On the virtual clock the simulated
+thinking time costs nothing, so the tasks per second measure the engine
+and agent overhead; --clock real includes the thinking time.
+
+    python -m benchmarks.engine_benchmark --agents 100 --qa-agents 10 --tasks 2000
+    python -m benchmarks.engine_benchmark --agents 20 --tasks 100 --clock real
+    python -m benchmarks.engine_benchmark --agents 20 --capacity 5 --tasks 100 --clock real
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from organization.utils.clock import Clock, RealClock, VirtualClock, set_clock  # noqa: E402
+
+TASK_TYPES = ["campaign_creation", "content_creation", "market_research", "social_media"]
+
+async def run(agents: int, qa_agents: int, capacity: int, tasks: int, max_pending: int, clock: Clock,
+              seed: int) -> Dict[str, float]:
+    from organization.departments.marketing.agents.marketing_agent import MarketingAgent
+    from organization.departments.marketing.managers.marketing_manager import MarketingManager
+    from organization.departments.marketing.qa.marketing_qa_agent import MarketingQAAgent
+    from organization.utils.execution_engine import ExecutionEngine
+
+    random.seed(seed)
+    set_clock(clock)
+    manager = MarketingManager("EngineBenchmarkManager")
+    for i in range(agents):
+        manager.add_agent(MarketingAgent(f"Agent{i}", capacity))
+    for i in range(qa_agents):
+        manager.add_qa_agent(MarketingQAAgent(f"QAAgent{i}", capacity))
+
+    engine = ExecutionEngine(manager, max_pending=max_pending)
+    rng = random.Random(seed)
+    start = clock.time()
+    await engine.start()
+    for i in range(tasks):
+        await engine.submit(rng.choice(TASK_TYPES), {"topic": f"Task {i}"}, rng.randint(1, 3))
+    await engine.join()
+    stats = engine.get_stats()
+    await engine.stop()
+    stats["simulated_seconds"] = clock.time() - start
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of the task execution engine")
+    parser.add_argument("--agents", type=int, default=100)
+    parser.add_argument("--qa-agents", type=int, default=10)
+    parser.add_argument("--capacity", type=int, default=1, help="tasks each agent holds at once")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--max-pending", type=int, default=500, help="unfinished tasks allowed at once")
+    parser.add_argument("--clock", choices=["virtual", "real"], default="virtual")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.agents < 1 or args.qa_agents < 0 or args.capacity < 1 or args.tasks < 1 or args.max_pending < 1:
+        parser.error("--agents, --capacity, --tasks and --max-pending must be positive")
+
+    # Agents log every step; keep only warnings so logging does not dominate
+    logging.basicConfig(level=logging.WARNING)
+    # Spill agent history to a scratch directory, never into the working tree
+    history_dir = tempfile.mkdtemp(prefix="engine_benchmark_history_")
+    os.environ["ORGANIZATION_HISTORY_DIR"] = history_dir
+    clock = VirtualClock() if args.clock == "virtual" else RealClock()
+    wall_start = time.perf_counter()
+    stats = asyncio.run(run(args.agents, args.qa_agents, args.capacity, args.tasks, args.max_pending,
+                            clock, args.seed))
+    wall_seconds = time.perf_counter() - wall_start
+    shutil.rmtree(history_dir, ignore_errors=True)
+
+    print(f"{args.agents} agents, {args.qa_agents} QA agents with {args.capacity} slots each, "
+          f"{args.tasks} tasks on the {args.clock} clock")
+    print(f"{stats['completed']} runs completed, {stats['failed']} failed, {stats['approved']} approved, "
+          f"{stats['rejected']} rejected, {stats['dead_lettered']} dead-lettered")
+    print(f"{stats['finished']} tasks in {wall_seconds:.2f}s wall time, {stats['tasks_per_second']:.0f} tasks/s")
+    print(f"{stats['simulated_seconds'] / 3600:.2f} hours on the clock, "
+          f"{stats['finished'] / max(stats['simulated_seconds'], 1e-9) * 3600:.0f} tasks per clock hour")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Local stand-ins for the OpenAI chat API and the Pexels video API, used by
+the pipeline benchmark so throughput can be measured without paying for
+real API calls.
+
+Run standalone:
+    python -m benchmarks.fake_services --port 8100 --openai-latency lognormal:0.8,0.5
+
+Endpoints:
+    POST /v1/chat/completions     canned chat completion
+    GET  /videos/search           canned Pexels search results
+    GET  /download/<id>.mp4       synthetic mp4 clip
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+from urllib.parse import parse_qs, urlparse
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Build a latency sampler (seconds) from a spec string:
+        fixed:0.2            always 0.2s
+        uniform:0.1,0.5      uniform between 0.1s and 0.5s
+        exp:0.3              exponential with mean 0.3s
+        lognormal:0.8,0.5    lognormal with median 0.8s and shape 0.5
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        params = [float(value) for value in args.split(",")] if args else []
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec}")
+
+    if kind == "fixed" and len(params) == 1:
+        return lambda: params[0]
+    if kind == "uniform" and len(params) == 2:
+        return lambda: random.uniform(params[0], params[1])
+    if kind == "exp" and len(params) == 1:
+        return lambda: random.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+    if kind == "lognormal" and len(params) == 2:
+        return lambda: random.lognormvariate(math.log(params[0]), params[1])
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+def make_synthetic_clip(size_kb: int = 256) -> bytes:
+    """
+    A short test-pattern mp4 rendered with ffmpeg when it is available,
+    otherwise an mp4 header padded to `size_kb` (enough to exercise downloads)
+    """
+    if shutil.which("ffmpeg"):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "clip.mp4")
+            result = subprocess.run([
+                "ffmpeg", "-loglevel", "error", "-f", "lavfi",
+                "-i", "testsrc=duration=2:size=320x240:rate=10",
+                "-pix_fmt", "yuv420p", path
+            ], capture_output=True)
+            if result.returncode == 0:
+                with open(path, "rb") as f:
+                    return f.read()
+
+    header = b"\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00mp42isom"
+    return header + b"\x00" * max(0, size_kb * 1024 - len(header))
+
+# Canned model answers, picked by what the prompt asks for
+CANNED_COMPLETIONS = [
+    ("search queries", "city skyline at night, ocean waves, forest trail"),
+    ("titles", '["How AI Is Changing Everything", "AI Explained in Five Minutes", "The Future of AI"]'),
+    ("tags", '["ai", "technology", "future", "machine learning", "explained"]'),
+    ("voiceover", json.dumps({"segments": [{"time": "0:00", "text": "Welcome back to the channel."}]})),
+    ("description", json.dumps({"intro": "Everything you need to know.", "hashtags": ["#ai"]})),
+    ("script", json.dumps({"sections": [{"time": "0:00", "title": "Hook", "text": "Imagine a world..."}]})),
+    ("content strategy", json.dumps({"hook": "Open with a question", "content_structure": ["intro", "body", "outro"]})),
+]
+DEFAULT_COMPLETION = json.dumps({
+    "target_audience": "curious beginners",
+    "main_message": "AI is a tool anyone can use",
+    "key_points": ["what it is", "how it works", "where it is going"],
+    "visual_style": "bright and modern",
+    "emotional_tone": "optimistic",
+    "call_to_action": "subscribe"
+})
+
+def canned_completion(prompt: str) -> str:
+    lowered = prompt.lower()
+    for marker, completion in CANNED_COMPLETIONS:
+        if marker in lowered:
+            return completion
+    return DEFAULT_COMPLETION
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    # Set by make_server
+    latencies: Dict[str, Callable[[], float]] = {}
+    clip: bytes = b""
+    videos_per_query = 3
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self, service: str):
+        time.sleep(max(0.0, self.latencies[service]()))
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = " ".join(message.get("content", "") for message in request.get("messages", []))
+        self._delay("openai")
+
+        body = {
+            "id": f"chatcmpl-{random.getrandbits(64):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": canned_completion(prompt)},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 50, "total_tokens": len(prompt) // 4 + 50}
+        }
+        self._send(200, json.dumps(body).encode("utf-8"))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/videos/search":
+            self._delay("pexels")
+            query = parse_qs(url.query).get("query", [""])[0]
+            per_page = int(parse_qs(url.query).get("per_page", [self.videos_per_query])[0])
+            # The same query always returns the same clips
+            seed = int(hashlib.md5(query.strip().lower().encode("utf-8")).hexdigest()[:8], 16)
+            host = f"http://{self.headers.get('Host')}"
+            videos = [{
+                "id": seed + i,
+                "duration": 10,
+                "video_files": [
+                    {"quality": "sd", "width": 640, "height": 360, "link": f"{host}/download/{seed + i}_sd.mp4"},
+                    {"quality": "hd", "width": 1280, "height": 720, "link": f"{host}/download/{seed + i}_hd.mp4"}
+                ]
+            } for i in range(min(per_page, self.videos_per_query))]
+            self._send(200, json.dumps({"videos": videos}).encode("utf-8"))
+        elif url.path.startswith("/download/"):
+            self._delay("download")
+            self._send(200, self.clip, "video/mp4")
+        else:
+            self._send(404, b'{"error": "not found"}')
+
+def make_server(port: int, openai_latency: str = "lognormal:0.8,0.5", pexels_latency: str = "lognormal:0.2,0.3",
+                download_latency: str = "lognormal:0.3,0.3", clip_kb: int = 256,
+                videos_per_query: int = 3) -> ThreadingHTTPServer:
+    handler = type("ConfiguredFakeServiceHandler", (FakeServiceHandler,), {
+        "latencies": {
+            "openai": parse_latency(openai_latency),
+            "pexels": parse_latency(pexels_latency),
+            "download": parse_latency(download_latency)
+        },
+        "clip": make_synthetic_clip(clip_kb),
+        "videos_per_query": videos_per_query
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--openai-latency", default="lognormal:0.8,0.5", help="chat completion latency spec")
+    parser.add_argument("--pexels-latency", default="lognormal:0.2,0.3", help="video search latency spec")
+    parser.add_argument("--download-latency", default="lognormal:0.3,0.3", help="clip download latency spec")
+    parser.add_argument("--clip-kb", type=int, default=256, help="size of the synthetic clip without ffmpeg")
+    parser.add_argument("--videos-per-query", type=int, default=3)
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI and Pexels services")
+    parser.add_argument("--port", type=int, default=8100)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.openai_latency, args.pexels_latency, args.download_latency,
+                         args.clip_kb, args.videos_per_query)
+    print(f"Fake services listening on http://127.0.0.1:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Import-time benchmark and guard.
+
+Imports each module in a fresh interpreter with `python -X importtime`,
+reports the cumulative import time (median of several runs) and the
+slowest imports, and fails if a module is over budget or pulls in a
+module that should only be loaded lazily.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module main --max-ms 400 --top 15
+
+Exit status is 1 when any guard fails, so it can run in CI.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = [
+    "main",
+    "organization.utils.base_manager",
+    "organization.departments.marketing.managers.marketing_manager",
+    "organization.departments.marketing.qa.marketing_qa_agent",
+]
+
+# Heavy modules that must not be loaded just by importing the code base
+LAZY_MODULES = ["openai", "requests", "dotenv", "numpy"]
+
+def measure(module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    Import `module` once in a fresh interpreter.
+
+    Returns the cumulative import time of `module` in milliseconds and the
+    cumulative time of every module imported along the way.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        raise RuntimeError(f"Importing {module} failed: {last_line}")
+
+    imports = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = int(cumulative) / 1000.0
+    return imports.get(module, 0.0), imports
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure and guard module import time")
+    parser.add_argument("--module", action="append", help="module to import (repeatable)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--max-ms", type=float, help="fail if a module's median import time exceeds this")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list per module")
+    parser.add_argument("--allow", action="append", default=[], help="lazy module allowed to be imported")
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for module in args.module or DEFAULT_MODULES:
+        try:
+            samples = [measure(module) for _ in range(max(1, args.runs))]
+        except RuntimeError as e:
+            print(f"{module}: {e}")
+            failures.append(module)
+            continue
+
+        median_ms = statistics.median(total for total, _ in samples)
+        imports = samples[-1][1]
+        print(f"\n{module}: {median_ms:.1f} ms (median of {len(samples)})")
+        slowest = sorted(imports.items(), key=lambda item: item[1], reverse=True)
+        for name, cumulative in [item for item in slowest if item[0] != module][:args.top]:
+            print(f"    {cumulative:8.1f} ms  {name}")
+
+        if args.max_ms is not None and median_ms > args.max_ms:
+            failures.append(module)
+            print(f"    FAIL: over the {args.max_ms:.0f} ms budget")
+        eager = [name for name in LAZY_MODULES if name in imports and name not in args.allow]
+        if eager:
+            failures.append(module)
+            print(f"    FAIL: imports {', '.join(eager)} eagerly")
+
+    if failures:
+        print(f"\nImport guard failed for: {', '.join(failures)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Offline end-to-end benchmark of the video pipeline.
+
+Starts the fake OpenAI/Pexels services in a subprocess, serves the FastAPI
+app in this process, drives /create-video at a fixed target rate and
+reports throughput, latency percentiles per request and per pipeline
+stage, CPU time and peak RSS.
+
+    python -m benchmarks.pipeline_benchmark --rate 2 --requests 40
+    python -m benchmarks.pipeline_benchmark --openai-latency lognormal:1.5,0.6 --json report.json
+
+CPU time and peak RSS are those of this process (the app plus the small
+load generator); the fake services run in their own process.
+Without ffmpeg on PATH a stand-in that copies the first input is used, so
+render time is not representative in that case.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_services import add_arguments  # noqa: E402
+
+FFMPEG_STAND_IN = """#!/bin/sh
+# Benchmark stand-in for ffmpeg: copy the first input to the output path
+out=""
+src=""
+prev=""
+for arg in "$@"; do
+    if [ "$prev" = "-i" ]; then src="$arg"; fi
+    prev="$arg"
+    out="$arg"
+done
+case "$src" in
+    *.txt) src=$(sed -n "1s/^file '\\(.*\\)'$/\\1/p" "$src") ;;
+esac
+cp "$src" "$out"
+"""
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def at(percentile: float) -> float:
+        return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+    return {"count": len(ordered), "p50": at(0.50), "p95": at(0.95), "p99": at(0.99), "max": ordered[-1]}
+
+def post_json(url: str, payload: Dict[str, Any], timeout: float) -> int:
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+async def generate_load(url: str, rate: float, total: int, timeout: float) -> List[Dict[str, Any]]:
+    """
+    Open-loop load: request i is sent at i / rate seconds regardless of
+    how many earlier requests are still running. Every request gets its
+    own thread, so a small default executor never queues requests on the
+    client side.
+    """
+    results = []
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+
+    async def send(index: int):
+        await asyncio.sleep(max(0.0, start + index / rate - time.monotonic()))
+        sent = time.monotonic()
+        payload = {"topic": f"Benchmark topic {index}", "keywords": ["ai"]}
+        status = await loop.run_in_executor(executor, post_json, url, payload, timeout)
+        results.append({"index": index, "status": status, "latency": time.monotonic() - sent})
+
+    with ThreadPoolExecutor(max_workers=total, thread_name_prefix="load") as executor:
+        await asyncio.gather(*[send(index) for index in range(total)])
+    return results
+
+def stage_latencies(trace_file: str) -> Dict[str, Dict[str, float]]:
+    durations = defaultdict(list)
+    if os.path.exists(trace_file):
+        with open(trace_file, "r", encoding="utf-8") as f:
+            for line in f:
+                span = json.loads(line)
+                durations[f"{span['kind']}:{span['name']}"].append(span["duration"])
+    return {key: percentiles(values) for key, values in sorted(durations.items())}
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nRequests: {report['requests']} at {report['target_rate']}/s "
+          f"({report['succeeded']} ok, {report['failed']} failed) in {report['wall_time']:.1f}s")
+    print(f"Throughput: {report['throughput']:.2f} videos/s")
+    print(f"CPU: {report['cpu_seconds']:.2f}s ({report['cpu_per_video'] * 1000:.1f}ms/video), "
+          f"peak RSS: {report['peak_rss_mb']:.1f} MB\n")
+    print(f"{'span':<48}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}")
+    rows = [("request:/create-video (client)", report["latency"])] + list(report["stages"].items())
+    for name, stats in rows:
+        print(f"{name:<48}{stats['count']:>7}{stats['p50']:>9.3f}{stats['p95']:>9.3f}{stats['p99']:>9.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of /create-video")
+    parser.add_argument("--rate", type=float, default=2.0, help="target requests per second")
+    parser.add_argument("--requests", type=int, default=40, help="number of requests to send")
+    parser.add_argument("--timeout", type=float, default=300.0, help="client timeout per request")
+    parser.add_argument("--json", help="also write the report to this file")
+    add_arguments(parser)
+    args = parser.parse_args()
+    if args.rate <= 0 or args.requests < 1:
+        parser.error("--rate and --requests must be positive")
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    workdir = tempfile.mkdtemp(prefix="pipeline_benchmark_")
+    services_port = free_port()
+    services = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_services", "--port", str(services_port),
+        "--openai-latency", args.openai_latency, "--pexels-latency", args.pexels_latency,
+        "--download-latency", args.download_latency, "--clip-kb", str(args.clip_kb),
+        "--videos-per-query", str(args.videos_per_query)
+    ], cwd=REPO_ROOT, stdout=subprocess.DEVNULL)
+
+    try:
+        wait_for_port(services_port)
+        services_url = f"http://127.0.0.1:{services_port}"
+        os.environ.update({
+            "OPENAI_API_KEY": "benchmark",
+            "PEXELS_API_KEY": "benchmark",
+            "OPENAI_API_BASE": f"{services_url}/v1",
+            "PEXELS_API_BASE": services_url
+        })
+        if not shutil.which("ffmpeg"):
+            print("ffmpeg not found, using a copying stand-in for renders")
+            stand_in = os.path.join(workdir, "bin", "ffmpeg")
+            os.makedirs(os.path.dirname(stand_in))
+            with open(stand_in, "w") as f:
+                f.write(FFMPEG_STAND_IN)
+            os.chmod(stand_in, os.stat(stand_in).st_mode | stat.S_IEXEC)
+            os.environ["PATH"] = os.path.dirname(stand_in) + os.pathsep + os.environ["PATH"]
+
+        # Downloads, renders, checkpoints and traces all land in the scratch directory
+        os.chdir(workdir)
+        import uvicorn
+        import main as pipeline
+        from utils.tracing import tracer
+
+        tracer.trace_file = os.path.join(workdir, "traces.jsonl")
+        tracer.sample_rate = 1.0
+
+        app_port = free_port()
+        server = uvicorn.Server(uvicorn.Config(pipeline.app, host="127.0.0.1", port=app_port, log_level="warning"))
+        server_thread = threading.Thread(target=server.run, daemon=True)
+        server_thread.start()
+        wait_for_port(app_port)
+
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.monotonic()
+        results = asyncio.run(generate_load(f"http://127.0.0.1:{app_port}/create-video",
+                                            args.rate, args.requests, args.timeout))
+        wall_time = time.monotonic() - start
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+        server.should_exit = True
+        server_thread.join(timeout=10)
+        # Spans are written by a background thread; wait for the last ones
+        tracer.flush()
+    finally:
+        services.terminate()
+        services.wait()
+
+    succeeded = [result for result in results if result["status"] == 200]
+    cpu_seconds = ((usage_after.ru_utime - usage_before.ru_utime) +
+                   (usage_after.ru_stime - usage_before.ru_stime))
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss_divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    report = {
+        "requests": args.requests,
+        "target_rate": args.rate,
+        "succeeded": len(succeeded),
+        "failed": args.requests - len(succeeded),
+        "wall_time": wall_time,
+        "throughput": len(succeeded) / wall_time if wall_time > 0 else 0.0,
+        "cpu_seconds": cpu_seconds,
+        "cpu_per_video": cpu_seconds / max(1, len(succeeded)),
+        "peak_rss_mb": usage_after.ru_maxrss / rss_divisor,
+        "latency": percentiles([result["latency"] for result in succeeded]),
+        "stages": stage_latencies(tracer.trace_file)
+    }
+    print_report(report)
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Measure the throughput of QA reviews.
+
+A MarketingQAAgent reviews a batch of synthetic (task_data, result) pairs
+three ways: one `process` call per review, one `review_task` plus
+`_calculate_quality_score` per review, and a single `review_batch` call.
+Most fields are filled in correctly, so a share of the pairs pass.
+
+    python -m benchmarks.qa_review_benchmark --reviews 10000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TASK_TYPES = ["content_creation", "campaign_creation", "social_media", "email_marketing", "market_research"]
+TONES = ["professional", "friendly", "playful"]
+AUDIENCES = ["developers", "marketers", "executives"]
+
+def make_review(rng: random.Random, i: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Build a synthetic (task_data, result) pair. Each field is filled in
+    most of the time, so some pairs pass and others fail a few checks.
+    """
+    good = lambda: rng.random() < 0.9
+    task_data = {
+        "type": rng.choice(TASK_TYPES),
+        "brand_voice": {"allowed_tones": TONES[:2]},
+        "target_audience": AUDIENCES
+    }
+    result = {
+        "id": f"task-{i}",
+        "content": {
+            "tone": rng.choice(TONES[:2]) if good() else TONES[2],
+            "call_to_action": "Sign up today" if good() else "",
+            "target_audience": rng.sample(AUDIENCES, 2) if good() else ["everyone"],
+            "keywords": ["launch", "product"] if good() else []
+        },
+        "campaign": {
+            "objective": "Grow trial sign-ups by 20%" if good() else "Grow",
+            "timeline": {"start_date": "2024-01-01", "end_date": "2024-03-31"} if good() else {}
+        },
+        "task": {
+            "platform": "linkedin",
+            "content": {"text": f"Post {i}", "image": "banner.png" if good() else None}
+        }
+    }
+    return task_data, result
+
+def run(reviews: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> Dict[str, float]:
+    from organization.departments.marketing.qa.marketing_qa_agent import MarketingQAAgent
+
+    qa_agent = MarketingQAAgent("QABenchmarkAgent")
+    timings = {}
+
+    async def process_all():
+        for task_data, result in reviews:
+            await qa_agent.process({"task_data": task_data, "result": result})
+
+    start = time.perf_counter()
+    asyncio.run(process_all())
+    timings["process"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_data, result in reviews:
+        review = qa_agent.review_task(task_data, result)
+        qa_agent._calculate_quality_score(review, task_data, result)
+    timings["review_task"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = qa_agent.review_batch(reviews)
+    timings["review_batch"] = time.perf_counter() - start
+    timings["approved"] = sum(batch["passed"])
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of QA reviews")
+    parser.add_argument("--reviews", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.reviews < 1:
+        parser.error("--reviews must be positive")
+
+    # QA agents log every review; keep only warnings so logging does not dominate
+    logging.basicConfig(level=logging.WARNING)
+    # Spill review history to a scratch directory, never into the working tree
+    history_dir = tempfile.mkdtemp(prefix="qa_review_benchmark_history_")
+    os.environ["ORGANIZATION_HISTORY_DIR"] = history_dir
+    rng = random.Random(args.seed)
+    reviews = [make_review(rng, i) for i in range(args.reviews)]
+    timings = run(reviews)
+    shutil.rmtree(history_dir, ignore_errors=True)
+
+    print(f"{args.reviews} reviews, {timings['approved']} approved")
+    for method in ("process", "review_task", "review_batch"):
+        seconds = timings[method]
+        print(f"{method:>12}: {seconds:.3f}s, {args.reviews / max(seconds, 1e-9):,.0f} reviews/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Simulate a working day of a marketing department on a virtual clock.
+
+Every agent loops over a day of work: it spends simulated time on a task
+and then processes it (which includes simulated thinking), and the manager
+holds a meeting every simulated hour. On the virtual clock the day passes
+as fast as the work can be computed; --clock real runs the same workload in
+real time for comparison (use few agents and a short day).
+
+    python -m benchmarks.simulation_benchmark --agents 1000 --hours 8
+    python -m benchmarks.simulation_benchmark --agents 5 --hours 0.01 --clock real
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from organization.utils.clock import Clock, RealClock, VirtualClock, set_clock  # noqa: E402
+
+TASK_TYPES = ["campaign_creation", "content_creation", "market_research", "social_media"]
+
+async def work_day(agent, clock: Clock, end: float, rng: random.Random, minutes_per_task: float,
+                   counters: Dict[str, int]):
+    while clock.time() < end:
+        await clock.sleep(rng.uniform(0.5, 1.5) * minutes_per_task * 60)
+        await agent.process({"type": rng.choice(TASK_TYPES), "topic": "Simulated work"})
+        counters["tasks"] += 1
+
+async def meetings(manager, clock: Clock, end: float, counters: Dict[str, int]):
+    while clock.time() + 3600 < end:
+        await clock.sleep(3600)
+        await manager.hold_team_meeting(["Progress", "Blockers"])
+        counters["meetings"] += 1
+
+async def simulate(agents: int, hours: float, minutes_per_task: float, clock: Clock, seed: int) -> Dict[str, float]:
+    from organization.departments.marketing.agents.marketing_agent import MarketingAgent
+    from organization.departments.marketing.managers.marketing_manager import MarketingManager
+
+    random.seed(seed)
+    set_clock(clock)
+    manager = MarketingManager("SimulationManager")
+    team = [MarketingAgent(f"Agent{i}") for i in range(agents)]
+    for agent in team:
+        manager.add_agent(agent)
+
+    counters = {"tasks": 0, "meetings": 0}
+    start = clock.time()
+    end = start + hours * 3600
+    wall_start = time.perf_counter()
+    await asyncio.gather(
+        meetings(manager, clock, end, counters),
+        *[work_day(agent, clock, end, random.Random(seed + i), minutes_per_task, counters)
+          for i, agent in enumerate(team)]
+    )
+    return {
+        "simulated_seconds": clock.time() - start,
+        "wall_seconds": time.perf_counter() - wall_start,
+        "tasks": counters["tasks"],
+        "meetings": counters["meetings"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a working day of a marketing department")
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--hours", type=float, default=8.0, help="simulated working hours")
+    parser.add_argument("--minutes-per-task", type=float, default=30.0, help="mean simulated minutes per task")
+    parser.add_argument("--clock", choices=["virtual", "real"], default="virtual")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.agents < 1 or args.hours <= 0 or args.minutes_per_task <= 0:
+        parser.error("--agents, --hours and --minutes-per-task must be positive")
+
+    # Agents log every step; keep only warnings so logging does not dominate
+    logging.basicConfig(level=logging.WARNING)
+    # Spill agent history to a scratch directory, never into the working tree
+    history_dir = tempfile.mkdtemp(prefix="simulation_benchmark_history_")
+    os.environ["ORGANIZATION_HISTORY_DIR"] = history_dir
+    clock = VirtualClock() if args.clock == "virtual" else RealClock()
+    result = asyncio.run(simulate(args.agents, args.hours, args.minutes_per_task, clock, args.seed))
+    shutil.rmtree(history_dir, ignore_errors=True)
+
+    print(f"{args.agents} agents, {result['simulated_seconds'] / 3600:.2f} simulated hours "
+          f"on the {args.clock} clock")
+    print(f"{result['tasks']} tasks, {result['meetings']} meetings in {result['wall_seconds']:.2f}s wall time")
+    print(f"{result['simulated_seconds'] / result['wall_seconds']:.0f}x faster than real time, "
+          f"{result['tasks'] / result['wall_seconds']:.0f} tasks/s")
+
+if __name__ == "__main__":
+    main()
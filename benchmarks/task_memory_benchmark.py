@@ -0,0 +1,73 @@
+"""
+Memory benchmark: bytes per task for the old dict task records against
+the slotted Task dataclass.
+
+Each record gets the same small payload, as a freshly created task would.
+Memory is measured with tracemalloc, so it counts Python allocations only.
+
+    python -m benchmarks.task_memory_benchmark --tasks 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from organization.utils.task import Task  # noqa: E402
+
+def dict_task(task_id: str, task_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A task record as BaseManager.create_task built it before Task
+    """
+    return {
+        "id": task_id,
+        "type": "content_creation",
+        "data": task_data,
+        "priority": 1,
+        "status": "pending",
+        "created_at": datetime.now().isoformat(),
+        "assigned_to": None,
+        "completed_at": None,
+        "result": None,
+        "qa_status": "pending",
+        "qa_result": None
+    }
+
+def slotted_task(task_id: str, task_data: Dict[str, Any]) -> Task:
+    return Task(id=task_id, type="content_creation", data=task_data)
+
+def measure(factory: Callable[[str, Dict[str, Any]], Any], count: int) -> Dict[str, float]:
+    task_ids = [str(uuid.uuid4()) for _ in range(count)]
+    payloads = [{"topic": "Benchmark"} for _ in range(count)]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks: List[Any] = [factory(task_id, payload) for task_id, payload in zip(task_ids, payloads)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tasks
+    return {"bytes_per_task": current / count, "create_us": elapsed / count * 1e6}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory per task of dict and slotted task records")
+    parser.add_argument("--tasks", type=int, default=100000)
+    args = parser.parse_args()
+    if args.tasks < 1:
+        parser.error("--tasks must be positive")
+
+    results = {name: measure(factory, args.tasks) for name, factory in (("dict", dict_task), ("slotted", slotted_task))}
+    print(f"{'record':>8} {'bytes/task':>11} {'create us':>10}")
+    for name, result in results.items():
+        print(f"{name:>8} {result['bytes_per_task']:>11.0f} {result['create_us']:>10.2f}")
+    print(f"saved {1 - results['slotted']['bytes_per_task'] / results['dict']['bytes_per_task']:.0%} per task "
+          f"(ID and payload excluded from both)")
+
+if __name__ == "__main__":
+    main()
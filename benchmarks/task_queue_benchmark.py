@@ -0,0 +1,86 @@
+"""
+Microbenchmark: BaseManager's old list-based task queue against
+PriorityTaskQueue.
+
+The list queue is the previous implementation: a linear scan plus
+list.insert on every push and list.remove to take a task out.
+
+    python -m benchmarks.task_queue_benchmark --sizes 1000 10000 30000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from organization.utils.task_queue import PriorityTaskQueue  # noqa: E402
+
+class ListTaskQueue:
+    """
+    The list-based queue BaseManager used before PriorityTaskQueue
+    """
+
+    def __init__(self):
+        self.queue: List[str] = []
+        self.priorities: Dict[str, int] = {}
+
+    def push(self, task_id: str, priority: int):
+        self.priorities[task_id] = priority
+        for i, queued_task_id in enumerate(self.queue):
+            if self.priorities[queued_task_id] < priority:
+                self.queue.insert(i, task_id)
+                return
+        self.queue.append(task_id)
+
+    def discard(self, task_id: str):
+        if task_id in self.queue:
+            self.queue.remove(task_id)
+
+    def pop(self) -> str:
+        return self.queue.pop(0)
+
+def run_workload(queue_factory: Callable, size: int, seed: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    task_ids = [f"task-{i}" for i in range(size)]
+    priorities = [rng.randint(1, 5) for _ in range(size)]
+    to_remove = rng.sample(task_ids, size // 10)
+    queue = queue_factory()
+
+    timings = {}
+    start = time.perf_counter()
+    for task_id, priority in zip(task_ids, priorities):
+        queue.push(task_id, priority)
+    timings["push"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in to_remove:
+        queue.discard(task_id)
+    timings["remove"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(size - len(to_remove)):
+        queue.pop()
+    timings["pop"] = time.perf_counter() - start
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list and heap task queues")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'tasks':>8} {'queue':>6} {'push ms':>10} {'remove ms':>10} {'pop ms':>10} {'total ms':>10}")
+    for size in args.sizes:
+        totals = {}
+        for name, factory in (("list", ListTaskQueue), ("heap", PriorityTaskQueue)):
+            timings = run_workload(factory, size, args.seed)
+            totals[name] = sum(timings.values())
+            print(f"{size:>8} {name:>6} {timings['push'] * 1000:>10.1f} {timings['remove'] * 1000:>10.1f} "
+                  f"{timings['pop'] * 1000:>10.1f} {totals[name] * 1000:>10.1f}")
+        print(f"{'':>8} speedup x{totals['list'] / totals['heap']:.1f}")
+
+if __name__ == "__main__":
+    main()
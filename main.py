@@ -1,12 +1,22 @@
 import asyncio
+import os
+import time
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Awaitable, Callable
 from agents.content_strategist import ContentStrategistAgent
 from agents.video_searcher import VideoSearcherAgent
 from agents.script_writer import ScriptWriterAgent
 from agents.video_editor import VideoEditorAgent
 from agents.seo_metadata import SEOMetadataAgent
+from utils.batch import BatchContext, batch_scope
+from utils.checkpoint import CheckpointStore
+from utils.config import Config
+from utils.deadline import deadline_scope
+from utils.model_client import get_model_client
+from utils.scheduler import TENANT_NAME_PATTERN, scheduler
+from utils.tracing import escape_label_value, span, tracer
 
 app = FastAPI(title="AI Video Creation System")
 
@@ -15,6 +25,9 @@ class VideoRequest(BaseModel):
     keywords: Optional[List[str]] = []
     style: Optional[str] = "professional"
     duration: Optional[int] = 300  # in seconds
+    deadline: Optional[float] = None  # time budget for the whole request in seconds
+    job_id: Optional[str] = None  # resume key; a new unique ID when omitted
+    tenant: Optional[str] = Field("default", pattern=TENANT_NAME_PATTERN)  # stages are scheduled fairly between tenants
 
 class VideoResponse(BaseModel):
     video_path: str
@@ -23,72 +36,123 @@ class VideoResponse(BaseModel):
     tags: List[str]
     status: str
     message: Optional[str] = None
+    job_id: Optional[str] = None
+
+class BatchVideoRequest(BaseModel):
+    requests: List[VideoRequest]
+    max_concurrency: Optional[int] = None  # defaults to Config.BATCH_MAX_CONCURRENCY
+
+class BatchJobResult(BaseModel):
+    index: int
+    latency: float  # seconds from batch start until this job finished
+    result: VideoResponse
+
+class BatchVideoResponse(BaseModel):
+    jobs: List[BatchJobResult]
+    succeeded: int
+    failed: int
+    total_time: float  # in seconds
+    throughput: float  # videos per minute
+    latency_p50: float
+    latency_p95: float
+    max_latency: float
+    calls: Dict[str, int]
+    deduplicated: Dict[str, int]
+
+checkpoints = CheckpointStore()
+
+async def _run_stage(request: VideoRequest, job_id: str, stage: str, run: Callable[[], Awaitable[Dict[str, Any]]],
+                     is_valid: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+    """
+    Run a pipeline stage in the tenant's fair share of stage slots, or
+    reuse its output from the job's checkpoint
+    """
+    with span(stage, "stage") as stage_span:
+        saved = checkpoints.load_stage(job_id, stage)
+        if saved is not None and (is_valid is None or is_valid(saved)):
+            stage_span.set_attribute("resumed", True)
+            return saved
+        
+        async with scheduler.slot(request.tenant or "default"):
+            result = await run()
+        if result["status"] == "success":
+            checkpoints.save_stage(job_id, stage, result)
+        return result
+
+def _files_exist(paths: List[str]) -> bool:
+    return bool(paths) and all(os.path.exists(path) for path in paths)
 
 async def create_video(request: VideoRequest) -> VideoResponse:
+    job_id = request.job_id or CheckpointStore.new_job_id()
     try:
-        # Initialize agents
-        content_agent = ContentStrategistAgent()
-        video_agent = VideoSearcherAgent()
-        script_agent = ScriptWriterAgent()
-        editor_agent = VideoEditorAgent()
-        seo_agent = SEOMetadataAgent()
-        
-        # Step 1: Generate content strategy
-        content_result = await content_agent.process({
-            "topic": request.topic,
-            "keywords": request.keywords,
-            "style": request.style
-        })
-        
-        if content_result["status"] != "success":
-            raise Exception("Failed to generate content strategy")
-        
-        # Step 2: Search and download videos
-        video_result = await video_agent.process({
-            "concept": content_result["concept"],
-            "keywords": request.keywords
-        })
-        
-        if video_result["status"] != "success":
-            raise Exception("Failed to find suitable videos")
-        
-        # Step 3: Generate script and voiceover
-        script_result = await script_agent.process({
-            "concept": content_result["concept"],
-            "strategy": content_result["strategy"],
-            "videos": video_result["videos"]
-        })
-        
-        if script_result["status"] != "success":
-            raise Exception("Failed to generate script")
-        
-        # Step 4: Edit video
-        editor_result = await editor_agent.process({
-            "videos": video_result["videos"],
-            "script": script_result["script"],
-            "voiceover": script_result["voiceover"]
-        })
-        
-        if editor_result["status"] != "success":
-            raise Exception("Failed to edit video")
-        
-        # Step 5: Generate SEO metadata
-        seo_result = await seo_agent.process({
-            "concept": content_result["concept"],
-            "script": script_result["script"],
-            "description": script_result["description"]
-        })
-        
-        if seo_result["status"] != "success":
-            raise Exception("Failed to generate SEO metadata")
-        
-        return VideoResponse(
-            video_path=editor_result["output_path"],
-            title=seo_result["titles"][0],  # Use the first suggested title
-            description=script_result["description"],
-            tags=seo_result["tags"],
-            status="success"
-        )
+        # Every model call, download and render below shares this budget
+        with checkpoints.claim(job_id), deadline_scope(request.deadline or Config.REQUEST_DEADLINE), \
+                span("create_video", "request", job_id=job_id):
+            # Initialize agents
+            content_agent = ContentStrategistAgent()
+            video_agent = VideoSearcherAgent()
+            script_agent = ScriptWriterAgent()
+            editor_agent = VideoEditorAgent()
+            seo_agent = SEOMetadataAgent()
+            
+            # Step 1: Generate content strategy
+            content_result = await _run_stage(request, job_id, "content", lambda: content_agent.process({
+                "topic": request.topic,
+                "keywords": request.keywords,
+                "style": request.style
+            }))
+            
+            if content_result["status"] != "success":
+                raise Exception("Failed to generate content strategy")
+            
+            # Step 2: Search and download videos
+            video_result = await _run_stage(request, job_id, "videos", lambda: video_agent.process({
+                "concept": content_result["concept"],
+                "keywords": request.keywords
+            }), is_valid=lambda saved: _files_exist([video["filepath"] for video in saved["videos"]]))
+            
+            if video_result["status"] != "success":
+                raise Exception("Failed to find suitable videos")
+            
+            # Step 3: Generate script and voiceover
+            script_result = await _run_stage(request, job_id, "script", lambda: script_agent.process({
+                "concept": content_result["concept"],
+                "strategy": content_result["strategy"],
+                "videos": video_result["videos"]
+            }))
+            
+            if script_result["status"] != "success":
+                raise Exception("Failed to generate script")
+            
+            # Step 4: Edit video
+            editor_result = await _run_stage(request, job_id, "edit", lambda: editor_agent.process({
+                "videos": video_result["videos"],
+                "script": script_result["script"],
+                "voiceover": script_result["voiceover"]
+            }), is_valid=lambda saved: _files_exist([saved["output_path"]]))
+            
+            if editor_result["status"] != "success":
+                raise Exception("Failed to edit video")
+            
+            # Step 5: Generate SEO metadata
+            seo_result = await _run_stage(request, job_id, "seo", lambda: seo_agent.process({
+                "concept": content_result["concept"],
+                "script": script_result["script"],
+                "description": script_result["description"]
+            }))
+            
+            if seo_result["status"] != "success":
+                raise Exception("Failed to generate SEO metadata")
+            
+            checkpoints.clear(job_id)
+            return VideoResponse(
+                video_path=editor_result["output_path"],
+                title=seo_result["titles"][0],  # Use the first suggested title
+                description=script_result["description"],
+                tags=seo_result["tags"],
+                status="success",
+                job_id=job_id
+            )
         
     except Exception as e:
         return VideoResponse(
@@ -97,16 +161,88 @@ async def create_video(request: VideoRequest) -> VideoResponse:
             description="",
             tags=[],
             status="error",
-            message=str(e)
+            message=str(e),
+            job_id=job_id
         )
 
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(percentile * len(ordered)))]
+
+async def create_video_batch(batch_request: BatchVideoRequest) -> BatchVideoResponse:
+    """
+    Create many videos under one concurrency budget, sharing identical
+    model prompts, Pexels searches and clip downloads between jobs
+    """
+    batch = BatchContext(batch_request.max_concurrency or Config.BATCH_MAX_CONCURRENCY)
+    start_time = time.monotonic()
+    
+    async def run_job(index: int, request: VideoRequest) -> BatchJobResult:
+        async with batch.semaphore:
+            result = await create_video(request)
+        return BatchJobResult(index=index, latency=time.monotonic() - start_time, result=result)
+    
+    with batch_scope(batch):
+        jobs = await asyncio.gather(*[
+            run_job(index, request) for index, request in enumerate(batch_request.requests)
+        ])
+    
+    total_time = time.monotonic() - start_time
+    latencies = [job.latency for job in jobs]
+    succeeded = sum(1 for job in jobs if job.result.status == "success")
+    stats = batch.get_stats()
+    return BatchVideoResponse(
+        jobs=jobs,
+        succeeded=succeeded,
+        failed=len(jobs) - succeeded,
+        total_time=total_time,
+        throughput=(succeeded / total_time * 60) if total_time > 0 else 0.0,
+        latency_p50=_percentile(latencies, 0.5),
+        latency_p95=_percentile(latencies, 0.95),
+        max_latency=max(latencies, default=0.0),
+        calls=stats["calls"],
+        deduplicated=stats["deduplicated"]
+    )
+
 @app.post("/create-video", response_model=VideoResponse)
 async def create_video_endpoint(request: VideoRequest):
     result = await create_video(request)
     if result.status == "error":
-        raise HTTPException(status_code=500, detail=result.message)
+        # The job ID lets the client resume the failed job
+        raise HTTPException(status_code=500, detail={"message": result.message, "job_id": result.job_id})
     return result
 
+@app.post("/create-videos", response_model=BatchVideoResponse)
+async def create_videos_endpoint(batch_request: BatchVideoRequest):
+    if not batch_request.requests:
+        raise HTTPException(status_code=400, detail="Batch must contain at least one request")
+    if len(batch_request.requests) > Config.BATCH_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch cannot exceed {Config.BATCH_MAX_SIZE} requests")
+    if batch_request.max_concurrency is not None and batch_request.max_concurrency < 1:
+        raise HTTPException(status_code=400, detail="max_concurrency must be at least 1")
+    return await create_video_batch(batch_request)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Per-stage latency histograms in the Prometheus text format
+    """
+    stats = get_model_client().get_stats()
+    lines = [
+        "# TYPE model_client_hedges_sent_total counter",
+        f"model_client_hedges_sent_total {stats['hedges_sent']}",
+        "# TYPE model_client_circuit_open gauge",
+        f"model_client_circuit_open {int(stats['breaker_state'] == 'open')}",
+        "# TYPE scheduler_stages gauge"
+    ]
+    for tenant, tenant_stats in scheduler.get_stats()["tenants"].items():
+        tenant = escape_label_value(tenant)
+        lines.append(f'scheduler_stages{{tenant="{tenant}",state="running"}} {tenant_stats["running"]}')
+        lines.append(f'scheduler_stages{{tenant="{tenant}",state="queued"}} {tenant_stats["queued"]}')
+    return tracer.render_metrics() + "\n".join(lines) + "\n"
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from ....utils.base_agent import BaseAgent
 
@@ -9,14 +9,15 @@ class MarketingAgent(BaseAgent):
     Inherits from BaseAgent and implements marketing-specific functionality.
     """
     
-    def __init__(self, name: str):
+    def __init__(self, name: str, capacity: Optional[int] = None):
         """
         Initialize a marketing agent.
         
         Args:
             name: The name of the agent
+            capacity: Number of tasks the agent can hold at once
         """
-        super().__init__(name, "Marketing", "Marketing Specialist")
+        super().__init__(name, "Marketing", "Marketing Specialist", capacity)
         self.logger = logging.getLogger(f"Marketing.Agent.{name}")
         self.logger.info(f"Initializing marketing agent {name}")
         
@@ -117,7 +118,7 @@ class MarketingAgent(BaseAgent):
         Returns:
             Dictionary containing campaign details
         """
-        self.simulate_thinking(1.0, 3.0)
+        await self.simulate_thinking(1.0, 3.0)
         
         campaign = {
             "id": f"camp_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -159,7 +160,7 @@ class MarketingAgent(BaseAgent):
         Returns:
             Dictionary containing content details
         """
-        self.simulate_thinking(0.5, 2.0)
+        await self.simulate_thinking(0.5, 2.0)
         
         content = {
             "id": f"content_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -194,7 +195,7 @@ class MarketingAgent(BaseAgent):
         Returns:
             Dictionary containing research findings
         """
-        self.simulate_thinking(2.0, 4.0)
+        await self.simulate_thinking(2.0, 4.0)
         
         research = {
             "id": f"research_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -231,7 +232,7 @@ class MarketingAgent(BaseAgent):
         Returns:
             Dictionary containing task results
         """
-        self.simulate_thinking(0.5, 1.5)
+        await self.simulate_thinking(0.5, 1.5)
         
         task = {
             "id": f"social_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -1,7 +1,9 @@
 import logging
 from typing import Dict, Any, List
 from datetime import datetime
+from ....utils.base_agent import BaseAgent
 from ....utils.base_manager import BaseManager
+from ....utils.skill_matrix import SkillMatrix
 from ..agents.marketing_agent import MarketingAgent
 
 class MarketingManager(BaseManager):
@@ -10,6 +12,15 @@ class MarketingManager(BaseManager):
     Inherits from BaseManager and implements marketing-specific functionality.
     """
     
+    # Skills an agent needs for each task type, and the minimum proficiency
+    REQUIRED_SKILLS = {
+        "campaign_creation": ["campaign_management", "market_research"],
+        "content_creation": ["content_creation", "brand_management"],
+        "market_research": ["market_research", "analytics"],
+        "social_media": ["social_media", "content_creation"]
+    }
+    MIN_SKILL_PROFICIENCY = 0.7
+    
     def __init__(self, name: str):
         """
         Initialize a marketing manager.
@@ -26,7 +37,42 @@ class MarketingManager(BaseManager):
         self.budget_allocation = {}
         self.marketing_goals = {}
         self.team_performance = {}
+        self.skill_matrix = SkillMatrix({
+            task_type: {skill: self.MIN_SKILL_PROFICIENCY for skill in skills}
+            for task_type, skills in self.REQUIRED_SKILLS.items()
+        })
+        
+    def add_agent(self, agent: BaseAgent) -> str:
+        """
+        Add an agent to the manager's team.
         
+        Args:
+            agent: The agent to add
+            
+        Returns:
+            The agent's ID
+        """
+        if isinstance(agent, MarketingAgent):
+            # Track skills before the capability index subscribes to the agent
+            self.skill_matrix.add_agent(agent)
+        return super().add_agent(agent)
+    
+    def remove_agent(self, agent_id: str) -> bool:
+        """
+        Remove an agent from the manager's team.
+        
+        Args:
+            agent_id: The ID of the agent to remove
+            
+        Returns:
+            True if the agent was removed, False otherwise
+        """
+        agent = self.agents.get(agent_id)
+        removed = super().remove_agent(agent_id)
+        if removed:
+            self.skill_matrix.remove_agent(agent)
+        return removed
+    
     def _agent_can_handle_task(self, agent: MarketingAgent, task: Dict[str, Any]) -> bool:
         """
         Check if a marketing agent can handle a specific task.
@@ -40,23 +86,27 @@ class MarketingManager(BaseManager):
         """
         if not isinstance(agent, MarketingAgent):
             return False
-            
-        task_type = task.get("type", "")
-        required_skills = {
-            "campaign_creation": ["campaign_management", "market_research"],
-            "content_creation": ["content_creation", "brand_management"],
-            "market_research": ["market_research", "analytics"],
-            "social_media": ["social_media", "content_creation"]
-        }
+        return self.skill_matrix.can_handle(agent, task.get("type", ""))
+    
+    def get_eligible_agents(self, task_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Find the agents that can handle each of a batch of tasks,
+        using one vectorized eligibility check.
         
-        if task_type not in required_skills:
-            return False
+        Args:
+            task_ids: The IDs of the tasks
             
-        # Check if agent has required skills with sufficient proficiency
-        return all(
-            agent.get_skill_proficiency(skill) >= 0.7
-            for skill in required_skills[task_type]
-        )
+        Returns:
+            Dictionary of task_id -> IDs of the agents that can handle it
+        """
+        task_ids = [task_id for task_id in task_ids if task_id in self.tasks]
+        eligibility = self.skill_matrix.eligibility([self.tasks[task_id]["type"] for task_id in task_ids])
+        agent_ids = {id(agent): agent_id for agent_id, agent in self.agents.items()}
+        columns = [agent_ids[id(agent)] for agent in self.skill_matrix.agents]
+        return {
+            task_id: [columns[column] for column in row.nonzero()[0]]
+            for task_id, row in zip(task_ids, eligibility)
+        }
     
     async def process_department_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -215,7 +265,7 @@ class MarketingManager(BaseManager):
             )
         
         # Hold team meeting to discuss coordination
-        meeting_outcomes = self.hold_team_meeting([
+        meeting_outcomes = await self.hold_team_meeting([
             "Task Assignments",
             "Resource Allocation",
             "Timeline Review",
@@ -242,8 +292,8 @@ class MarketingManager(BaseManager):
             "performance_reviews": len(self.team_performance),
             "team_size": len(self.agents),
             "qa_team_size": len(self.qa_agents),
-            "pending_tasks": len([t for t in self.tasks.values() if t["status"] == "pending"]),
-            "completed_tasks": len([t for t in self.tasks.values() if t["status"] == "completed"]),
+            "pending_tasks": self.tasks.count(status="pending"),
+            "completed_tasks": self.tasks.count(status="completed"),
             "team_performance": self.get_team_performance_report()
         }
     
@@ -1,7 +1,105 @@
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from ....utils.base_qa_agent import BaseQAAgent
+from ....utils.checklist_rules import ChecklistRule
+
+# Checks behind the marketing checklist items. Each takes the task data and
+# the task result and returns whether the item passed.
+
+def _content(result: Dict[str, Any]) -> Dict[str, Any]:
+    return result.get("content", {})
+
+def _campaign(result: Dict[str, Any]) -> Dict[str, Any]:
+    return result.get("campaign", {})
+
+def _social_content(result: Dict[str, Any]) -> Dict[str, Any]:
+    return result.get("task", {}).get("content", {})
+
+def _brand_voice_matches(task_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    return _content(result).get("tone", "") in task_data.get("brand_voice", {}).get("allowed_tones", [])
+
+def _brand_voice_description(task_data: Dict[str, Any], result: Dict[str, Any]) -> str:
+    return f"Content tone '{_content(result).get('tone', '')}' should match brand voice guidelines"
+
+def _grammar_and_spelling(task_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    # This would typically use a grammar checking service
+    return True
+
+def _audience_matches(task_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    target_audience = task_data.get("target_audience", [])
+    return all(a in target_audience for a in _content(result).get("target_audience", []))
+
+def _objective_is_clear(task_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    objective = _campaign(result).get("objective", "")
+    return bool(objective and len(objective) > 10)
+
+def _timeline_has_dates(task_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    timeline = _campaign(result).get("timeline", {})
+    return bool(timeline.get("start_date") and timeline.get("end_date"))
+
+def _platform_compliant(task_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    social = result.get("task", {})
+    return bool(social.get("platform", "") and social.get("content", {}))
+
+def _has_visual(task_data: Dict[str, Any], result: Dict[str, Any]) -> bool:
+    content = _social_content(result)
+    return bool(content.get("image") or content.get("video"))
+
+MARKETING_RULES = (
+    ChecklistRule("content", "Brand voice consistency", _brand_voice_matches, "high", _brand_voice_description),
+    ChecklistRule("content", "Grammar and spelling", _grammar_and_spelling, "high",
+                  "Grammar and spelling check passed"),
+    ChecklistRule("content", "Call-to-action presence",
+                  lambda task_data, result: bool(_content(result).get("call_to_action")),
+                  "high", "Call-to-action is required"),
+    ChecklistRule("content", "Target audience alignment", _audience_matches, "high",
+                  "Content should target the specified audience"),
+    ChecklistRule("content", "SEO optimization",
+                  lambda task_data, result: bool(_content(result).get("keywords")),
+                  "medium", "Keywords should be specified for SEO"),
+    ChecklistRule("campaign", "Objective clarity", _objective_is_clear, "high",
+                  "Campaign objective should be clearly defined"),
+    ChecklistRule("campaign", "Audience definition",
+                  lambda task_data, result: len(_campaign(result).get("target_audience", [])) > 0,
+                  "high", "Target audience should be specified"),
+    ChecklistRule("campaign", "Budget合理性",
+                  lambda task_data, result: _campaign(result).get("budget", 0) > 0,
+                  "high", "Campaign budget should be specified"),
+    ChecklistRule("campaign", "Timeline feasibility", _timeline_has_dates, "high",
+                  "Campaign timeline should be specified"),
+    ChecklistRule("campaign", "Metrics measurability",
+                  lambda task_data, result: bool(_campaign(result).get("metrics", {}).get("kpi")),
+                  "high", "Success metrics should be specified"),
+    ChecklistRule("social_media", "Platform compliance", _platform_compliant, "high",
+                  "Content should meet platform requirements"),
+    ChecklistRule("social_media", "Hashtag usage",
+                  lambda task_data, result: len(_social_content(result).get("hashtags", [])) > 0,
+                  "medium", "Hashtags should be used appropriately"),
+    ChecklistRule("social_media", "Visual requirements", _has_visual, "medium",
+                  "Visual content should meet platform requirements"),
+    ChecklistRule("social_media", "Engagement elements",
+                  lambda task_data, result: bool(_social_content(result).get("engagement_prompt")),
+                  "medium", "Content should include engagement elements"),
+    ChecklistRule("social_media", "Timing optimization",
+                  lambda task_data, result: bool(result.get("task", {}).get("schedule", {}).get("posting_time")),
+                  "low", "Posting time should be optimized"),
+    ChecklistRule("email", "Subject line effectiveness",
+                  lambda task_data, result: bool(_content(result).get("subject")),
+                  "high", "Subject line should be compelling"),
+    ChecklistRule("email", "Preview text optimization",
+                  lambda task_data, result: bool(_content(result).get("preview_text")),
+                  "medium", "Preview text should be optimized"),
+    ChecklistRule("email", "Mobile responsiveness",
+                  lambda task_data, result: _content(result).get("mobile_responsive", False),
+                  "high", "Email should be mobile-responsive"),
+    ChecklistRule("email", "Compliance elements",
+                  lambda task_data, result: bool(_content(result).get("unsubscribe_link")),
+                  "high", "Email should include compliance elements"),
+    ChecklistRule("email", "Personalization",
+                  lambda task_data, result: _content(result).get("personalized", False),
+                  "medium", "Email should be personalized"),
+)
 
 class MarketingQAAgent(BaseQAAgent):
     """
@@ -9,14 +107,29 @@ class MarketingQAAgent(BaseQAAgent):
     Inherits from BaseQAAgent and implements marketing-specific QA functionality.
     """
     
-    def __init__(self, name: str):
+    DEFAULT_RULES = MARKETING_RULES
+    # Fields the marketing checks read; messages, IDs and timestamps are not
+    # part of the review cache key
+    REVIEWED_TASK_FIELDS = ("type", "brand_voice", "target_audience")
+    REVIEWED_RESULT_FIELDS = ("content", "campaign", "task")
+    UNREVIEWED_KEYS = ("id", "created_at")
+    # Checklist category reviewed for each task type
+    TASK_CATEGORIES = {
+        "content_creation": "content",
+        "campaign_creation": "campaign",
+        "social_media": "social_media",
+        "email_marketing": "email"
+    }
+    
+    def __init__(self, name: str, capacity: Optional[int] = None):
         """
         Initialize a marketing QA agent.
         
         Args:
             name: The name of the QA agent
+            capacity: Number of reviews the QA agent can hold at once
         """
-        super().__init__(name, "Marketing")
+        super().__init__(name, "Marketing", capacity)
         self.logger = logging.getLogger(f"Marketing.QA.{name}")
         self.logger.info(f"Initializing marketing QA agent {name}")
         
@@ -110,291 +223,7 @@ class MarketingQAAgent(BaseQAAgent):
                 "description": f"Unknown checklist item: {item}"
             }
             
-        # Implement specific checks based on category and item
-        if category == "content":
-            return self._check_content_item(item, task_data, result)
-        elif category == "campaign":
-            return self._check_campaign_item(item, task_data, result)
-        elif category == "social_media":
-            return self._check_social_media_item(item, task_data, result)
-        elif category == "email":
-            return self._check_email_item(item, task_data, result)
-        
-        return {
-            "passed": True,
-            "severity": "low",
-            "description": "Default check passed"
-        }
-    
-    def _check_content_item(self, item: str, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Check a content-specific checklist item.
-        
-        Args:
-            item: The checklist item to check
-            task_data: The original task data
-            result: The result of the task
-            
-        Returns:
-            Dictionary containing the check results
-        """
-        content = result.get("content", {})
-        
-        if item == "Brand voice consistency":
-            # Check if content matches brand voice guidelines
-            brand_voice = task_data.get("brand_voice", {})
-            content_tone = content.get("tone", "")
-            return {
-                "passed": content_tone in brand_voice.get("allowed_tones", []),
-                "severity": "high",
-                "description": f"Content tone '{content_tone}' should match brand voice guidelines"
-            }
-            
-        elif item == "Grammar and spelling":
-            # Check for basic grammar and spelling
-            text = content.get("text", "")
-            # This would typically use a grammar checking service
-            return {
-                "passed": True,  # Placeholder
-                "severity": "high",
-                "description": "Grammar and spelling check passed"
-            }
-            
-        elif item == "Call-to-action presence":
-            # Check for presence of call-to-action
-            has_cta = bool(content.get("call_to_action"))
-            return {
-                "passed": has_cta,
-                "severity": "high",
-                "description": "Call-to-action is required"
-            }
-            
-        elif item == "Target audience alignment":
-            # Check if content targets the right audience
-            target_audience = task_data.get("target_audience", [])
-            content_audience = content.get("target_audience", [])
-            return {
-                "passed": all(a in target_audience for a in content_audience),
-                "severity": "high",
-                "description": "Content should target the specified audience"
-            }
-            
-        elif item == "SEO optimization":
-            # Check for SEO elements
-            has_keywords = bool(content.get("keywords"))
-            return {
-                "passed": has_keywords,
-                "severity": "medium",
-                "description": "Keywords should be specified for SEO"
-            }
-        
-        return {
-            "passed": True,
-            "severity": "low",
-            "description": "Content check passed"
-        }
-    
-    def _check_campaign_item(self, item: str, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Check a campaign-specific checklist item.
-        
-        Args:
-            item: The checklist item to check
-            task_data: The original task data
-            result: The result of the task
-            
-        Returns:
-            Dictionary containing the check results
-        """
-        campaign = result.get("campaign", {})
-        
-        if item == "Objective clarity":
-            # Check if campaign objective is clear
-            objective = campaign.get("objective", "")
-            return {
-                "passed": bool(objective and len(objective) > 10),
-                "severity": "high",
-                "description": "Campaign objective should be clearly defined"
-            }
-            
-        elif item == "Audience definition":
-            # Check if target audience is well-defined
-            audience = campaign.get("target_audience", [])
-            return {
-                "passed": len(audience) > 0,
-                "severity": "high",
-                "description": "Target audience should be specified"
-            }
-            
-        elif item == "Budget合理性":
-            # Check if budget allocation is reasonable
-            budget = campaign.get("budget", 0)
-            return {
-                "passed": budget > 0,
-                "severity": "high",
-                "description": "Campaign budget should be specified"
-            }
-            
-        elif item == "Timeline feasibility":
-            # Check if timeline is realistic
-            timeline = campaign.get("timeline", {})
-            has_dates = bool(timeline.get("start_date") and timeline.get("end_date"))
-            return {
-                "passed": has_dates,
-                "severity": "high",
-                "description": "Campaign timeline should be specified"
-            }
-            
-        elif item == "Metrics measurability":
-            # Check if success metrics are measurable
-            metrics = campaign.get("metrics", {})
-            has_kpi = bool(metrics.get("kpi"))
-            return {
-                "passed": has_kpi,
-                "severity": "high",
-                "description": "Success metrics should be specified"
-            }
-        
-        return {
-            "passed": True,
-            "severity": "low",
-            "description": "Campaign check passed"
-        }
-    
-    def _check_social_media_item(self, item: str, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Check a social media-specific checklist item.
-        
-        Args:
-            item: The checklist item to check
-            task_data: The original task data
-            result: The result of the task
-            
-        Returns:
-            Dictionary containing the check results
-        """
-        social = result.get("task", {})
-        
-        if item == "Platform compliance":
-            # Check if content meets platform requirements
-            platform = social.get("platform", "")
-            content = social.get("content", {})
-            return {
-                "passed": bool(platform and content),
-                "severity": "high",
-                "description": "Content should meet platform requirements"
-            }
-            
-        elif item == "Hashtag usage":
-            # Check for appropriate hashtag usage
-            content = social.get("content", {})
-            hashtags = content.get("hashtags", [])
-            return {
-                "passed": len(hashtags) > 0,
-                "severity": "medium",
-                "description": "Hashtags should be used appropriately"
-            }
-            
-        elif item == "Visual requirements":
-            # Check if visual content meets requirements
-            content = social.get("content", {})
-            has_visual = bool(content.get("image") or content.get("video"))
-            return {
-                "passed": has_visual,
-                "severity": "medium",
-                "description": "Visual content should meet platform requirements"
-            }
-            
-        elif item == "Engagement elements":
-            # Check for engagement prompts
-            content = social.get("content", {})
-            has_engagement = bool(content.get("engagement_prompt"))
-            return {
-                "passed": has_engagement,
-                "severity": "medium",
-                "description": "Content should include engagement elements"
-            }
-            
-        elif item == "Timing optimization":
-            # Check if posting time is optimized
-            schedule = social.get("schedule", {})
-            has_time = bool(schedule.get("posting_time"))
-            return {
-                "passed": has_time,
-                "severity": "low",
-                "description": "Posting time should be optimized"
-            }
-        
-        return {
-            "passed": True,
-            "severity": "low",
-            "description": "Social media check passed"
-        }
-    
-    def _check_email_item(self, item: str, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Check an email-specific checklist item.
-        
-        Args:
-            item: The checklist item to check
-            task_data: The original task data
-            result: The result of the task
-            
-        Returns:
-            Dictionary containing the check results
-        """
-        email = result.get("content", {})
-        
-        if item == "Subject line effectiveness":
-            # Check if subject line is compelling
-            subject = email.get("subject", "")
-            return {
-                "passed": bool(subject and len(subject) > 0),
-                "severity": "high",
-                "description": "Subject line should be compelling"
-            }
-            
-        elif item == "Preview text optimization":
-            # Check if preview text is optimized
-            preview = email.get("preview_text", "")
-            return {
-                "passed": bool(preview and len(preview) > 0),
-                "severity": "medium",
-                "description": "Preview text should be optimized"
-            }
-            
-        elif item == "Mobile responsiveness":
-            # Check if content is mobile-responsive
-            is_responsive = email.get("mobile_responsive", False)
-            return {
-                "passed": is_responsive,
-                "severity": "high",
-                "description": "Email should be mobile-responsive"
-            }
-            
-        elif item == "Compliance elements":
-            # Check for required compliance elements
-            has_unsubscribe = bool(email.get("unsubscribe_link"))
-            return {
-                "passed": has_unsubscribe,
-                "severity": "high",
-                "description": "Email should include compliance elements"
-            }
-            
-        elif item == "Personalization":
-            # Check if personalization is implemented
-            is_personalized = email.get("personalized", False)
-            return {
-                "passed": is_personalized,
-                "severity": "medium",
-                "description": "Email should be personalized"
-            }
-        
-        return {
-            "passed": True,
-            "severity": "low",
-            "description": "Email check passed"
-        }
+        return super()._check_checklist_item(category, item, task_data, result)
     
     def _calculate_quality_score(self, checklist_results: Dict[str, Any], task_data: Dict[str, Any], result: Dict[str, Any]) -> float:
         """
@@ -428,6 +257,14 @@ class MarketingQAAgent(BaseQAAgent):
             if category.get("passed", False):
                 passed_checks += 1
         
+        return self._score_checks(total_checks, passed_checks, high_severity_checks, high_severity_passed)
+    
+    def _score_checks(self, total_checks: int, passed_checks: int, high_severity_checks: int,
+                      high_severity_passed: int) -> float:
+        """
+        Weigh counted checks into a quality score, for single and batch
+        reviews alike.
+        """
         if total_checks == 0:
             return 1.0
             
@@ -444,6 +281,34 @@ class MarketingQAAgent(BaseQAAgent):
         
         return max(0.0, min(1.0, final_score))
     
+    def _calculate_quality_scores(self, high_failed: List[int], other_failed: List[int]) -> List[float]:
+        """
+        Calculate quality scores for a batch of marketing reviews, with the
+        same weighting as _calculate_quality_score.
+        
+        Args:
+            high_failed: Failed high-severity checks per review
+            other_failed: Other failed checks per review
+            
+        Returns:
+            Quality scores between 0.0 and 1.0
+        """
+        # Reviews only list failed checks, so none of the counted checks passed
+        return [
+            self._score_checks(high + other, 0, high, 0)
+            for high, other in zip(high_failed, other_failed)
+        ]
+    
+    def _rules_for_task(self, task_data: Dict[str, Any]) -> Optional[Tuple[ChecklistRule, ...]]:
+        """
+        Get the checklist rules for a marketing task's category, or None if
+        the task type has no category.
+        """
+        category = self.TASK_CATEGORIES.get(task_data.get("type", ""))
+        if category is None:
+            return None
+        return self.get_checklist_rules(category)
+    
     def review_task(self, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Review a marketing task and provide feedback.
@@ -455,7 +320,7 @@ class MarketingQAAgent(BaseQAAgent):
         Returns:
             Dictionary containing review results
         """
-        self.logger.info(f"Reviewing marketing task of type: {task_data.get('type', 'unknown')}")
+        self.logger.info("Reviewing marketing task of type: %s", task_data.get("type", "unknown"))
         
         task_type = task_data.get("type", "")
         review_results = {
@@ -464,58 +329,25 @@ class MarketingQAAgent(BaseQAAgent):
             "passed": True
         }
         
-        # Determine which checklist to use based on task type
-        if task_type == "content_creation":
-            checklist = self.qa_checklist["content"]
-            for item in checklist:
-                result = self._check_checklist_item("content", item, task_data, result)
-                if not result["passed"]:
-                    review_results["passed"] = False
-                    if result["severity"] == "high":
-                        review_results["issues"].append(result)
-                    else:
-                        review_results["suggestions"].append(result)
-                        
-        elif task_type == "campaign_creation":
-            checklist = self.qa_checklist["campaign"]
-            for item in checklist:
-                result = self._check_checklist_item("campaign", item, task_data, result)
-                if not result["passed"]:
-                    review_results["passed"] = False
-                    if result["severity"] == "high":
-                        review_results["issues"].append(result)
-                    else:
-                        review_results["suggestions"].append(result)
-                        
-        elif task_type == "social_media":
-            checklist = self.qa_checklist["social_media"]
-            for item in checklist:
-                result = self._check_checklist_item("social_media", item, task_data, result)
-                if not result["passed"]:
-                    review_results["passed"] = False
-                    if result["severity"] == "high":
-                        review_results["issues"].append(result)
-                    else:
-                        review_results["suggestions"].append(result)
-                        
-        elif task_type == "email_marketing":
-            checklist = self.qa_checklist["email"]
-            for item in checklist:
-                result = self._check_checklist_item("email", item, task_data, result)
-                if not result["passed"]:
-                    review_results["passed"] = False
-                    if result["severity"] == "high":
-                        review_results["issues"].append(result)
-                    else:
-                        review_results["suggestions"].append(result)
-                        
-        else:
-            review_results["passed"] = False
+        rules = self._rules_for_task(task_data)
+        if rules is None:
             review_results["issues"].append({
                 "severity": "high",
                 "description": f"Unknown task type: {task_type}"
             })
-        
+            rules = ()
+        
+        for rule in rules:
+            check = self._evaluate_rule(rule, task_data, result)
+            if check is not None and not check["passed"]:
+                if check["severity"] == "high":
+                    review_results["issues"].append(check)
+                else:
+                    review_results["suggestions"].append(check)
+        
+        # Approve by quality score, as review_batch does
+        score = self._calculate_quality_score(review_results, task_data, result)
+        review_results["passed"] = self._approves(score)
         return review_results
     
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -539,19 +371,26 @@ class MarketingQAAgent(BaseQAAgent):
                 "error": "Missing task data or result"
             }
             
-        # Review the task
-        review = self.review_task(task_data, result)
-        
-        # Calculate quality score
-        quality_score = self._calculate_quality_score(review, task_data, result)
+        # Reuse the verdict of an earlier review of the same fields
+        cache_key = self.review_cache_key(task_data, result)
+        verdict = self.get_cached_review(cache_key)
+        if verdict is None:
+            # Review the task
+            review = self.review_task(task_data, result)
+            
+            # Calculate quality score
+            quality_score = self._calculate_quality_score(review, task_data, result)
+            verdict = self.cache_review(cache_key, {"review": review, "quality_score": quality_score})
+        review = verdict["review"]
+        quality_score = verdict["quality_score"]
         
         # Add review to history
-        self.review_history.append({
+        self._record_review({
             "task_id": result.get("id", "unknown"),
             "timestamp": datetime.now().isoformat(),
             "review": review,
             "quality_score": quality_score
-        })
+        }, quality_score, review["passed"])
         
         return {
             "success": True,
@@ -1,28 +1,14 @@
-import os
-import json
 import logging
+import os
 import random
-import time
+import re
+import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, Tuple
-import requests
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 from datetime import datetime
-import asyncio
-
-# Configure logging with error handling
-try:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("organization.log"),
-            logging.StreamHandler()
-        ]
-    )
-except Exception as e:
-    print(f"Failed to configure logging: {e}")
-    # Fallback to basic console logging
-    logging.basicConfig(level=logging.INFO)
+from .clock import get_clock
+from .history_buffer import HistoryBuffer
+from .logging_config import configure_logging
 
 logger = logging.getLogger("BaseAgent")
 
@@ -32,7 +18,13 @@ class BaseAgent(ABC):
     Provides common functionality and interface for all agents.
     """
     
-    def __init__(self, name: str, department: str, role: str):
+    # Task history kept in memory; older entries spill to HISTORY_DIR if it is set
+    TASK_HISTORY_SIZE = 1000
+    HISTORY_DIR = os.environ.get("ORGANIZATION_HISTORY_DIR") or None
+    # Tasks an agent holds at once unless configured otherwise
+    DEFAULT_CAPACITY = 1
+    
+    def __init__(self, name: str, department: str, role: str, capacity: Optional[int] = None):
         """
         Initialize the base agent with name, department, and role.
         
@@ -40,13 +32,20 @@ class BaseAgent(ABC):
             name: The name of the agent
             department: The department the agent belongs to
             role: The role of the agent
+            capacity: Number of tasks the agent can hold at once
+                (default DEFAULT_CAPACITY)
         """
         if not name or not department or not role:
             raise ValueError("Name, department, and role are required")
+        capacity = self.DEFAULT_CAPACITY if capacity is None else capacity
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError("Capacity must be a positive integer")
             
         self.name = name
         self.department = department
         self.role = role
+        self.instance_id = uuid.uuid4().hex[:8]  # keeps agents with the same name apart on disk
+        configure_logging()
         self.logger = logging.getLogger(f"{department}.{name}")
         self.logger.info(f"Initializing {name} agent in {department} department as {role}")
         self.performance_metrics = {
@@ -55,12 +54,61 @@ class BaseAgent(ABC):
             "average_processing_time": 0.0,
             "last_task_time": None
         }
-        self.task_history = []
-        self.is_busy = False
-        self.current_task = None
+        self.task_history = HistoryBuffer(
+            capacity=self.TASK_HISTORY_SIZE,
+            spill_path=self._history_path("tasks")
+        )
+        self.capacity = capacity
+        self.active_tasks: Dict[str, Dict[str, Any]] = {}  # slot table: task_id -> task in flight
+        self._listeners: List[Callable[["BaseAgent", str], None]] = []
+        self.clock = get_clock()
         self.skills = self._initialize_skills()
         self.knowledge_base = self._initialize_knowledge_base()
         
+    def _history_path(self, kind: str) -> Optional[str]:
+        """
+        Get the spill log path for one of the agent's histories. The
+        instance ID makes the path unique to this agent, so logs left by
+        other agents or earlier runs are never read back.
+        
+        Args:
+            kind: The kind of history, e.g. "tasks"
+            
+        Returns:
+            The path, or None if spilling is disabled
+        """
+        if not self.HISTORY_DIR:
+            return None
+        file_name = re.sub(r"[^\w.-]", "_", f"{self.department}_{self.name}_{self.instance_id}_{kind}.jsonl")
+        return os.path.join(self.HISTORY_DIR, file_name)
+    
+    def add_listener(self, listener: Callable[["BaseAgent", str], None]):
+        """
+        Register a callback for changes that affect task matching.
+        
+        The callback is called with the agent and an event name:
+        "availability" when the agent becomes busy or idle, and "skills"
+        when its skills change.
+        
+        Args:
+            listener: The callback
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[["BaseAgent", str], None]):
+        """
+        Unregister a callback added with add_listener.
+        
+        Args:
+            listener: The callback
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, event: str):
+        for listener in list(self._listeners):
+            listener(self, event)
+    
     def _initialize_skills(self) -> Dict[str, float]:
         """
         Initialize the agent's skills with proficiency levels.
@@ -123,7 +171,7 @@ class BaseAgent(ABC):
         
         self.performance_metrics["last_task_time"] = datetime.now().isoformat()
         
-        self.logger.info(f"Updated metrics: {self.performance_metrics}")
+        self.logger.info("Updated metrics: %s", self.performance_metrics)
     
     def log_task(self, task_id: str, input_data: Dict[str, Any], output_data: Dict[str, Any], 
                  success: bool, processing_time: float):
@@ -150,7 +198,7 @@ class BaseAgent(ABC):
         }
         
         self.task_history.append(task_log)
-        self.logger.info(f"Task {task_id} completed with success={success}, time={processing_time}s")
+        self.logger.info("Task %s completed with success=%s, time=%ss", task_id, success, processing_time)
     
     def get_performance_report(self) -> Dict[str, Any]:
         """
@@ -164,21 +212,75 @@ class BaseAgent(ABC):
             "department": self.department,
             "role": self.role,
             "metrics": self.performance_metrics,
-            "recent_tasks": self.task_history[-5:] if self.task_history else []
+            "capacity": self.capacity,
+            "active_tasks": len(self.active_tasks),
+            "recent_tasks": self.task_history.recent(5)
         }
     
+    def iter_task_history(self, since: Optional[str] = None, until: Optional[str] = None,
+                          limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the agent's task history, including entries spilled to disk.
+        
+        Args:
+            since: Earliest ISO timestamp to include
+            until: Latest ISO timestamp to include
+            limit: Maximum number of entries
+            
+        Returns:
+            Iterator over task log entries, oldest first
+        """
+        return self.task_history.query(since, until, limit)
+    
+    def close(self):
+        """
+        Close the agent's history spill logs.
+        """
+        self.task_history.close()
+    
+    @property
+    def is_busy(self) -> bool:
+        """
+        Whether every slot of the agent is taken.
+        """
+        return len(self.active_tasks) >= self.capacity
+    
+    @property
+    def current_task(self) -> Optional[Dict[str, Any]]:
+        """
+        The oldest task in flight, or None if the agent is idle.
+        """
+        return next(iter(self.active_tasks.values()), None)
+    
+    @property
+    def free_slots(self) -> int:
+        return max(0, self.capacity - len(self.active_tasks))
+    
+    def set_capacity(self, capacity: int):
+        """
+        Change the number of tasks the agent can hold at once. Tasks in
+        flight keep their slots; a lower capacity applies as they finish.
+        
+        Args:
+            capacity: The new capacity
+        """
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ValueError("Capacity must be a positive integer")
+        self.capacity = capacity
+        self._notify("availability")
+    
     def is_available(self) -> bool:
         """
-        Check if the agent is available to take on a new task.
+        Check if the agent has a free slot for a new task.
         
         Returns:
             True if the agent is available, False otherwise
         """
-        return not self.is_busy
+        return len(self.active_tasks) < self.capacity
     
     def assign_task(self, task_id: str, task_data: Dict[str, Any]) -> bool:
         """
-        Assign a task to the agent.
+        Assign a task to one of the agent's free slots.
         
         Args:
             task_id: Unique identifier for the task
@@ -190,17 +292,20 @@ class BaseAgent(ABC):
         if not task_id:
             raise ValueError("Task ID is required")
             
+        if task_id in self.active_tasks:
+            self.logger.warning(f"Task {task_id} is already assigned to agent {self.name}")
+            return False
         if self.is_busy:
             self.logger.warning(f"Cannot assign task {task_id} to busy agent {self.name}")
             return False
         
-        self.is_busy = True
-        self.current_task = {
+        self.active_tasks[task_id] = {
             "task_id": task_id,
             "data": task_data,
-            "start_time": datetime.now().isoformat()
+            "start_time": self.clock.now().isoformat()
         }
-        self.logger.info(f"Assigned task {task_id} to agent {self.name}")
+        self._notify("availability")
+        self.logger.info("Assigned task %s to agent %s", task_id, self.name)
         return True
     
     def complete_task(self, task_id: str, result: Dict[str, Any], success: bool = True):
@@ -215,29 +320,31 @@ class BaseAgent(ABC):
         if not task_id:
             raise ValueError("Task ID is required")
             
-        if not self.current_task or self.current_task["task_id"] != task_id:
+        slot = self.active_tasks.get(task_id)
+        if slot is None:
             self.logger.error(f"Cannot complete task {task_id} - not assigned to agent {self.name}")
             return
         
         try:
-            start_time = datetime.fromisoformat(self.current_task["start_time"])
-            end_time = datetime.now()
+            start_time = datetime.fromisoformat(slot["start_time"])
+            end_time = self.clock.now()
             processing_time = (end_time - start_time).total_seconds()
             
-            self.log_task(task_id, self.current_task["data"], result, success, processing_time)
+            self.log_task(task_id, slot["data"], result, success, processing_time)
             self.update_metrics(success, processing_time)
             
-            self.is_busy = False
-            self.current_task = None
-            self.logger.info(f"Completed task {task_id}")
+            del self.active_tasks[task_id]
+            self._notify("availability")
+            self.logger.info("Completed task %s", task_id)
         except Exception as e:
             self.logger.error(f"Error completing task {task_id}: {e}")
             raise
     
-    def simulate_thinking(self, min_time: float = 0.5, max_time: float = 2.0):
+    async def simulate_thinking(self, min_time: float = 0.5, max_time: float = 2.0):
         """
         Simulate the agent thinking about a task.
         This is used to make the agent behavior more realistic.
+        The time passes on the agent's clock without blocking the event loop.
         
         Args:
             min_time: Minimum thinking time in seconds
@@ -247,7 +354,7 @@ class BaseAgent(ABC):
             raise ValueError("Invalid thinking time parameters")
             
         thinking_time = random.uniform(min_time, max_time)
-        time.sleep(thinking_time)
+        await self.clock.sleep(thinking_time)
     
     def get_skill_proficiency(self, skill: str) -> float:
         """
@@ -279,10 +386,11 @@ class BaseAgent(ABC):
         if skill in self.skills:
             current_proficiency = self.skills[skill]
             self.skills[skill] = min(1.0, current_proficiency + improvement)
-            self.logger.info(f"Improved {skill} skill from {current_proficiency:.2f} to {self.skills[skill]:.2f}")
+            self.logger.info("Improved %s skill from %.2f to %.2f", skill, current_proficiency, self.skills[skill])
         else:
             self.skills[skill] = min(1.0, improvement)
-            self.logger.info(f"Added new skill {skill} with proficiency {self.skills[skill]:.2f}")
+            self.logger.info("Added new skill %s with proficiency %.2f", skill, self.skills[skill])
+        self._notify("skills")
     
     def add_to_knowledge_base(self, key: str, value: Any):
         """
@@ -295,7 +403,7 @@ class BaseAgent(ABC):
         if not key:
             raise ValueError("Knowledge key is required")
         self.knowledge_base[key] = value
-        self.logger.info(f"Added knowledge: {key}")
+        self.logger.info("Added knowledge: %s", key)
     
     def get_from_knowledge_base(self, key: str) -> Optional[Any]:
         """
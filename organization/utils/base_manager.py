@@ -1,26 +1,20 @@
+import asyncio
+import heapq
 import logging
 import random
-import time
 import uuid
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 from .base_agent import BaseAgent
-
-# Configure logging with error handling
-try:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("organization.log"),
-            logging.StreamHandler()
-        ]
-    )
-except Exception as e:
-    print(f"Failed to configure logging: {e}")
-    # Fallback to basic console logging
-    logging.basicConfig(level=logging.INFO)
+from .logging_config import configure_logging
+from .capability_index import CapabilityIndex
+from .clock import get_clock
+from .qa_dispatcher import QADispatcher
+from .retry_scheduler import RetryScheduler
+from .task import Task
+from .task_queue import TypedTaskQueue
+from .task_store import TaskStore
 
 logger = logging.getLogger("BaseManager")
 
@@ -30,6 +24,15 @@ class BaseManager(ABC):
     Provides common functionality for managing teams of agents.
     """
     
+    # Defaults for the background cleanup sweeper
+    TASK_RETENTION_DAYS = 30
+    CLEANUP_INTERVAL_SECONDS = 3600.0
+    # Retries of rejected tasks back off exponentially from RETRY_BASE_DELAY
+    # seconds; a task rejected MAX_ATTEMPTS times is dead-lettered
+    RETRY_BASE_DELAY = 30.0
+    RETRY_MAX_DELAY = 3600.0
+    MAX_ATTEMPTS = 3
+    
     def __init__(self, name: str, department: str):
         """
         Initialize the base manager with name and department.
@@ -43,13 +46,16 @@ class BaseManager(ABC):
             
         self.name = name
         self.department = department
+        configure_logging()
         self.logger = logging.getLogger(f"{department}.Manager.{name}")
         self.logger.info(f"Initializing {name} manager in {department} department")
         
         self.agents = {}  # Dictionary of agent_id -> agent
         self.qa_agents = {}  # Dictionary of qa_agent_id -> qa_agent
-        self.tasks = {}  # Dictionary of task_id -> task
-        self.task_queue = []  # List of task_ids in order of priority
+        self.tasks = TaskStore()  # task_id -> task, indexed by status, type and assigned_to
+        self.task_queue = TypedTaskQueue()  # Pending task_ids by priority, FIFO within a priority
+        self.capability_index = CapabilityIndex(self._agent_can_handle_task_type)
+        self.qa_dispatcher = QADispatcher(self._on_review_assigned)  # per-reviewer QA queues
         self.performance_metrics = {
             "tasks_assigned": 0,
             "tasks_completed": 0,
@@ -58,6 +64,12 @@ class BaseManager(ABC):
         }
         self.team_knowledge_base = {}
         self.team_skills = {}
+        self._cleanup_sweeper: Optional[asyncio.Task] = None
+        self.engine = None  # ExecutionEngine running this manager's tasks, if any
+        self.clock = get_clock()
+        self.retry_scheduler = RetryScheduler(
+            self.RETRY_BASE_DELAY, self.RETRY_MAX_DELAY, self.MAX_ATTEMPTS, start=self.clock.time()
+        )
         
     def add_agent(self, agent: BaseAgent) -> str:
         """
@@ -74,6 +86,7 @@ class BaseManager(ABC):
             
         agent_id = str(uuid.uuid4())
         self.agents[agent_id] = agent
+        self.capability_index.add_agent(agent_id, agent)
         self.logger.info(f"Added agent {agent.name} to team with ID {agent_id}")
         return agent_id
     
@@ -92,6 +105,7 @@ class BaseManager(ABC):
             
         qa_agent_id = str(uuid.uuid4())
         self.qa_agents[qa_agent_id] = qa_agent
+        self.qa_dispatcher.add_reviewer(qa_agent_id, qa_agent)
         self.logger.info(f"Added QA agent {qa_agent.name} to team with ID {qa_agent_id}")
         return qa_agent_id
     
@@ -110,6 +124,7 @@ class BaseManager(ABC):
             
         if agent_id in self.agents:
             agent = self.agents.pop(agent_id)
+            self.capability_index.remove_agent(agent_id)
             self.logger.info(f"Removed agent {agent.name} from team")
             return True
         return False
@@ -129,6 +144,7 @@ class BaseManager(ABC):
             
         if qa_agent_id in self.qa_agents:
             qa_agent = self.qa_agents.pop(qa_agent_id)
+            self.qa_dispatcher.remove_reviewer(qa_agent_id)
             self.logger.info(f"Removed QA agent {qa_agent.name} from team")
             return True
         return False
@@ -153,72 +169,101 @@ class BaseManager(ABC):
             raise ValueError("Priority must be a positive integer")
             
         task_id = str(uuid.uuid4())
-        task = {
-            "id": task_id,
-            "type": task_type,
-            "data": task_data,
-            "priority": priority,
-            "status": "pending",
-            "created_at": datetime.now().isoformat(),
-            "assigned_to": None,
-            "completed_at": None,
-            "result": None,
-            "qa_status": "pending",
-            "qa_result": None
-        }
-        
-        self.tasks[task_id] = task
-        
-        # Add to queue based on priority
-        inserted = False
-        for i, queued_task_id in enumerate(self.task_queue):
-            if self.tasks[queued_task_id]["priority"] < priority:
-                self.task_queue.insert(i, task_id)
-                inserted = True
-                break
+        task = Task(id=task_id, type=task_type, data=task_data, priority=priority, created_at=self.clock.time())
         
-        if not inserted:
-            self.task_queue.append(task_id)
+        self.tasks.add(task)
+        self.capability_index.add_task_type(task_type)
+        self.task_queue.push(task_id, priority, task_type)
         
         self.logger.info(f"Created task {task_id} of type {task_type} with priority {priority}")
         return task_id
     
-    def assign_tasks(self):
+    def assign_tasks(self) -> List[Tuple[str, str]]:
         """
         Assign pending tasks to available agents.
+        
+        Only task types with an available qualified agent are considered.
+        Their queue heads are merged in priority order, so a pass costs
+        about the number of tasks dispatched rather than tasks x agents.
+        Agents with several slots are filled up to their capacity.
+        
+        Returns:
+            (task_id, agent_id) pairs of the tasks assigned in this pass
         """
+        self.release_due_retries()
         if not self.task_queue:
             self.logger.info("No tasks to assign")
-            return
+            return []
             
         if not self.agents:
             self.logger.warning("No agents available to assign tasks")
-            return
+            return []
         
-        for task_id in self.task_queue:
-            task = self.tasks[task_id]
-            
-            # Skip tasks that are already assigned or completed
-            if task["status"] != "pending":
+        assigned = self.dispatch_pending()
+        waiting = len(self.task_queue)
+        if waiting:
+            self.logger.warning(f"Could not find an available agent for {waiting} tasks")
+        return assigned
+    
+    def dispatch_pending(self) -> List[Tuple[str, str]]:
+        """
+        Run one assignment pass without reporting tasks left waiting.
+        Used by assign_tasks and by the execution engine, which dispatches
+        after every completion.
+        
+        Returns:
+            (task_id, agent_id) pairs of the tasks assigned
+        """
+        assigned: List[Tuple[str, str]] = []
+        heads = []
+        for task_type in self.task_queue.task_types():
+            if self.capability_index.has_available(task_type):
+                entry = self.task_queue.queue(task_type).peek_entry()
+                heads.append((entry[0], entry[1], task_type))
+        heapq.heapify(heads)
+        
+        while heads:
+            _, _, task_type = heapq.heappop(heads)
+            agent_id = self.capability_index.find_agent(task_type)
+            if agent_id is None:
+                # The agents for this type were taken by other types this pass
                 continue
+            task_id = self.task_queue.pop_type(task_type)
+            task = self.tasks[task_id]
             
-            # Find an available agent with the right skills
-            assigned = False
-            for agent_id, agent in self.agents.items():
-                if agent.is_available() and self._agent_can_handle_task(agent, task):
-                    task["status"] = "assigned"
-                    task["assigned_to"] = agent_id
-                    agent.assign_task(task_id, task["data"])
-                    self.logger.info(f"Assigned task {task_id} to agent {agent.name}")
-                    assigned = True
-                    break
+            # Drop tasks that are no longer pending; a task re-enters the
+            # queue when it becomes pending again
+            if task["status"] == "pending":
+                agent = self.agents[agent_id]
+                self.tasks.update_task(task_id, status="assigned", assigned_to=agent_id)
+                agent.assign_task(task_id, task["data"])
+                assigned.append((task_id, agent_id))
+                self.logger.info("Assigned task %s to agent %s", task_id, agent.name)
+            
+            entry = self.task_queue.queue(task_type).peek_entry()
+            if entry and self.capability_index.has_available(task_type):
+                heapq.heappush(heads, (entry[0], entry[1], task_type))
+        return assigned
+    
+    def _agent_can_handle_task_type(self, agent: BaseAgent, task_type: str) -> bool:
+        """
+        Check if an agent can handle tasks of a given type.
+        The capability index caches this per agent and task type.
+        
+        Args:
+            agent: The agent to check
+            task_type: The task type to check
             
-            if not assigned:
-                self.logger.warning(f"Could not find an available agent for task {task_id}")
+        Returns:
+            True if the agent can handle the task type, False otherwise
+        """
+        return self._agent_can_handle_task(agent, {"type": task_type})
     
     def _agent_can_handle_task(self, agent: BaseAgent, task: Dict[str, Any]) -> bool:
         """
         Check if an agent can handle a specific task.
+        Task matching only passes the task type, so overrides should not
+        depend on other task fields.
         
         Args:
             agent: The agent to check
@@ -248,27 +293,40 @@ class BaseManager(ABC):
             self.logger.error(f"Cannot update status of non-existent task {task_id}")
             return
         
-        task = self.tasks[task_id]
-        task["status"] = status
+        task = self.tasks.update_task(task_id, status=status)
         
         if status == "completed" and result is not None:
             task["result"] = result
-            task["completed_at"] = datetime.now().isoformat()
+            task["completed_at"] = self.clock.time()
             
-            # Assign to QA if available
+            # Queue for review with the least-loaded QA agent
             if self.qa_agents:
-                qa_agent_id = random.choice(list(self.qa_agents.keys()))
-                qa_agent = self.qa_agents[qa_agent_id]
-                if qa_agent.is_available():
-                    task["qa_status"] = "assigned"
-                    qa_agent.assign_task(task_id, {
-                        "task_data": task["data"],
-                        "result": result
-                    })
-                    self.logger.info(f"Assigned task {task_id} to QA agent {qa_agent.name}")
+                self.qa_dispatcher.submit(task_id, {
+                    "task_data": dict(task["data"], type=task["type"]),
+                    "result": result
+                })
         
         self.logger.info(f"Updated task {task_id} status to {status}")
     
+    def _on_review_assigned(self, task_id: str, qa_agent_id: str):
+        """
+        Record that a QA agent started reviewing a task, and have the
+        execution engine run the review if one is attached.
+        
+        Args:
+            task_id: The ID of the task under review
+            qa_agent_id: The ID of the reviewing QA agent
+        """
+        task = self.tasks.get(task_id)
+        if task is None:
+            # The task was removed while its review was queued; free the slot
+            self.qa_agents[qa_agent_id].complete_task(task_id, {"error": "Task no longer exists"}, success=False)
+            return
+        task["qa_status"] = "assigned"
+        self.logger.info("Assigned task %s to QA agent %s", task_id, self.qa_agents[qa_agent_id].name)
+        if self.engine is not None:
+            self.engine.start_review(task_id, qa_agent_id)
+    
     def update_qa_status(self, task_id: str, status: str, result: Optional[Dict[str, Any]] = None):
         """
         Update the QA status of a task.
@@ -295,18 +353,75 @@ class BaseManager(ABC):
             
             # Update task status based on QA result
             if status == "approved":
-                task["status"] = "approved"
+                self.tasks.update_task(task_id, status="approved")
             elif status == "rejected":
-                task["status"] = "rejected"
-                # Put back in queue with higher priority
-                if task_id in self.task_queue:
-                    self.task_queue.remove(task_id)
-                task["priority"] += 1
-                self.task_queue.append(task_id)
+                self.tasks.update_task(task_id, status="rejected")
+                task["attempts"] += 1
+                due = self.retry_scheduler.schedule(task_id, task["attempts"], self.clock.time(), result)
+                if due is None:
+                    self.logger.warning("Task %s was rejected %d times and moved to the dead-letter queue",
+                                        task_id, task["attempts"])
+                else:
+                    self.logger.info("Task %s will be retried in %.0f seconds", task_id, due - self.clock.time())
         
         self.logger.info(f"Updated task {task_id} QA status to {status}")
     
-    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+    def release_due_retries(self) -> List[str]:
+        """
+        Put rejected tasks whose retry is due back into the task queue,
+        one priority level higher than before.
+        
+        Returns:
+            The IDs of the requeued tasks
+        """
+        released = []
+        for task_id in self.retry_scheduler.due(self.clock.time()):
+            task = self.tasks.get(task_id)
+            if task is None or task["status"] != "rejected":
+                continue
+            self._requeue_task(task)
+            released.append(task_id)
+        if released:
+            self.logger.info("Requeued %d rejected tasks for retry", len(released))
+        return released
+    
+    def _requeue_task(self, task: Task):
+        task["priority"] += 1
+        task["qa_status"] = "pending"
+        self.tasks.update_task(task["id"], status="pending", assigned_to=None)
+        self.task_queue.push(task["id"], task["priority"], task["type"])
+    
+    def get_dead_letters(self) -> List[Dict[str, Any]]:
+        """
+        Get the tasks that were rejected too often to be retried, oldest first.
+        
+        Returns:
+            Dead letters with the task ID, attempts, time and last QA result
+        """
+        return list(self.retry_scheduler.dead_letters.values())
+    
+    def retry_dead_letter(self, task_id: str) -> bool:
+        """
+        Give a dead-lettered task a fresh set of attempts and requeue it.
+        
+        Args:
+            task_id: The ID of the dead-lettered task
+            
+        Returns:
+            True if the task was requeued, False otherwise
+        """
+        if not task_id:
+            raise ValueError("Task ID is required")
+        if task_id not in self.retry_scheduler.dead_letters or task_id not in self.tasks:
+            return False
+        self.retry_scheduler.cancel(task_id)
+        task = self.tasks[task_id]
+        task["attempts"] = 0
+        self._requeue_task(task)
+        self.logger.info("Requeued dead-lettered task %s", task_id)
+        return True
+    
+    def get_task(self, task_id: str) -> Optional[Task]:
         """
         Get a task by ID.
         
@@ -320,6 +435,21 @@ class BaseManager(ABC):
             raise ValueError("Task ID is required")
         return self.tasks.get(task_id)
     
+    def get_tasks(self, status: Optional[str] = None, task_type: Optional[str] = None,
+                  assigned_to: Optional[str] = None) -> List[Task]:
+        """
+        Get the tasks matching all the given filters.
+        
+        Args:
+            status: Only tasks with this status
+            task_type: Only tasks of this type
+            assigned_to: Only tasks assigned to this agent
+            
+        Returns:
+            List of matching tasks
+        """
+        return [self.tasks[task_id] for task_id in self.tasks.find(status, task_type, assigned_to)]
+    
     def get_agent(self, agent_id: str) -> Optional[BaseAgent]:
         """
         Get an agent by ID.
@@ -378,10 +508,10 @@ class BaseManager(ABC):
             "metrics": self.performance_metrics,
             "agents": agent_reports,
             "qa_agents": qa_reports,
-            "pending_tasks": len([t for t in self.tasks.values() if t["status"] == "pending"]),
-            "completed_tasks": len([t for t in self.tasks.values() if t["status"] == "completed"]),
-            "approved_tasks": len([t for t in self.tasks.values() if t["status"] == "approved"]),
-            "rejected_tasks": len([t for t in self.tasks.values() if t["status"] == "rejected"])
+            "pending_tasks": self.tasks.count(status="pending"),
+            "completed_tasks": self.tasks.count(status="completed"),
+            "approved_tasks": self.tasks.count(status="approved"),
+            "rejected_tasks": self.tasks.count(status="rejected")
         }
     
     def update_team_knowledge(self, key: str, value: Any):
@@ -423,9 +553,10 @@ class BaseManager(ABC):
         for agent in self.agents.values():
             agent.improve_skill(skill, improvement)
     
-    def hold_team_meeting(self, agenda: List[str]) -> Dict[str, Any]:
+    async def hold_team_meeting(self, agenda: List[str]) -> Dict[str, Any]:
         """
         Simulate a team meeting to discuss progress and share knowledge.
+        Discussion time passes on the manager's clock.
         
         Args:
             agenda: List of topics to discuss
@@ -439,7 +570,7 @@ class BaseManager(ABC):
         self.logger.info(f"Starting team meeting with agenda: {agenda}")
         
         meeting_outcomes = {
-            "date": datetime.now().isoformat(),
+            "date": self.clock.now().isoformat(),
             "attendees": [agent.name for agent in self.agents.values()] + 
                          [qa_agent.name for qa_agent in self.qa_agents.values()],
             "agenda": agenda,
@@ -450,7 +581,7 @@ class BaseManager(ABC):
         # Simulate meeting discussion
         for topic in agenda:
             self.logger.info(f"Discussing topic: {topic}")
-            time.sleep(random.uniform(0.5, 1.5))
+            await self.clock.sleep(random.uniform(0.5, 1.5))
             
             # Generate a decision for this topic
             decision = self._generate_meeting_decision(topic)
@@ -462,7 +593,7 @@ class BaseManager(ABC):
                     "topic": topic,
                     "action": f"Follow up on {topic}",
                     "assigned_to": random.choice(list(self.agents.keys())),
-                    "due_date": (datetime.now() + timedelta(days=random.randint(1, 7))).isoformat()
+                    "due_date": (self.clock.now() + timedelta(days=random.randint(1, 7))).isoformat()
                 }
                 meeting_outcomes["action_items"].append(action_item)
         
@@ -496,31 +627,75 @@ class BaseManager(ABC):
         """
         pass
     
-    def cleanup_old_tasks(self, days: int = 30):
+    def cleanup_old_tasks(self, days: float = TASK_RETENTION_DAYS) -> int:
         """
-        Clean up tasks older than the specified number of days.
+        Clean up completed, approved, rejected and failed tasks older than the
+        specified number of days. Age is measured on the manager's clock,
+        like retry delays.
         
         Args:
             days: Number of days after which to clean up tasks
+            
+        Returns:
+            The number of tasks removed
         """
         if days < 0:
             raise ValueError("Days must be non-negative")
             
-        cutoff_date = datetime.now() - timedelta(days=days)
-        tasks_to_remove = []
-        
-        for task_id, task in self.tasks.items():
-            if task["status"] in ["completed", "approved", "rejected"]:
-                task_date = datetime.fromisoformat(task["created_at"])
-                if task_date < cutoff_date:
-                    tasks_to_remove.append(task_id)
+        expired = self.tasks.pop_expired(self.clock.time() - days * 86400)
+        for task in expired:
+            self.task_queue.discard(task["id"])
+            self.retry_scheduler.cancel(task["id"])
+        if expired:
+            self.qa_dispatcher.discard(*(task["id"] for task in expired))
         
-        for task_id in tasks_to_remove:
-            self.tasks.pop(task_id)
-            if task_id in self.task_queue:
-                self.task_queue.remove(task_id)
+        if expired:
+            self.logger.info(f"Cleaned up {len(expired)} old tasks")
+        return len(expired)
+    
+    def start_cleanup_sweeper(self, interval: float = CLEANUP_INTERVAL_SECONDS,
+                              days: float = TASK_RETENTION_DAYS) -> asyncio.Task:
+        """
+        Start cleaning up old tasks in the background on the running event loop.
+        Calling this while the sweeper is running returns the running sweeper.
         
-        self.logger.info(f"Cleaned up {len(tasks_to_remove)} old tasks")
+        Args:
+            interval: Seconds between sweeps
+            days: Number of days after which to clean up tasks
+            
+        Returns:
+            The sweeper task
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        if days < 0:
+            raise ValueError("Days must be non-negative")
+        if self._cleanup_sweeper is None or self._cleanup_sweeper.done():
+            self._cleanup_sweeper = asyncio.get_running_loop().create_task(self._sweep(interval, days))
+            self.logger.info(f"Started cleanup sweeper every {interval}s for tasks older than {days} days")
+        return self._cleanup_sweeper
+    
+    async def stop_cleanup_sweeper(self):
+        """
+        Stop the background cleanup sweeper if it is running.
+        """
+        sweeper, self._cleanup_sweeper = self._cleanup_sweeper, None
+        if sweeper is None or sweeper.done():
+            return
+        sweeper.cancel()
+        try:
+            await sweeper
+        except asyncio.CancelledError:
+            pass
+        self.logger.info("Stopped cleanup sweeper")
+    
+    async def _sweep(self, interval: float, days: float):
+        while True:
+            await self.clock.sleep(interval)
+            try:
+                self.cleanup_old_tasks(days)
+            except Exception as e:
+                self.logger.error(f"Error cleaning up old tasks: {e}")
     
     def __str__(self) -> str:
         """
@@ -1,24 +1,15 @@
+import copy
+import hashlib
+import json
 import logging
 import random
 import time
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from datetime import datetime
 from .base_agent import BaseAgent
-
-# Configure logging with error handling
-try:
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler("organization.log"),
-            logging.StreamHandler()
-        ]
-    )
-except Exception as e:
-    print(f"Failed to configure logging: {e}")
-    # Fallback to basic console logging
-    logging.basicConfig(level=logging.INFO)
+from .checklist_rules import Check, ChecklistRule, Description, compile_checklist, rule_table
+from .history_buffer import HistoryBuffer
 
 logger = logging.getLogger("BaseQAAgent")
 
@@ -28,18 +19,35 @@ class BaseQAAgent(BaseAgent):
     Provides common functionality for quality assurance tasks.
     """
     
-    def __init__(self, name: str, department: str):
+    # Reviews kept in memory; older ones are archived under HISTORY_DIR if it is set
+    REVIEW_HISTORY_SIZE = 1000
+    SCORE_BUCKETS = 10
+    # Reviews scoring at least this much are approved
+    APPROVAL_THRESHOLD = 0.8
+    # Cached review verdicts, least recently used evicted first
+    REVIEW_CACHE_SIZE = 10000
+    # Top-level task data and result fields the default rules read; None reads
+    # all. Once a custom rule is registered, every field is reviewed.
+    REVIEWED_TASK_FIELDS: Optional[Tuple[str, ...]] = None
+    REVIEWED_RESULT_FIELDS: Optional[Tuple[str, ...]] = None
+    # Keys whose values no check reads, e.g. IDs and timestamps, at any depth
+    UNREVIEWED_KEYS: Tuple[str, ...] = ()
+    # Checks behind the checklist items, overridden by department QA agents
+    DEFAULT_RULES: Tuple[ChecklistRule, ...] = ()
+    
+    def __init__(self, name: str, department: str, capacity: Optional[int] = None):
         """
         Initialize the base QA agent with name and department.
         
         Args:
             name: The name of the QA agent
             department: The department the QA agent belongs to
+            capacity: Number of reviews the QA agent can hold at once
         """
         if not name or not department:
             raise ValueError("Name and department are required")
             
-        super().__init__(name, department, "QA")
+        super().__init__(name, department, "QA", capacity)
         self.logger = logging.getLogger(f"{department}.QA.{name}")
         self.logger.info(f"Initializing {name} QA agent in {department} department")
         
@@ -53,8 +61,19 @@ class BaseQAAgent(BaseAgent):
         }
         self.qa_guidelines = {}
         self.qa_checklist = {}
-        self.review_history = []
-        self.max_review_history = 1000  # Limit review history size
+        self.checklist_rules = rule_table(self.DEFAULT_RULES)  # (category, item) -> rule
+        self.checklist_version = 0  # bumped whenever the checklist or its rules change
+        self._compiled_checklist: Optional[Dict[str, Tuple[ChecklistRule, ...]]] = None
+        self._all_rules: Optional[Tuple[ChecklistRule, ...]] = None
+        self.custom_rules = False  # set once a rule is registered; its fields are unknown
+        self.max_review_history = self.REVIEW_HISTORY_SIZE
+        self.review_history = HistoryBuffer(
+            capacity=self.max_review_history,
+            spill_path=self._history_path("reviews")
+        )
+        self.review_stats = self._empty_review_stats()
+        self.review_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # review key -> verdict
+        self.review_cache_stats = {"hits": 0, "misses": 0}
         
     def add_qa_guideline(self, category: str, guideline: str):
         """
@@ -90,8 +109,151 @@ class BaseQAAgent(BaseAgent):
         if category not in self.qa_checklist:
             self.qa_checklist[category] = []
         self.qa_checklist[category].append(item)
+        self._invalidate_checklist()
         self.logger.info(f"Added QA checklist item for {category}: {item}")
         
+    def register_checklist_rule(self, category: str, item: str, check: Check,
+                                severity: str = "high", description: Description = ""):
+        """
+        Register the check for a checklist item, replacing any existing
+        one. The item is added to the checklist if it is not on it yet.
+        
+        Args:
+            category: The category of the checklist item
+            item: The checklist item text
+            check: Takes the task data and result, returns whether the item passed
+            severity: "high", "medium" or "low"
+            description: Text reported when the check fails, or a callable
+                taking the task data and result that returns it
+        """
+        if not category:
+            raise ValueError("Category is required")
+        if not item:
+            raise ValueError("Checklist item text is required")
+        if not callable(check):
+            raise ValueError("Check must be callable")
+            
+        rule = ChecklistRule(category, item, check, severity, description)
+        self.checklist_rules[rule.key] = rule
+        self.custom_rules = True
+        items = self.qa_checklist.setdefault(category, [])
+        if item not in items:
+            items.append(item)
+        # Cached verdicts were reached without the new rule
+        self._invalidate_checklist()
+        self.logger.info(f"Registered QA checklist rule for {category}: {item}")
+        
+    def get_checklist_rules(self, category: str) -> Tuple[ChecklistRule, ...]:
+        """
+        Get the rules to run for a category, in checklist order. The
+        checklist is compiled on first use after every change.
+        
+        Args:
+            category: The checklist category
+            
+        Returns:
+            The category's rules
+        """
+        if self._compiled_checklist is None:
+            self._compiled_checklist = compile_checklist(self.qa_checklist, self.checklist_rules)
+        return self._compiled_checklist.get(category, ())
+        
+    def _rules_for_task(self, task_data: Dict[str, Any]) -> Optional[Tuple[ChecklistRule, ...]]:
+        """
+        Get the rules a review of a task runs, or None if the task cannot
+        be reviewed. By default every category applies.
+        
+        Args:
+            task_data: The original task data
+            
+        Returns:
+            The rules, as a cached tuple
+        """
+        if self._all_rules is None:
+            self._all_rules = tuple(
+                rule for category in self.qa_checklist for rule in self.get_checklist_rules(category)
+            )
+        return self._all_rules
+        
+    def _invalidate_checklist(self):
+        self.checklist_version += 1
+        self._compiled_checklist = None
+        self._all_rules = None
+        self.review_cache.clear()
+        
+    def review_cache_key(self, task_data: Dict[str, Any], result: Dict[str, Any]) -> str:
+        """
+        Hash the reviewed fields of a task and its result together with the
+        checklist version. Reviews of inputs with the same key reach the
+        same verdict, so a resubmitted result that only changed fields the
+        checklist does not read is not reviewed again. Values under
+        UNREVIEWED_KEYS are masked, but their keys still count. A custom
+        rule may read any field, so once one is registered the whole task
+        data and result are hashed.
+        
+        Args:
+            task_data: The original task data
+            result: The result of the task
+            
+        Returns:
+            Hex digest of the canonical JSON of the reviewed fields
+        """
+        task_fields, result_fields = self.REVIEWED_TASK_FIELDS, self.REVIEWED_RESULT_FIELDS
+        if self.custom_rules:
+            task_fields = result_fields = None
+        payload = {
+            "task_data": self._reviewed_fields(task_data, task_fields),
+            "result": self._reviewed_fields(result, result_fields),
+            "checklist_version": self.checklist_version
+        }
+        if self.UNREVIEWED_KEYS:
+            payload = self._mask_unreviewed(payload, frozenset(self.UNREVIEWED_KEYS))
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        
+    @staticmethod
+    def _reviewed_fields(data: Dict[str, Any], fields: Optional[Tuple[str, ...]]) -> Dict[str, Any]:
+        if fields is None:
+            return data
+        return {field: data[field] for field in fields if field in data}
+        
+    @classmethod
+    def _mask_unreviewed(cls, value: Any, keys: frozenset) -> Any:
+        if isinstance(value, dict):
+            return {
+                key: None if key in keys else cls._mask_unreviewed(item, keys)
+                for key, item in value.items()
+            }
+        if isinstance(value, (list, tuple)):
+            return [cls._mask_unreviewed(item, keys) for item in value]
+        return value
+        
+    def get_cached_review(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a copy of the cached verdict for a review key, or None on a miss.
+        """
+        verdict = self.review_cache.get(key)
+        if verdict is None:
+            self.review_cache_stats["misses"] += 1
+            return None
+        self.review_cache.move_to_end(key)
+        self.review_cache_stats["hits"] += 1
+        return copy.deepcopy(verdict)
+        
+    def cache_review(self, key: str, verdict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cache a copy of the verdict of a review, evicting the least recently
+        used verdict when the cache is full.
+        
+        Returns:
+            The verdict
+        """
+        self.review_cache[key] = copy.deepcopy(verdict)
+        self.review_cache.move_to_end(key)
+        if len(self.review_cache) > self.REVIEW_CACHE_SIZE:
+            self.review_cache.popitem(last=False)
+        return verdict
+        
     def review_task(self, task_id: str, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Review a completed task for quality assurance.
@@ -128,24 +290,33 @@ class BaseQAAgent(BaseAgent):
                 "comments": ""
             }
             
-            # Perform checklist review
-            checklist_results = self._perform_checklist_review(task_data, result)
-            review_results["issues"].extend(checklist_results["issues"])
-            review_results["suggestions"].extend(checklist_results["suggestions"])
-            
-            # Calculate quality score
-            review_results["score"] = self._calculate_quality_score(
-                checklist_results,
-                task_data,
-                result
-            )
-            
-            # Validate quality score
-            if not 0 <= review_results["score"] <= 1:
-                raise ValueError("Quality score must be between 0 and 1")
+            cache_key = self.review_cache_key(task_data, result)
+            verdict = self.get_cached_review(cache_key)
+            if verdict is None:
+                # Perform checklist review
+                checklist_results = self._perform_checklist_review(task_data, result)
+                
+                # Calculate quality score
+                score = self._calculate_quality_score(
+                    checklist_results,
+                    task_data,
+                    result
+                )
+                
+                # Validate quality score
+                if not 0 <= score <= 1:
+                    raise ValueError("Quality score must be between 0 and 1")
+                verdict = self.cache_review(cache_key, {
+                    "issues": checklist_results["issues"],
+                    "suggestions": checklist_results["suggestions"],
+                    "score": score
+                })
+            review_results["issues"].extend(verdict["issues"])
+            review_results["suggestions"].extend(verdict["suggestions"])
+            review_results["score"] = verdict["score"]
             
             # Make decision based on quality score
-            if review_results["score"] >= 0.8:
+            if self._approves(review_results["score"]):
                 review_results["status"] = "approved"
                 review_results["decision"] = "approve"
                 self.qa_metrics["tasks_approved"] += 1
@@ -162,10 +333,7 @@ class BaseQAAgent(BaseAgent):
                 self.qa_metrics["tasks_reviewed"]
             )
             
-            # Add to review history with size limit
-            self.review_history.append(review_results)
-            if len(self.review_history) > self.max_review_history:
-                self.review_history = self.review_history[-self.max_review_history:]
+            self._record_review(review_results, review_results["score"], review_results["status"] == "approved")
             
             self.logger.info(f"Completed QA review for task {task_id}: {review_results['decision']}")
             return review_results
@@ -174,6 +342,42 @@ class BaseQAAgent(BaseAgent):
             self.logger.error(f"Error during QA review of task {task_id}: {e}")
             raise
         
+    def _empty_review_stats(self) -> Dict[str, Any]:
+        return {
+            "reviews": 0,
+            "approved": 0,
+            "score_total": 0.0,
+            "score_distribution": [0] * self.SCORE_BUCKETS
+        }
+    
+    def _approves(self, score: float) -> bool:
+        """
+        Decide whether a review is approved, given its quality score.
+        Single and batch reviews both decide here.
+        """
+        return score >= self.APPROVAL_THRESHOLD
+    
+    def _record_review(self, review: Dict[str, Any], score: float, approved: bool):
+        """
+        Add a review to the history and update the running aggregates.
+        
+        Args:
+            review: The review entry to keep
+            score: The quality score (0.0 to 1.0)
+            approved: Whether the task was approved
+        """
+        self.review_history.append(review)
+        self._count_review(score, approved)
+        
+    def _count_review(self, score: float, approved: bool):
+        stats = self.review_stats
+        stats["reviews"] += 1
+        if approved:
+            stats["approved"] += 1
+        stats["score_total"] += score
+        bucket = min(max(int(score * self.SCORE_BUCKETS), 0), self.SCORE_BUCKETS - 1)
+        stats["score_distribution"][bucket] += 1
+    
     def _perform_checklist_review(self, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Perform a checklist-based review of the task.
@@ -190,33 +394,48 @@ class BaseQAAgent(BaseAgent):
             "suggestions": []
         }
         
-        # Review each category in the checklist
-        for category, items in self.qa_checklist.items():
-            for item in items:
-                try:
-                    # This will be overridden by specific QA agent implementations
-                    item_result = self._check_checklist_item(category, item, task_data, result)
-                    if item_result["passed"]:
-                        continue
-                        
-                    if item_result["severity"] == "high":
-                        review["issues"].append({
-                            "category": category,
-                            "item": item,
-                            "description": item_result["description"]
-                        })
-                    else:
-                        review["suggestions"].append({
-                            "category": category,
-                            "item": item,
-                            "description": item_result["description"]
-                        })
-                except Exception as e:
-                    self.logger.error(f"Error checking checklist item {item} in category {category}: {e}")
+        # Run the rules of each category in the checklist
+        for category in self.qa_checklist:
+            for rule in self.get_checklist_rules(category):
+                item_result = self._evaluate_rule(rule, task_data, result)
+                if item_result is None or item_result["passed"]:
                     continue
+                    
+                if item_result["severity"] == "high":
+                    review["issues"].append({
+                        "category": category,
+                        "item": rule.item,
+                        "description": item_result["description"]
+                    })
+                else:
+                    review["suggestions"].append({
+                        "category": category,
+                        "item": rule.item,
+                        "description": item_result["description"]
+                    })
         
         return review
     
+    def _evaluate_rule(self, rule: ChecklistRule, task_data: Dict[str, Any],
+                       result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Run a checklist rule. A rule that raises is logged and skipped, in
+        single and batch reviews alike.
+        
+        Args:
+            rule: The rule to run
+            task_data: The original task data
+            result: The result of the task
+            
+        Returns:
+            The rule's result (see ChecklistRule.evaluate), or None if it raised
+        """
+        try:
+            return rule.evaluate(task_data, result)
+        except Exception as e:
+            self.logger.error(f"Error checking checklist item {rule.item} in category {rule.category}: {e}")
+            return None
+    
     def _check_checklist_item(self, category: str, item: str, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Check a specific checklist item.
@@ -230,13 +449,109 @@ class BaseQAAgent(BaseAgent):
         Returns:
             Dictionary containing the check results
         """
-        # This will be overridden by specific QA agent implementations
+        rule = self.checklist_rules.get((category, item))
+        if rule is not None:
+            return rule.evaluate(task_data, result)
         return {
             "passed": True,
             "severity": "low",
             "description": "Default check passed"
         }
     
+    def review_batch(self, reviews: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]],
+                     record: bool = True) -> Dict[str, Any]:
+        """
+        Review many tasks at once.
+        
+        Tasks are grouped by the rules that apply to them, and each rule
+        runs down its whole group before the next one, so there is no
+        per-review logging or result building. Tasks are scored and
+        approved as single reviews are, and a rule that raises is skipped
+        for the tasks it raised on.
+        
+        Args:
+            reviews: (task_data, result) pairs
+            record: Count the reviews in review_stats. Batch reviews are not
+                kept in review_history.
+            
+        Returns:
+            Dictionary with "passed" (whether each task was approved),
+            "quality_score" (each task's score) and "failed_items" (names
+            of the failed items of each task, in checklist order)
+        """
+        count = len(reviews)
+        high_failed = [0] * count
+        other_failed = [0] * count
+        failed_items: List[List[str]] = [[] for _ in range(count)]
+        
+        groups: Dict[int, Tuple[Optional[Tuple[ChecklistRule, ...]], List[int]]] = {}
+        for index, (task_data, _) in enumerate(reviews):
+            rules = self._rules_for_task(task_data)
+            groups.setdefault(id(rules), (rules, []))[1].append(index)
+        
+        for rules, indices in groups.values():
+            if rules is None:
+                for index in indices:
+                    high_failed[index] += 1
+                    failed_items[index].append("Unknown task type")
+                continue
+            task_datas = [reviews[index][0] for index in indices]
+            results = [reviews[index][1] for index in indices]
+            for rule in rules:
+                failed_counts = high_failed if rule.severity == "high" else other_failed
+                for index, passed in zip(indices, self._check_column(rule, task_datas, results)):
+                    if not passed:
+                        failed_counts[index] += 1
+                        failed_items[index].append(rule.item)
+        
+        scores = self._calculate_quality_scores(high_failed, other_failed)
+        approved = [self._approves(score) for score in scores]
+        if record:
+            for score, passed in zip(scores, approved):
+                self._count_review(score, passed)
+        return {
+            "passed": approved,
+            "quality_score": scores,
+            "failed_items": [tuple(items) for items in failed_items]
+        }
+    
+    def _check_column(self, rule: ChecklistRule, task_datas: List[Dict[str, Any]],
+                      results: List[Dict[str, Any]]) -> List[bool]:
+        """
+        Run a rule's check down a batch. Rows where the rule raises count
+        as passed, as _evaluate_rule skips them in a single review.
+        """
+        try:
+            outcomes = [bool(passed) for passed in map(rule.check, task_datas, results)]
+        except Exception:
+            outcomes = [False] * len(task_datas)
+        else:
+            if all(outcomes) or not callable(rule.description):
+                return outcomes
+        # Rerun the failed rows one at a time, so a check or description
+        # that raises skips the rule for that row only
+        for row, passed in enumerate(outcomes):
+            if not passed:
+                item_result = self._evaluate_rule(rule, task_datas[row], results[row])
+                outcomes[row] = item_result is None or item_result["passed"]
+        return outcomes
+    
+    def _calculate_quality_scores(self, high_failed: List[int], other_failed: List[int]) -> List[float]:
+        """
+        Calculate the quality scores of a batch of reviews, given how many
+        high-severity and other checks failed in each. The batch
+        counterpart of _calculate_quality_score.
+        
+        Args:
+            high_failed: Failed high-severity checks per review
+            other_failed: Other failed checks per review
+            
+        Returns:
+            Quality scores between 0.0 and 1.0
+        """
+        # This will be overridden by specific QA agent implementations
+        return [1.0] * len(high_failed)
+    
     def _calculate_quality_score(self, checklist_results: Dict[str, Any], task_data: Dict[str, Any], result: Dict[str, Any]) -> float:
         """
         Calculate a quality score for the task.
@@ -265,7 +580,23 @@ class BaseQAAgent(BaseAgent):
             "metrics": self.qa_metrics,
             "guidelines_count": sum(len(guidelines) for guidelines in self.qa_guidelines.values()),
             "checklist_items_count": sum(len(items) for items in self.qa_checklist.values()),
-            "recent_reviews": self.review_history[-10:] if self.review_history else []
+            "review_stats": self._summarize_review_stats(),
+            "review_cache": dict(self.review_cache_stats, size=len(self.review_cache)),
+            "recent_reviews": self.review_history.recent(10)
+        }
+    
+    def _summarize_review_stats(self) -> Dict[str, Any]:
+        stats = self.review_stats
+        reviews = stats["reviews"]
+        width = 1.0 / self.SCORE_BUCKETS
+        return {
+            "reviews": reviews,
+            "approval_rate": stats["approved"] / reviews if reviews else 0.0,
+            "average_score": stats["score_total"] / reviews if reviews else 0.0,
+            "score_distribution": {
+                f"{i * width:.1f}-{(i + 1) * width:.1f}": count
+                for i, count in enumerate(stats["score_distribution"])
+            }
         }
     
     def update_qa_guidelines(self, category: str, guidelines: List[str]):
@@ -298,13 +629,23 @@ class BaseQAAgent(BaseAgent):
             raise ValueError("Items must be a list")
             
         self.qa_checklist[category] = items
+        self._invalidate_checklist()
         self.logger.info(f"Updated QA checklist for {category}")
         
+    def close(self):
+        """
+        Close the agent's history spill logs, including the review archive.
+        """
+        super().close()
+        self.review_history.close()
+        
     def clear_review_history(self):
         """
-        Clear the review history.
+        Clear the in-memory review history and its aggregates.
+        Archived reviews stay on disk.
         """
-        self.review_history = []
+        self.review_history.clear()
+        self.review_stats = self._empty_review_stats()
         self.logger.info("Cleared review history")
         
     def __str__(self) -> str:
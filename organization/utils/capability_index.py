@@ -0,0 +1,130 @@
+from typing import Callable, Dict, List, Optional, Set
+from .base_agent import BaseAgent
+
+class CapabilityIndex:
+    """
+    Index of the available agents that qualify for each task type.
+
+    Qualification is computed once per (agent, task type) pair and cached.
+    The index subscribes to its agents, so it is updated incrementally:
+    an agent that becomes busy or idle is moved in or out of the available
+    set of each type it qualifies for, and an agent whose skills change
+    has its qualifications recomputed. Looking up an agent for a task type
+    is then O(1) instead of a scan over the team.
+
+    An agent is available while it has a free slot. Available agents are
+    kept in the order they became available and stay in place while they
+    take work, so tasks are packed onto an agent until its slots are full
+    and then go to the agent that has been waiting the longest.
+    """
+
+    def __init__(self, can_handle: Callable[[BaseAgent, str], bool]):
+        """
+        Initialize an empty index.
+
+        Args:
+            can_handle: Returns whether an agent qualifies for a task type
+        """
+        self._can_handle = can_handle
+        self._agents: Dict[str, BaseAgent] = {}
+        self._listeners: Dict[str, Callable[[BaseAgent, str], None]] = {}
+        self._task_types: Dict[str, None] = {}  # ordered set of known task types
+        self._qualified: Dict[str, Set[str]] = {}  # agent_id -> task types
+        self._available: Dict[str, Dict[str, None]] = {}  # task type -> ordered set of agent_ids
+
+    def add_agent(self, agent_id: str, agent: BaseAgent):
+        """
+        Start tracking an agent.
+
+        Args:
+            agent_id: The agent's ID
+            agent: The agent
+        """
+        self._agents[agent_id] = agent
+        listener = lambda changed_agent, event: self._on_agent_changed(agent_id, event)
+        self._listeners[agent_id] = listener
+        agent.add_listener(listener)
+        self.refresh(agent_id)
+
+    def remove_agent(self, agent_id: str):
+        """
+        Stop tracking an agent.
+
+        Args:
+            agent_id: The agent's ID
+        """
+        agent = self._agents.pop(agent_id, None)
+        if agent is None:
+            return
+        agent.remove_listener(self._listeners.pop(agent_id))
+        for task_type in self._qualified.pop(agent_id, ()):
+            self._available[task_type].pop(agent_id, None)
+
+    def add_task_type(self, task_type: str):
+        """
+        Register a task type, computing which agents qualify for it.
+        Registering a known type is a no-op.
+
+        Args:
+            task_type: The task type
+        """
+        if task_type in self._task_types:
+            return
+        self._task_types[task_type] = None
+        available = self._available[task_type] = {}
+        for agent_id, agent in self._agents.items():
+            if self._can_handle(agent, task_type):
+                self._qualified[agent_id].add(task_type)
+                if agent.is_available():
+                    available[agent_id] = None
+
+    def refresh(self, agent_id: str):
+        """
+        Recompute an agent's qualifications, e.g. after its skills changed.
+
+        Args:
+            agent_id: The agent's ID
+        """
+        agent = self._agents[agent_id]
+        for task_type in self._qualified.get(agent_id, ()):
+            self._available[task_type].pop(agent_id, None)
+        self._qualified[agent_id] = {
+            task_type for task_type in self._task_types if self._can_handle(agent, task_type)
+        }
+        self._update_availability(agent_id)
+
+    def _update_availability(self, agent_id: str):
+        agent = self._agents[agent_id]
+        if agent.is_available():
+            for task_type in self._qualified[agent_id]:
+                self._available[task_type].setdefault(agent_id, None)
+        else:
+            for task_type in self._qualified[agent_id]:
+                self._available[task_type].pop(agent_id, None)
+
+    def _on_agent_changed(self, agent_id: str, event: str):
+        if agent_id not in self._agents:
+            return
+        if event == "skills":
+            self.refresh(agent_id)
+        else:
+            self._update_availability(agent_id)
+
+    def find_agent(self, task_type: str) -> Optional[str]:
+        """
+        Get the available agent that has been waiting the longest for a task type.
+
+        Returns:
+            The agent's ID, or None if no qualified agent is available
+        """
+        available = self._available.get(task_type)
+        return next(iter(available)) if available else None
+
+    def has_available(self, task_type: str) -> bool:
+        return bool(self._available.get(task_type))
+
+    def available_agents(self, task_type: str) -> List[str]:
+        return list(self._available.get(task_type, ()))
+
+    def qualified_task_types(self, agent_id: str) -> Set[str]:
+        return set(self._qualified.get(agent_id, ()))
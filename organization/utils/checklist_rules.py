@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
+
+SEVERITIES = ("high", "medium", "low")
+
+Check = Callable[[Dict[str, Any], Dict[str, Any]], bool]
+Description = Union[str, Callable[[Dict[str, Any], Dict[str, Any]], str]]
+
+@dataclass(frozen=True, slots=True)
+class ChecklistRule:
+    """
+    The check behind one QA checklist item.
+
+    `check` takes the task data and the task result and returns whether the
+    item passed. `description` is the text reported when it fails; it can
+    also be a callable taking the same arguments.
+    """
+    category: str
+    item: str
+    check: Check
+    severity: str = "high"
+    description: Description = ""
+
+    def __post_init__(self):
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"Severity must be one of {', '.join(SEVERITIES)}")
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return (self.category, self.item)
+
+    def evaluate(self, task_data: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the check.
+
+        Returns:
+            Dictionary with the item, whether it passed, its severity and
+            its description
+        """
+        description = self.description
+        if callable(description):
+            description = description(task_data, result)
+        return {
+            "item": self.item,
+            "passed": bool(self.check(task_data, result)),
+            "severity": self.severity,
+            "description": description
+        }
+
+def rule_table(rules: Iterable[ChecklistRule]) -> Dict[Tuple[str, str], ChecklistRule]:
+    """
+    Index rules by (category, item).
+    """
+    return {rule.key: rule for rule in rules}
+
+def compile_checklist(checklist: Dict[str, List[str]],
+                      rules: Dict[Tuple[str, str], ChecklistRule]) -> Dict[str, Tuple[ChecklistRule, ...]]:
+    """
+    Resolve every checklist item to its rule, in checklist order.
+    Items without a rule have nothing to check and are left out.
+
+    Args:
+        checklist: Checklist items by category
+        rules: Rules by (category, item)
+
+    Returns:
+        The rules to run for each category
+    """
+    return {
+        category: tuple(rules[(category, item)] for item in items if (category, item) in rules)
+        for category, items in checklist.items()
+    }
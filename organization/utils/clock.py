@@ -0,0 +1,129 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+class Clock:
+    """
+    Source of time for agents and managers. Simulated work waits on the
+    clock instead of calling time.sleep, so it never blocks the event loop.
+    """
+
+    def time(self) -> float:
+        """
+        Current time in seconds since the epoch.
+        """
+        raise NotImplementedError
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self.time())
+
+    async def sleep(self, seconds: float):
+        raise NotImplementedError
+
+class RealClock(Clock):
+    """
+    Wall-clock time; sleeping suspends the caller with asyncio.sleep.
+    """
+
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(max(0.0, seconds))
+
+class VirtualClock(Clock):
+    """
+    Discrete-event clock for simulations.
+
+    Sleepers are kept in a timer heap. Whenever the event loop has nothing
+    else to run, the clock jumps straight to the earliest timer and wakes
+    everyone due at that time, so simulated hours pass as fast as the
+    simulated work can be computed.
+
+    Idleness is detected from the default asyncio loop's ready queue. On
+    loops without one, the clock instead yields `idle_yields` times before
+    each jump. Work that waits on real I/O or threads does not hold the
+    virtual clock back.
+    """
+
+    def __init__(self, start: Optional[float] = None, idle_yields: int = 10):
+        """
+        Initialize the clock.
+
+        Args:
+            start: Initial time in seconds since the epoch (default: now)
+            idle_yields: Loop iterations to wait before a jump when the
+                loop's ready queue cannot be inspected
+        """
+        self._now = time.time() if start is None else start
+        self.idle_yields = idle_yields
+        self._timers: List[Tuple[float, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._advancer: Optional[asyncio.Task] = None
+
+    def time(self) -> float:
+        return self._now
+
+    async def sleep(self, seconds: float):
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        timer = (self._now + seconds, next(self._counter), future)
+        heapq.heappush(self._timers, timer)
+        if self._advancer is None or self._advancer.done():
+            self._advancer = loop.create_task(self._advance())
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Drop the timer, and stop advancing once nobody is left asleep
+            if timer in self._timers:
+                self._timers.remove(timer)
+                heapq.heapify(self._timers)
+            if not self._timers and self._advancer is not None:
+                self._advancer.cancel()
+            raise
+
+    async def _advance(self):
+        while self._timers:
+            await self._wait_until_idle()
+            if not self._timers:
+                return
+            self._now = max(self._now, self._timers[0][0])
+            while self._timers and self._timers[0][0] <= self._now:
+                _, _, future = heapq.heappop(self._timers)
+                if not future.done():
+                    future.set_result(None)
+
+    async def _wait_until_idle(self):
+        ready = getattr(asyncio.get_running_loop(), "_ready", None)
+        if ready is None:
+            for _ in range(self.idle_yields):
+                await asyncio.sleep(0)
+            return
+        await asyncio.sleep(0)
+        while ready:
+            await asyncio.sleep(0)
+
+_clock: Clock = RealClock()
+
+def get_clock() -> Clock:
+    """
+    Get the clock new agents and managers use.
+    """
+    return _clock
+
+def set_clock(clock: Clock):
+    """
+    Set the clock new agents and managers use, e.g. a VirtualClock for a
+    simulation. Existing objects keep theirs unless their `clock`
+    attribute is replaced.
+    """
+    global _clock
+    if not isinstance(clock, Clock):
+        raise ValueError("Clock must be an instance of Clock")
+    _clock = clock
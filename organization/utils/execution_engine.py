@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Set
+from .base_manager import BaseManager
+
+class ExecutionEngine:
+    """
+    Runs a manager's tasks on asyncio.
+
+    Every agent gets a worker loop that awaits `agent.process` for the
+    tasks dispatched to it, completes them on the agent and reports the
+    result to the manager. The manager's QA dispatcher queues completed
+    tasks for review; whenever it assigns a review, the engine runs it on
+    the QA agent and the review decides the task's QA status. Each
+    finished task triggers another dispatch pass, so agents pick up queued
+    work as soon as they are free. A rejected task stays unfinished while
+    it waits for its retry; a timer dispatches retries as they fall due.
+
+    Work is bounded: an agent runs as many tasks at once as it has slots
+    (reviewers included), and at most `max_pending` tasks submitted
+    through the engine are unfinished at once; `submit` waits for room. Tasks added with `manager.create_task`
+    directly are run too, but are not counted against the bound.
+    """
+
+    def __init__(self, manager: BaseManager, max_pending: int = 1000):
+        """
+        Initialize the engine.
+
+        Args:
+            manager: The manager whose tasks to run
+            max_pending: Maximum unfinished tasks submitted through the engine
+        """
+        if max_pending < 1:
+            raise ValueError("Max pending must be at least 1")
+        self.manager = manager
+        self.max_pending = max_pending
+        self.logger = logging.getLogger(f"{manager.department}.Engine.{manager.name}")
+        self._capacity: Optional[asyncio.Semaphore] = None
+        self._submitted: Set[str] = set()  # unfinished tasks holding a capacity slot
+        self._unfinished: Set[str] = set()  # dispatched or under review
+        self._idle: Optional[asyncio.Event] = None
+        self._agent_queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._reviews: Set[asyncio.Task] = set()
+        self._retry_timer: Optional[asyncio.Task] = None
+        self._retries_scheduled: Optional[asyncio.Event] = None
+        self._started_at: Optional[float] = None
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "approved": 0,
+            "rejected": 0,
+            "dead_lettered": 0,
+            "finished": 0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._started_at is not None
+
+    async def start(self):
+        """
+        Attach to the manager and start the worker loops.
+        """
+        if self.running:
+            return
+        if self.manager.engine is not None:
+            raise RuntimeError(f"Manager {self.manager.name} already has an execution engine")
+        self.manager.engine = self
+        self._capacity = asyncio.Semaphore(self.max_pending)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._retries_scheduled = asyncio.Event()
+        self._retry_timer = asyncio.create_task(self._run_retry_timer())
+        self._started_at = time.perf_counter()
+        self.logger.info("Started execution engine")
+        self.dispatch()
+
+    async def stop(self):
+        """
+        Cancel the worker loops and detach from the manager. Tasks still
+        running are left in their current status.
+        """
+        if not self.running:
+            return
+        workers = list(self._workers.values()) + list(self._reviews) + [self._retry_timer]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._workers.clear()
+        self._reviews.clear()
+        self._retry_timer = None
+        self._agent_queues.clear()
+        if self.manager.engine is self:
+            self.manager.engine = None
+        self._started_at = None
+        self.logger.info("Stopped execution engine")
+
+    async def submit(self, task_type: str, task_data: Dict[str, Any], priority: int = 1) -> str:
+        """
+        Create a task, waiting while `max_pending` submitted tasks are
+        unfinished, and dispatch it.
+
+        Args:
+            task_type: The type of task
+            task_data: Data for the task
+            priority: Priority of the task (higher number = higher priority)
+
+        Returns:
+            The task ID
+        """
+        if not self.running:
+            raise RuntimeError("Execution engine is not running")
+        await self._capacity.acquire()
+        try:
+            task_id = self.manager.create_task(task_type, task_data, priority)
+        except Exception:
+            self._capacity.release()
+            raise
+        self._submitted.add(task_id)
+        self._unfinished.add(task_id)
+        self._idle.clear()
+        self.stats["submitted"] += 1
+        self.dispatch()
+        return task_id
+
+    async def join(self):
+        """
+        Wait until every dispatched and submitted task is finished.
+        """
+        if self.running:
+            await self._idle.wait()
+
+    def dispatch(self):
+        """
+        Assign queued tasks to free agents and hand them to their workers.
+        """
+        if not self.running:
+            return
+        self.manager.release_due_retries()
+        if not self.manager.task_queue:
+            return
+        assigned = self.manager.dispatch_pending()
+        for task_id, agent_id in assigned:
+            self._unfinished.add(task_id)
+            self._idle.clear()
+            self._agent_queue(agent_id).put_nowait(task_id)
+
+    def _agent_queue(self, agent_id: str) -> asyncio.Queue:
+        agent_queue = self._agent_queues.get(agent_id)
+        if agent_queue is None:
+            agent_queue = self._agent_queues[agent_id] = asyncio.Queue()
+            self._workers[agent_id] = asyncio.create_task(self._agent_worker(agent_id, agent_queue))
+        return agent_queue
+
+    def start_review(self, task_id: str, qa_agent_id: str):
+        """
+        Run a review the manager's QA dispatcher has assigned to a QA agent.
+
+        Args:
+            task_id: The ID of the task to review
+            qa_agent_id: The ID of the reviewing QA agent
+        """
+        if not self.running:
+            return
+        self._unfinished.add(task_id)
+        self._idle.clear()
+        review = asyncio.create_task(self._run_review(task_id, qa_agent_id))
+        self._reviews.add(review)
+        review.add_done_callback(self._reviews.discard)
+
+    async def _agent_worker(self, agent_id: str, agent_queue: asyncio.Queue):
+        # Tasks are only dispatched into free slots, so running each one as
+        # it arrives keeps the agent within its capacity
+        running: Set[asyncio.Task] = set()
+        try:
+            while True:
+                task_id = await agent_queue.get()
+                job = asyncio.create_task(self._run_and_dispatch(agent_id, task_id))
+                running.add(job)
+                job.add_done_callback(running.discard)
+        finally:
+            for job in running:
+                job.cancel()
+
+    async def _run_and_dispatch(self, agent_id: str, task_id: str):
+        try:
+            await self._run_task(agent_id, task_id)
+        except Exception as e:
+            self.logger.error("Error running task %s: %s", task_id, e)
+            self._finish(task_id)
+        self.dispatch()
+
+    async def _run_task(self, agent_id: str, task_id: str):
+        task = self.manager.tasks[task_id]
+        agent = self.manager.agents.get(agent_id)
+        if agent is None:
+            self.logger.error("Agent %s left before running task %s", agent_id, task_id)
+            self.manager.update_task_status(task_id, "failed")
+            self.stats["failed"] += 1
+            self._finish(task_id)
+            return
+
+        try:
+            result = await agent.process(dict(task.data, type=task.type))
+        except Exception as e:
+            result = {"error": str(e)}
+        success = "error" not in result
+        agent.complete_task(task_id, result, success)
+
+        if not success:
+            self.manager.update_task_status(task_id, "failed")
+            self.stats["failed"] += 1
+            self._finish(task_id)
+            return
+        self.manager.update_task_status(task_id, "completed", result)
+        self.stats["completed"] += 1
+        # With QA agents, the task stays unfinished until its review has run
+        if not self.manager.qa_agents:
+            self._finish(task_id)
+
+    async def _run_review(self, task_id: str, qa_agent_id: str):
+        try:
+            await self._review_task(task_id, qa_agent_id)
+        except Exception as e:
+            self.logger.error("Error reviewing task %s: %s", task_id, e)
+        if task_id in self.manager.retry_scheduler:
+            self._retries_scheduled.set()
+        else:
+            self._finish(task_id)
+        self.dispatch()
+
+    async def _run_retry_timer(self):
+        scheduler = self.manager.retry_scheduler
+        while True:
+            if not scheduler.pending():
+                self._retries_scheduled.clear()
+                await self._retries_scheduled.wait()
+            await self.manager.clock.sleep(scheduler.wheel.tick)
+            self.dispatch()
+
+    async def _review_task(self, task_id: str, qa_agent_id: str):
+        qa_agent = self.manager.qa_agents.get(qa_agent_id)
+        if qa_agent is None or task_id not in qa_agent.active_tasks:
+            self.logger.error("QA agent %s is not reviewing task %s", qa_agent_id, task_id)
+            return
+        review_input = qa_agent.active_tasks[task_id]["data"]
+        try:
+            review = await qa_agent.process(review_input)
+        except Exception as e:
+            review = {"success": False, "error": str(e)}
+        passed = review.get("success", False) and review.get("review", {}).get("passed", False)
+        qa_agent.complete_task(task_id, review, review.get("success", False))
+
+        status = "approved" if passed else "rejected"
+        self.manager.update_qa_status(task_id, status, review)
+        self.stats[status] += 1
+        if task_id in self.manager.retry_scheduler.dead_letters:
+            self.stats["dead_lettered"] += 1
+
+    def _finish(self, task_id: str):
+        if task_id in self._unfinished:
+            self._unfinished.remove(task_id)
+            self.stats["finished"] += 1
+        if task_id in self._submitted:
+            self._submitted.remove(task_id)
+            self._capacity.release()
+        if not self._unfinished:
+            self._idle.set()
+
+    def throughput(self) -> float:
+        """
+        Get the finished tasks per second of wall time since the engine
+        started.
+        """
+        if not self.running:
+            return 0.0
+        elapsed = time.perf_counter() - self._started_at
+        return self.stats["finished"] / elapsed if elapsed > 0 else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get task counts, the number of unfinished tasks and the throughput.
+        """
+        return {
+            **self.stats,
+            "unfinished": len(self._unfinished),
+            "tasks_per_second": self.throughput()
+        }
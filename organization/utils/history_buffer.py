@@ -0,0 +1,197 @@
+import bisect
+import json
+import os
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+class HistoryBuffer:
+    """
+    Fixed-size in-memory history that spills older entries to disk.
+
+    The newest `capacity` entries live in a ring buffer. When it is full,
+    the oldest entry is evicted and, if a spill path is set, appended to a
+    JSONL log. Every `index_interval` spilled lines, the entry's timestamp
+    and byte offset are added to a sparse time index, so a time-range
+    query seeks close to its start instead of reading the whole log.
+
+    Entries must be appended in time order and carry their timestamp under
+    `time_key`. Timestamps may be ISO strings or numbers, but a given
+    buffer must use one kind consistently.
+    """
+
+    def __init__(self, capacity: int = 1000, spill_path: Optional[str] = None,
+                 time_key: str = "timestamp", index_interval: int = 256):
+        """
+        Initialize an empty history.
+
+        Args:
+            capacity: Number of entries kept in memory
+            spill_path: JSONL file that receives evicted entries, or None to
+                drop them
+            time_key: Key of the entry timestamp
+            index_interval: Spilled lines between time index points
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        if index_interval < 1:
+            raise ValueError("Index interval must be at least 1")
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.time_key = time_key
+        self.index_interval = index_interval
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self._file = None
+        self._size = 0  # bytes in the spill log
+        self._lines = 0  # lines in the spill log
+        self._index_times: List[Any] = []  # sparse time index: timestamps...
+        self._index_offsets: List[int] = []  # ...and the byte offsets of their lines
+        self._index_built = False
+
+    def append(self, entry: Dict[str, Any]):
+        """
+        Add an entry, spilling the oldest one if the buffer is full.
+        """
+        if len(self._buffer) == self.capacity:
+            self._spill(self._buffer[0])
+        self._buffer.append(entry)
+
+    def _spill(self, entry: Dict[str, Any]):
+        if self.spill_path is None:
+            return
+        if self._file is None:
+            self._open()
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        if self._lines % self.index_interval == 0:
+            self._index_times.append(entry.get(self.time_key))
+            self._index_offsets.append(self._size)
+        self._file.write(line)
+        self._size += len(line)
+        self._lines += 1
+
+    def _open(self):
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._build_index()
+        self._file = open(self.spill_path, "ab")
+
+    def _build_index(self):
+        """
+        Index a log left by an earlier run. Runs once, on first use.
+        """
+        if self._index_built:
+            return
+        self._index_built = True
+        if self.spill_path is None or not os.path.exists(self.spill_path):
+            return
+        offset = 0
+        with open(self.spill_path, "rb") as f:
+            for line in f:
+                if self._lines % self.index_interval == 0:
+                    self._index_times.append(json.loads(line).get(self.time_key))
+                    self._index_offsets.append(offset)
+                offset += len(line)
+                self._lines += 1
+        self._size = offset
+
+    def recent(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Get the newest entries from memory, oldest first.
+        """
+        if count <= 0:
+            return []
+        return list(islice(self._buffer, max(0, len(self._buffer) - count), None))
+
+    def query(self, since: Any = None, until: Any = None, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream entries with since <= timestamp <= until, oldest first,
+        from the spill log and then from memory.
+
+        Args:
+            since: Earliest timestamp, or None for no lower bound
+            until: Latest timestamp, or None for no upper bound
+            limit: Maximum number of entries to yield
+
+        Yields:
+            Matching entries
+        """
+        remaining = limit
+        if remaining is not None and remaining <= 0:
+            return
+        for entry in self._iter_all(since):
+            timestamp = entry.get(self.time_key)
+            if since is not None and timestamp < since:
+                continue
+            if until is not None and timestamp > until:
+                return
+            yield entry
+            if remaining is not None:
+                remaining -= 1
+                if remaining == 0:
+                    return
+
+    def _iter_all(self, since: Any) -> Iterator[Dict[str, Any]]:
+        # Snapshot both tiers first so appends during iteration neither
+        # duplicate nor skip entries
+        if self.spill_path is not None:
+            self._build_index()
+            self.flush()
+        end = self._size
+        snapshot = list(self._buffer)
+        if end:
+            yield from self._iter_log(self._seek_offset(since), end)
+        yield from snapshot
+
+    def _seek_offset(self, since: Any) -> int:
+        if since is None:
+            return 0
+        # Last index point strictly before `since`; entries with equal
+        # timestamps may precede an index point that matches exactly
+        position = bisect.bisect_left(self._index_times, since)
+        return self._index_offsets[position - 1] if position > 0 else 0
+
+    def _iter_log(self, offset: int, end: int) -> Iterator[Dict[str, Any]]:
+        with open(self.spill_path, "rb") as f:
+            f.seek(offset)
+            while offset < end:
+                line = f.readline()
+                if not line:
+                    return
+                offset += len(line)
+                yield json.loads(line)
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        """
+        Close the spill log. It is reopened on the next spill.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        """
+        Drop the in-memory entries. The spill log is kept.
+        """
+        self._buffer.clear()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __bool__(self) -> bool:
+        return bool(self._buffer)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._buffer))
+
+    def __getitem__(self, key):
+        """
+        Index or slice the in-memory entries like a list.
+        """
+        if isinstance(key, slice):
+            return list(self._buffer)[key]
+        return self._buffer[key]
@@ -0,0 +1,303 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import Dict, List, Optional
+
+_configured = False
+_writer: Optional["LogWriter"] = None
+
+LOG_FILE = os.environ.get("ORGANIZATION_LOG_FILE", "organization.log")
+LOG_FORMAT = os.environ.get("ORGANIZATION_LOG_FORMAT", "text")  # "text" or "jsonl"
+LOG_MAX_BYTES = int(os.environ.get("ORGANIZATION_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.environ.get("ORGANIZATION_LOG_BACKUP_COUNT", "5"))
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+def _resolve(settings: Dict[str, float], name: str) -> Optional[float]:
+    """
+    Find the setting for a logger: its own, else its nearest configured parent.
+    """
+    while True:
+        if name in settings:
+            return settings[name]
+        if "." not in name:
+            return settings.get("")
+        name = name.rsplit(".", 1)[0]
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the records below WARNING for each logger.
+
+    Rates are keyed by logger name and apply to child loggers too; "" sets
+    the default. Sampling is deterministic: a logger at rate 0.25 keeps
+    every fourth record.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        for rate in rates.values():
+            if not 0 <= rate <= 1:
+                raise ValueError("Sample rates must be between 0 and 1")
+        self.rates = rates
+        self._credit: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = _resolve(self.rates, record.name)
+        if rate is None or rate >= 1:
+            return True
+        with self._lock:
+            credit = self._credit.get(record.name, 0.0) + rate
+            keep = credit >= 1
+            self._credit[record.name] = credit - 1 if keep else credit
+        return keep
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limit the records below WARNING per second for each logger with a
+    token bucket. Limits are keyed like SamplingFilter rates. Dropped
+    records are counted in `dropped`.
+    """
+
+    def __init__(self, limits: Dict[str, float], burst: Optional[float] = None):
+        super().__init__()
+        for limit in limits.values():
+            if limit <= 0:
+                raise ValueError("Rate limits must be positive")
+        self.limits = limits
+        self.burst = burst
+        self.dropped: Dict[str, int] = {}
+        self._buckets: Dict[str, List[float]] = {}  # logger -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        limit = _resolve(self.limits, record.name)
+        if limit is None:
+            return True
+        capacity = self.burst if self.burst is not None else limit
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(record.name, [capacity, now])
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * limit)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return True
+            self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+            return False
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _BatchFlushing:
+    """
+    Defer the flush a stream handler does after every record to the end of
+    the writer's batch.
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+class BatchStreamHandler(_BatchFlushing, logging.StreamHandler):
+    pass
+
+class BatchRotatingFileHandler(_BatchFlushing, RotatingFileHandler):
+    """
+    Size-rotated log file that is flushed once per batch.
+
+    The stock rollover check seeks the file before every record, which
+    flushes it; this handler tracks the size itself instead. Sizes are
+    counted in characters, which is exact for ASCII logs.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = self.format(record) + self.terminator
+            if self.maxBytes > 0 and self._size and self._size + len(message) >= self.maxBytes:
+                self.doRollover()
+                self._size = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self._size += len(message)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+class PreparedQueueHandler(QueueHandler):
+    """
+    Queue handler for a writer thread in the same process.
+
+    Only the message is rendered in the calling thread, so mutable
+    arguments are captured as they were. Everything else, including the
+    timestamp, layout and exception text, is formatted by the writer.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+class LogWriter(threading.Thread):
+    """
+    Background thread that drains a log queue into handlers.
+
+    It blocks for the first record, then takes up to `batch_size` more that
+    are already queued, hands them all to the handlers and flushes each
+    handler once per batch.
+    """
+
+    _STOP = object()
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler], batch_size: int = 512):
+        super().__init__(name="log-writer", daemon=True)
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1")
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+
+    def run(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for record in batch:
+                if record is self._STOP:
+                    running = False
+                    continue
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            for handler in self.handlers:
+                flush = getattr(handler, "flush_batch", handler.flush)
+                try:
+                    flush()
+                except Exception as e:
+                    print(f"Failed to flush log handler {handler}: {e}")
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """
+        Write out everything queued so far and stop.
+        """
+        self.queue.put(self._STOP)
+        self.join(timeout)
+        for handler in self.handlers:
+            handler.close()
+
+def configure_logging(log_file: Optional[str] = None,
+                      log_format: Optional[str] = None,
+                      max_bytes: Optional[int] = None,
+                      backup_count: Optional[int] = None,
+                      sample_rates: Optional[Dict[str, float]] = None,
+                      rate_limits: Optional[Dict[str, float]] = None,
+                      batch_size: int = 512):
+    """
+    Configure organization logging on first use instead of at import time.
+
+    Logs go to a size-rotated log file and the console unless the
+    application has already configured the root logger. Records are put on
+    a queue in the calling thread and written by a background thread, so
+    logging does not block on I/O. Call this before creating any agent to
+    change the settings.
+
+    Args:
+        log_file: Log file path (default ORGANIZATION_LOG_FILE or organization.log)
+        log_format: "text" or "jsonl" (default ORGANIZATION_LOG_FORMAT or "text")
+        max_bytes: Rotate the log file at this size
+        backup_count: Number of rotated files to keep
+        sample_rates: Fraction of records below WARNING to keep, by logger name
+        rate_limits: Records below WARNING allowed per second, by logger name
+        batch_size: Maximum records written per flush
+    """
+    global _configured, _writer
+    if _configured:
+        return
+    _configured = True
+
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    log_format = log_format or LOG_FORMAT
+    if log_format not in ("text", "jsonl"):
+        raise ValueError("Log format must be 'text' or 'jsonl'")
+    formatter = JsonLinesFormatter() if log_format == "jsonl" else logging.Formatter(TEXT_FORMAT)
+
+    handlers: List[logging.Handler] = [BatchStreamHandler()]
+    # Configure logging with error handling
+    try:
+        handlers.append(BatchRotatingFileHandler(
+            log_file or LOG_FILE,
+            maxBytes=LOG_MAX_BYTES if max_bytes is None else max_bytes,
+            backupCount=LOG_BACKUP_COUNT if backup_count is None else backup_count
+        ))
+    except Exception as e:
+        print(f"Failed to open log file, logging to the console only: {e}")
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue()
+    queue_handler = PreparedQueueHandler(log_queue)
+    if sample_rates:
+        queue_handler.addFilter(SamplingFilter(sample_rates))
+    if rate_limits:
+        queue_handler.addFilter(RateLimitFilter(rate_limits))
+
+    _writer = LogWriter(log_queue, handlers, batch_size)
+    _writer.start()
+    root.addHandler(queue_handler)
+    root.setLevel(logging.INFO)
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """
+    Flush queued records and stop the writer thread.
+    """
+    global _writer
+    writer, _writer = _writer, None
+    if writer is None:
+        return
+    for handler in list(logging.getLogger().handlers):
+        if isinstance(handler, PreparedQueueHandler):
+            logging.getLogger().removeHandler(handler)
+    writer.stop()
@@ -0,0 +1,177 @@
+import random
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+from .base_agent import BaseAgent
+
+class QADispatcher:
+    """
+    Routes completed tasks to QA agents for review.
+
+    Every reviewer has its own queue. A task goes to the reviewer with the
+    lowest load, i.e. queued plus in-flight reviews per slot, so reviews
+    spread evenly and QA throughput grows with the number of reviewers.
+    With many reviewers, `strategy="two_choices"` compares two random
+    reviewers instead of all of them.
+
+    The dispatcher subscribes to its reviewers: whenever one frees a slot,
+    the next review in its queue is assigned to it and `on_assign` is
+    called with the task and reviewer IDs. Nothing waits for a busy
+    reviewer while another one is idle, because routing prefers idle
+    reviewers and a reviewer that leaves hands its queue to the others.
+    Reviews left without any reviewer wait until one is added.
+    """
+
+    STRATEGIES = ("least_loaded", "two_choices")
+
+    def __init__(self, on_assign: Callable[[str, str], None], strategy: str = "least_loaded"):
+        """
+        Initialize a dispatcher without reviewers.
+
+        Args:
+            on_assign: Called with (task_id, qa_agent_id) after a review is
+                assigned to a QA agent
+            strategy: "least_loaded" or "two_choices"
+        """
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Strategy must be one of {', '.join(self.STRATEGIES)}")
+        self.strategy = strategy
+        self._on_assign = on_assign
+        self._reviewers: Dict[str, BaseAgent] = {}
+        self._listeners: Dict[str, Callable[[BaseAgent, str], None]] = {}
+        self._queues: Dict[str, Deque[Tuple[str, Dict[str, Any]]]] = {}
+        self._unrouted: Deque[Tuple[str, Dict[str, Any]]] = deque()  # waiting for any reviewer
+        self._draining: Set[str] = set()
+
+    def add_reviewer(self, qa_agent_id: str, qa_agent: BaseAgent):
+        """
+        Start routing reviews to a QA agent.
+
+        Args:
+            qa_agent_id: The QA agent's ID
+            qa_agent: The QA agent
+        """
+        self._reviewers[qa_agent_id] = qa_agent
+        self._queues[qa_agent_id] = deque()
+        listener = lambda changed_agent, event: self._on_reviewer_changed(qa_agent_id, event)
+        self._listeners[qa_agent_id] = listener
+        qa_agent.add_listener(listener)
+        unrouted, self._unrouted = self._unrouted, deque()
+        for task_id, review_input in unrouted:
+            self.submit(task_id, review_input)
+
+    def remove_reviewer(self, qa_agent_id: str):
+        """
+        Stop routing reviews to a QA agent and reroute its queued reviews.
+        Reviews it has already started are left to it.
+
+        Args:
+            qa_agent_id: The QA agent's ID
+        """
+        qa_agent = self._reviewers.pop(qa_agent_id, None)
+        if qa_agent is None:
+            return
+        qa_agent.remove_listener(self._listeners.pop(qa_agent_id))
+        for task_id, review_input in self._queues.pop(qa_agent_id):
+            self.submit(task_id, review_input)
+
+    def submit(self, task_id: str, review_input: Dict[str, Any]) -> Optional[str]:
+        """
+        Queue a review with the least-loaded reviewer and start it if the
+        reviewer has a free slot.
+
+        Args:
+            task_id: The ID of the task to review
+            review_input: Input for the QA agent's process method
+
+        Returns:
+            The ID of the QA agent the review was routed to, or None if
+            there are no reviewers and the review waits for one
+        """
+        qa_agent_id = self._route()
+        if qa_agent_id is None:
+            self._unrouted.append((task_id, review_input))
+            return None
+        self._queues[qa_agent_id].append((task_id, review_input))
+        self._drain(qa_agent_id)
+        return qa_agent_id
+
+    def discard(self, *task_ids: str) -> int:
+        """
+        Drop the queued reviews of tasks that no longer exist, e.g. after
+        they were cleaned up. Reviews already started are left to their
+        reviewer.
+
+        Args:
+            *task_ids: The IDs of the tasks
+
+        Returns:
+            The number of queued reviews dropped
+        """
+        discarded = set(task_ids)
+        dropped = 0
+        for queue in (self._unrouted, *self._queues.values()):
+            if not any(task_id in discarded for task_id, _ in queue):
+                continue
+            kept = [entry for entry in queue if entry[0] not in discarded]
+            dropped += len(queue) - len(kept)
+            queue.clear()
+            queue.extend(kept)
+        return dropped
+
+    def _route(self) -> Optional[str]:
+        if not self._reviewers:
+            return None
+        if self.strategy == "two_choices" and len(self._reviewers) > 2:
+            candidates = random.sample(list(self._reviewers), 2)
+        else:
+            candidates = self._reviewers
+        return min(candidates, key=self.load)
+
+    def load(self, qa_agent_id: str) -> float:
+        """
+        Get a reviewer's queued plus in-flight reviews per slot.
+        """
+        qa_agent = self._reviewers[qa_agent_id]
+        return (len(self._queues[qa_agent_id]) + len(qa_agent.active_tasks)) / qa_agent.capacity
+
+    def _drain(self, qa_agent_id: str):
+        # assign_task notifies our own listener; drain only at the top level
+        # so reviews start in queue order
+        if qa_agent_id in self._draining:
+            return
+        self._draining.add(qa_agent_id)
+        try:
+            queue = self._queues[qa_agent_id]
+            qa_agent = self._reviewers[qa_agent_id]
+            while queue and qa_agent.is_available():
+                task_id, review_input = queue.popleft()
+                if qa_agent.assign_task(task_id, review_input):
+                    self._on_assign(task_id, qa_agent_id)
+        finally:
+            self._draining.discard(qa_agent_id)
+
+    def _on_reviewer_changed(self, qa_agent_id: str, event: str):
+        if event == "availability" and qa_agent_id in self._reviewers:
+            self._drain(qa_agent_id)
+
+    def queued(self, qa_agent_id: Optional[str] = None) -> int:
+        """
+        Get the number of reviews waiting for a reviewer, or for all
+        reviewers if no ID is given.
+        """
+        if qa_agent_id is not None:
+            return len(self._queues.get(qa_agent_id, ()))
+        return len(self._unrouted) + sum(len(queue) for queue in self._queues.values())
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the queue length, in-flight reviews and load of each reviewer.
+        """
+        return {
+            qa_agent_id: {
+                "queued": len(self._queues[qa_agent_id]),
+                "in_review": len(qa_agent.active_tasks),
+                "load": self.load(qa_agent_id)
+            }
+            for qa_agent_id, qa_agent in self._reviewers.items()
+        }
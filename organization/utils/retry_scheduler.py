@@ -0,0 +1,189 @@
+import math
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+class TimerWheel:
+    """
+    Hashed timing wheel for many timers with coarse deadlines.
+
+    Time is cut into ticks of `tick` seconds and a timer lives in the slot
+    of its deadline tick, modulo the number of slots. Scheduling and
+    cancelling are O(1); advancing visits each elapsed tick's slot once,
+    and at most every slot once however far the time jumps. Timers more
+    than a full turn away stay in their slot until their tick comes round.
+    Deadlines are rounded up to the next tick, so timers never fire early.
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 512, start: float = 0.0):
+        """
+        Initialize an empty wheel.
+
+        Args:
+            tick: Seconds per tick
+            slots: Number of slots in the wheel
+            start: Current time in seconds
+        """
+        if tick <= 0:
+            raise ValueError("Tick must be positive")
+        if slots < 1:
+            raise ValueError("Slots must be at least 1")
+        self.tick = tick
+        self._slots: List[Dict[str, int]] = [{} for _ in range(slots)]  # key -> deadline tick
+        self._timers: Dict[str, int] = {}  # key -> deadline tick
+        self._current = self._tick_of(start)  # last tick processed
+
+    def _tick_of(self, seconds: float) -> int:
+        return math.floor(seconds / self.tick)
+
+    def schedule(self, key: str, deadline: float):
+        """
+        Start a timer, replacing any timer with the same key.
+
+        Args:
+            key: The timer's key
+            deadline: Time in seconds at which the timer fires
+        """
+        self.cancel(key)
+        due = max(math.ceil(deadline / self.tick), self._current + 1)
+        self._timers[key] = due
+        self._slots[due % len(self._slots)][key] = due
+
+    def cancel(self, key: str) -> bool:
+        """
+        Stop a timer.
+
+        Returns:
+            True if the timer was pending, False otherwise
+        """
+        due = self._timers.pop(key, None)
+        if due is None:
+            return False
+        del self._slots[due % len(self._slots)][key]
+        return True
+
+    def advance(self, now: float) -> List[str]:
+        """
+        Move the wheel to a time and collect the timers that fired.
+
+        Args:
+            now: Current time in seconds
+
+        Returns:
+            Keys of the fired timers, earliest deadline first
+        """
+        target = self._tick_of(now)
+        if target <= self._current or not self._timers:
+            self._current = max(self._current, target)
+            return []
+        fired: List[Tuple[int, str]] = []
+        ticks = min(target - self._current, len(self._slots))
+        for tick in range(target - ticks + 1, target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            due_keys = [key for key, due in slot.items() if due <= target]
+            for key in due_keys:
+                fired.append((slot.pop(key), key))
+                del self._timers[key]
+        self._current = target
+        fired.sort()
+        return [key for _, key in fired]
+
+    def deadline(self, key: str) -> Optional[float]:
+        """
+        Get the time a timer fires, or None if it is not pending.
+        """
+        due = self._timers.get(key)
+        return None if due is None else due * self.tick
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._timers
+
+class RetryScheduler:
+    """
+    Delays the retries of rejected tasks.
+
+    The n-th retry of a task waits `base_delay * 2 ** (n - 1)` seconds,
+    capped at `max_delay`. A task rejected `max_attempts` times is moved to
+    the dead-letter queue instead of being retried. Pending retries live
+    in a TimerWheel, so thousands of them cost O(1) each to schedule.
+    """
+
+    def __init__(self, base_delay: float = 30.0, max_delay: float = 3600.0, max_attempts: int = 3,
+                 tick: float = 1.0, slots: int = 512, start: float = 0.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            base_delay: Seconds before the first retry
+            max_delay: Upper bound on the delay between retries
+            max_attempts: Rejections after which a task is dead-lettered
+            tick: Resolution of the timer wheel in seconds
+            slots: Number of slots in the timer wheel
+            start: Current time in seconds
+        """
+        if base_delay < 0 or max_delay < base_delay:
+            raise ValueError("Delays must satisfy 0 <= base_delay <= max_delay")
+        if max_attempts < 1:
+            raise ValueError("Max attempts must be at least 1")
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self.wheel = TimerWheel(tick, slots, start)
+        self.dead_letters: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def delay(self, attempt: int) -> float:
+        """
+        Get the backoff before the retry that follows a task's n-th rejection.
+        """
+        return min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def schedule(self, task_id: str, attempt: int, now: float, reason: Any = None) -> Optional[float]:
+        """
+        Schedule a retry after a task's n-th rejection, or dead-letter the
+        task if it has used up its attempts.
+
+        Args:
+            task_id: The ID of the rejected task
+            attempt: How many times the task has been rejected
+            now: Current time in seconds
+            reason: Why the task was rejected, kept with dead letters
+
+        Returns:
+            The time the retry is due, or None if the task was dead-lettered
+        """
+        if attempt >= self.max_attempts:
+            self.wheel.cancel(task_id)
+            self.dead_letters[task_id] = {
+                "task_id": task_id,
+                "attempts": attempt,
+                "dead_lettered_at": now,
+                "reason": reason
+            }
+            return None
+        due = now + self.delay(attempt)
+        self.wheel.schedule(task_id, due)
+        return due
+
+    def due(self, now: float) -> List[str]:
+        """
+        Collect the tasks whose retry is due.
+        """
+        return self.wheel.advance(now)
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        Forget a task's pending retry or dead letter.
+
+        Returns:
+            True if there was one, False otherwise
+        """
+        dead = self.dead_letters.pop(task_id, None) is not None
+        return self.wheel.cancel(task_id) or dead
+
+    def pending(self) -> int:
+        return len(self.wheel)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self.wheel
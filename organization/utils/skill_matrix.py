@@ -0,0 +1,129 @@
+from typing import Dict, List
+from .base_agent import BaseAgent
+
+class SkillMatrix:
+    """
+    Precompiled task-type skill requirements and team skill levels.
+
+    Requirements are compiled once into a (task types x skills) array of
+    minimum proficiencies, and the team's proficiencies into an
+    (agents x skills) array. Eligibility of every agent for every task
+    type is then a single vectorized comparison. The result is cached and
+    rebuilt only after an agent's skills change or the team changes.
+
+    NumPy is imported on first use so that importing the organization code
+    stays cheap.
+    """
+
+    def __init__(self, requirements: Dict[str, Dict[str, float]]):
+        """
+        Compile the skill requirements.
+
+        Args:
+            requirements: Dictionary of task type -> {skill: minimum proficiency}
+        """
+        import numpy as np
+
+        self.task_types = list(requirements)
+        self.skills = sorted({skill for skills in requirements.values() for skill in skills})
+        self._type_index = {task_type: i for i, task_type in enumerate(self.task_types)}
+        self._requirements = np.zeros((len(self.task_types), len(self.skills)))
+        skill_index = {skill: i for i, skill in enumerate(self.skills)}
+        for row, task_type in enumerate(self.task_types):
+            for skill, minimum in requirements[task_type].items():
+                self._requirements[row, skill_index[skill]] = minimum
+
+        self.agents: List[BaseAgent] = []
+        self._rows: Dict[int, int] = {}  # id(agent) -> row
+        self._eligibility = None  # cached (agents x task types) bool array
+
+    def add_agent(self, agent: BaseAgent):
+        """
+        Track an agent's skills. Add agents here before registering other
+        listeners that depend on eligibility, so the cache is invalidated
+        first when skills change.
+
+        Args:
+            agent: The agent to track
+        """
+        if id(agent) in self._rows:
+            return
+        self._rows[id(agent)] = len(self.agents)
+        self.agents.append(agent)
+        agent.add_listener(self._on_agent_changed)
+        self.invalidate()
+
+    def remove_agent(self, agent: BaseAgent):
+        """
+        Stop tracking an agent.
+
+        Args:
+            agent: The agent to stop tracking
+        """
+        if self._rows.pop(id(agent), None) is None:
+            return
+        agent.remove_listener(self._on_agent_changed)
+        self.agents.remove(agent)
+        self._rows = {id(tracked): row for row, tracked in enumerate(self.agents)}
+        self.invalidate()
+
+    def invalidate(self):
+        self._eligibility = None
+
+    def _on_agent_changed(self, agent: BaseAgent, event: str):
+        if event == "skills":
+            self.invalidate()
+
+    def _table(self):
+        if self._eligibility is None:
+            import numpy as np
+
+            levels = np.array(
+                [[agent.skills.get(skill, 0.0) for skill in self.skills] for agent in self.agents],
+                dtype=float
+            ).reshape(len(self.agents), len(self.skills))
+            # (agents, 1, skills) >= (1, task types, skills), all over skills
+            self._eligibility = (levels[:, None, :] >= self._requirements[None, :, :]).all(axis=2)
+        return self._eligibility
+
+    def can_handle(self, agent: BaseAgent, task_type: str) -> bool:
+        """
+        Check if an agent meets the requirements of a task type.
+
+        Args:
+            agent: The agent to check
+            task_type: The task type to check
+
+        Returns:
+            True if the agent qualifies, False otherwise (including for
+            unknown task types)
+        """
+        column = self._type_index.get(task_type)
+        if column is None:
+            return False
+        row = self._rows.get(id(agent))
+        if row is None:
+            requirements = self._requirements[column]
+            return all(agent.get_skill_proficiency(skill) >= minimum
+                       for skill, minimum in zip(self.skills, requirements))
+        return bool(self._table()[row, column])
+
+    def eligibility(self, task_types: List[str]):
+        """
+        Get eligibility of every tracked agent for a batch of tasks.
+
+        Args:
+            task_types: The task type of each task
+
+        Returns:
+            Boolean array of shape (tasks, agents), in the order of
+            `task_types` and `self.agents`
+        """
+        import numpy as np
+
+        table = self._table()
+        columns = np.array([self._type_index.get(task_type, -1) for task_type in task_types], dtype=int)
+        result = np.zeros((len(task_types), len(self.agents)), dtype=bool)
+        known = columns >= 0
+        result[known] = table[:, columns[known]].T
+        return result
@@ -0,0 +1,103 @@
+import time
+from dataclasses import dataclass, field, fields
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+class TaskStatus(str, Enum):
+    """
+    Lifecycle status of a task. Members compare equal to their string values.
+    """
+    PENDING = "pending"
+    ASSIGNED = "assigned"
+    IN_PROGRESS = "in_progress"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+
+    def __str__(self) -> str:
+        return self.value
+
+class QAStatus(str, Enum):
+    """
+    QA review status of a task. Members compare equal to their string values.
+    """
+    PENDING = "pending"
+    ASSIGNED = "assigned"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+
+    def __str__(self) -> str:
+        return self.value
+
+@dataclass(slots=True, eq=False)
+class Task:
+    """
+    A task managed by a BaseManager.
+
+    Slotted so that millions of tasks do not pay for a dict each. Status
+    fields are enums and timestamps are floats: created_at and completed_at
+    are seconds since the epoch on the manager's clock, so they line up
+    with retry times and expiry under a VirtualClock too.
+
+    Tasks can also be used like the dicts they replace: task["status"],
+    task.get("result"), "qa_status" in task, task.update(...) and
+    task.to_dict() all work. Assigning status or qa_status through the dict
+    interface coerces strings to the enums.
+    """
+    id: str
+    type: str
+    data: Dict[str, Any]
+    priority: int = 1
+    status: TaskStatus = TaskStatus.PENDING
+    created_at: float = field(default_factory=time.time)
+    assigned_to: Optional[str] = None
+    completed_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    qa_status: QAStatus = QAStatus.PENDING
+    qa_result: Optional[Dict[str, Any]] = None
+    attempts: int = 0  # QA rejections so far
+
+    _COERCE = {"status": TaskStatus, "qa_status": QAStatus}
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        coerce = self._COERCE.get(key)
+        setattr(self, key, coerce(value) if coerce else value)
+
+    def __contains__(self, key: object) -> bool:
+        return key in _FIELD_NAMES
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in _FIELD_NAMES else default
+
+    def update(self, values: Optional[Dict[str, Any]] = None, **kwargs: Any):
+        for key, value in dict(values or {}, **kwargs).items():
+            self[key] = value
+
+    def keys(self) -> List[str]:
+        return list(_FIELD_NAMES)
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, getattr(self, key)) for key in _FIELD_NAMES]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_FIELD_NAMES)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the task to a plain dict with string statuses.
+        """
+        task = dict(self.items())
+        task["status"] = self.status.value
+        task["qa_status"] = self.qa_status.value
+        return task
+
+# Declared after the class so the dataclass does not treat it as a field
+_FIELD_NAMES = tuple(f.name for f in fields(Task))
@@ -0,0 +1,245 @@
+import heapq
+import itertools
+from typing import Dict, Iterator, List, Optional
+
+class PriorityTaskQueue:
+    """
+    Priority queue of task IDs backed by an indexed binary heap.
+
+    Higher priority numbers come out first and tasks with equal priority
+    come out in insertion order (FIFO). An index from task ID to heap
+    entry gives O(1) membership checks. Removal and reprioritization are
+    lazy: the old entry is marked dead and skipped when it reaches the top,
+    so push, pop, discard and reprioritize are all O(log n) amortized.
+    The heap is compacted when dead entries outnumber live ones.
+    """
+
+    _REMOVED = None  # task_id slot of a dead entry
+
+    def __init__(self, counter: Optional[Iterator[int]] = None):
+        """
+        Initialize an empty queue.
+
+        Args:
+            counter: Source of insertion sequence numbers. Queues that share
+                a counter can be merged in global FIFO order.
+        """
+        self._heap: List[list] = []  # entries: [-priority, sequence, task_id]
+        self._entries: Dict[str, list] = {}
+        self._counter = counter if counter is not None else itertools.count()
+
+    def push(self, task_id: str, priority: int):
+        """
+        Add a task, or move it to the back of its new priority class if it
+        is already queued.
+
+        Args:
+            task_id: The ID of the task
+            priority: Priority of the task (higher number = higher priority)
+        """
+        if not task_id:
+            raise ValueError("Task ID is required")
+        self.discard(task_id)
+        entry = [-priority, next(self._counter), task_id]
+        self._entries[task_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def reprioritize(self, task_id: str, priority: int):
+        """
+        Change the priority of a queued task, keeping its original place
+        among tasks of the same priority.
+
+        Args:
+            task_id: The ID of the task
+            priority: The new priority
+        """
+        entry = self._entries.get(task_id)
+        if entry is None:
+            raise KeyError(task_id)
+        if -entry[0] == priority:
+            return
+        self._kill(entry)
+        new_entry = [-priority, entry[1], task_id]
+        self._entries[task_id] = new_entry
+        heapq.heappush(self._heap, new_entry)
+
+    def discard(self, task_id: str) -> bool:
+        """
+        Remove a task if it is queued.
+
+        Returns:
+            True if the task was queued, False otherwise
+        """
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return False
+        self._kill(entry)
+        return True
+
+    def pop(self) -> str:
+        """
+        Remove and return the highest priority task ID.
+
+        Raises:
+            IndexError: If the queue is empty
+        """
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if entry[2] is not self._REMOVED:
+                del self._entries[entry[2]]
+                return entry[2]
+        raise IndexError("pop from an empty task queue")
+
+    def peek(self) -> Optional[str]:
+        """
+        Get the highest priority task ID without removing it.
+
+        Returns:
+            The task ID, or None if the queue is empty
+        """
+        entry = self.peek_entry()
+        return entry[2] if entry else None
+
+    def peek_entry(self) -> Optional[list]:
+        """
+        Get the live heap entry ([-priority, sequence, task_id]) at the top.
+        """
+        heap = self._heap
+        while heap and heap[0][2] is self._REMOVED:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def priority(self, task_id: str) -> int:
+        entry = self._entries.get(task_id)
+        if entry is None:
+            raise KeyError(task_id)
+        return -entry[0]
+
+    def _kill(self, entry: list):
+        del self._entries[entry[2]]
+        entry[2] = self._REMOVED
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._entries):
+            self._heap = [live for live in self._heap if live[2] is not self._REMOVED]
+            heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __bool__(self) -> bool:
+        return bool(self._entries)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterate over a snapshot of the queued task IDs in priority order.
+        This sorts the queue: O(n log n).
+        """
+        return iter([entry[2] for entry in sorted(self._entries.values())])
+
+class TypedTaskQueue:
+    """
+    Priority task queue partitioned by task type.
+
+    Each task type has its own PriorityTaskQueue and all of them draw
+    sequence numbers from one counter, so merging the type heads gives the
+    same order as a single queue. A scheduler can then look only at the
+    types it has capacity for instead of scanning every queued task.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count()
+        self._queues: Dict[str, PriorityTaskQueue] = {}
+        self._types: Dict[str, str] = {}  # task_id -> task type
+
+    def push(self, task_id: str, priority: int, task_type: str):
+        """
+        Add a task, or move it to the back of its new priority class if it
+        is already queued.
+
+        Args:
+            task_id: The ID of the task
+            priority: Priority of the task (higher number = higher priority)
+            task_type: The type of the task
+        """
+        current_type = self._types.get(task_id)
+        if current_type is not None and current_type != task_type:
+            self._queues[current_type].discard(task_id)
+        self.queue(task_type).push(task_id, priority)
+        self._types[task_id] = task_type
+
+    def queue(self, task_type: str) -> PriorityTaskQueue:
+        """
+        Get the queue for a task type, creating it if needed.
+        """
+        queue = self._queues.get(task_type)
+        if queue is None:
+            queue = self._queues[task_type] = PriorityTaskQueue(self._counter)
+        return queue
+
+    def task_types(self) -> List[str]:
+        """
+        Get the task types that have queued tasks.
+        """
+        return [task_type for task_type, queue in self._queues.items() if queue]
+
+    def task_type(self, task_id: str) -> str:
+        return self._types[task_id]
+
+    def reprioritize(self, task_id: str, priority: int):
+        self._queues[self._types[task_id]].reprioritize(task_id, priority)
+
+    def discard(self, task_id: str) -> bool:
+        task_type = self._types.pop(task_id, None)
+        if task_type is None:
+            return False
+        return self._queues[task_type].discard(task_id)
+
+    def pop(self) -> str:
+        """
+        Remove and return the highest priority task ID across all types.
+        This compares the head of every type: O(types + log n).
+
+        Raises:
+            IndexError: If the queue is empty
+        """
+        heads = [entry for entry in (queue.peek_entry() for queue in self._queues.values()) if entry]
+        if not heads:
+            raise IndexError("pop from an empty task queue")
+        task_id = min(heads)[2]
+        return self._queues[self._types.pop(task_id)].pop()
+
+    def pop_type(self, task_type: str) -> str:
+        """
+        Remove and return the highest priority task ID of one type.
+
+        Raises:
+            IndexError: If no task of that type is queued
+        """
+        task_id = self.queue(task_type).pop()
+        del self._types[task_id]
+        return task_id
+
+    def priority(self, task_id: str) -> int:
+        task_type = self._types.get(task_id)
+        if task_type is None:
+            raise KeyError(task_id)
+        return self._queues[task_type].priority(task_id)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __bool__(self) -> bool:
+        return bool(self._types)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._types
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Iterate over a snapshot of the queued task IDs in priority order.
+        This sorts the queue: O(n log n).
+        """
+        entries = sorted(entry for queue in self._queues.values() for entry in queue._entries.values())
+        return iter([entry[2] for entry in entries])
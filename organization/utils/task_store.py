@@ -0,0 +1,180 @@
+import heapq
+from collections import Counter
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .task import Task
+
+class TaskStore(Mapping):
+    """
+    Task records by ID with secondary indexes and counters.
+
+    Reads work like a dict of task_id -> Task. Writes go through add,
+    update_task and pop so that the indexes on status, type and assigned_to
+    and the per-(type, status) counters stay current. Counts are O(1) and
+    filtered queries are O(size of the smallest matching index).
+
+    Tasks that reach a terminal status also enter an expiry heap ordered
+    by their creation time ("created_at", on the manager's clock), so
+    expiring old tasks only touches the tasks being removed.
+
+    Indexed fields must not be assigned on the tasks directly.
+    """
+
+    INDEXED_FIELDS = ("status", "type", "assigned_to")
+    TERMINAL_STATUSES = frozenset(("completed", "approved", "rejected", "failed"))
+
+    def __init__(self):
+        self._tasks: Dict[str, Task] = {}
+        # field -> value -> ordered set of task_ids
+        self._indexes: Dict[str, Dict[Any, Dict[str, None]]] = {field: {} for field in self.INDEXED_FIELDS}
+        self._counts: Counter = Counter()  # (type, status) -> number of tasks
+        # Heap of (created_at, task_id) for tasks that entered a terminal
+        # status. Entries of tasks that were removed or left that status are
+        # dropped when they reach the top.
+        self._expiry: List[Tuple[float, str]] = []
+
+    def add(self, task: Task):
+        """
+        Add a task record.
+
+        Args:
+            task: The task, which must have an "id"
+        """
+        task_id = task["id"]
+        if task_id in self._tasks:
+            raise ValueError(f"Task {task_id} already exists")
+        self._tasks[task_id] = task
+        self._index(task)
+        if task.get("status") in self.TERMINAL_STATUSES:
+            heapq.heappush(self._expiry, (task["created_at"], task_id))
+
+    def update_task(self, task_id: str, **fields: Any) -> Task:
+        """
+        Update fields of a task, re-indexing it if an indexed field changed.
+
+        Args:
+            task_id: The ID of the task
+            **fields: Fields to set
+
+        Returns:
+            The updated task
+        """
+        task = self._tasks[task_id]
+        previous = {field: task.get(field) for field in self.INDEXED_FIELDS}
+        # Update first so that a rejected value leaves the indexes untouched
+        task.update(fields)
+        if any(task.get(field) != previous[field] for field in self.INDEXED_FIELDS):
+            self._unindex(task_id, previous)
+            self._index(task)
+        was_terminal = previous["status"] in self.TERMINAL_STATUSES
+        if not was_terminal and task.get("status") in self.TERMINAL_STATUSES:
+            heapq.heappush(self._expiry, (task["created_at"], task_id))
+        return task
+
+    def pop(self, task_id: str, *default: Any) -> Optional[Task]:
+        """
+        Remove and return a task.
+        """
+        if task_id not in self._tasks:
+            if default:
+                return default[0]
+            raise KeyError(task_id)
+        task = self._tasks.pop(task_id)
+        self._unindex(task_id, task)
+        return task
+
+    def pop_expired(self, cutoff: float) -> List[Task]:
+        """
+        Remove the tasks in a terminal status created at or before a cutoff.
+
+        Args:
+            cutoff: Time on the manager's clock; terminal tasks created at
+                or before it are removed
+
+        Returns:
+            The removed tasks
+        """
+        expired = []
+        while self._expiry and self._expiry[0][0] <= cutoff:
+            _, task_id = heapq.heappop(self._expiry)
+            task = self._tasks.get(task_id)
+            if task is not None and task.get("status") in self.TERMINAL_STATUSES:
+                expired.append(self.pop(task_id))
+        return expired
+
+    def _index(self, task: Task):
+        for field in self.INDEXED_FIELDS:
+            self._indexes[field].setdefault(task.get(field), {})[task["id"]] = None
+        self._counts[(task.get("type"), task.get("status"))] += 1
+
+    def _unindex(self, task_id: str, values: Mapping):
+        for field in self.INDEXED_FIELDS:
+            index = self._indexes[field]
+            value = values.get(field)
+            members = index[value]
+            del members[task_id]
+            if not members:
+                del index[value]
+        key = (values.get("type"), values.get("status"))
+        self._counts[key] -= 1
+        if not self._counts[key]:
+            del self._counts[key]
+
+    def count(self, status: Optional[str] = None, task_type: Optional[str] = None) -> int:
+        """
+        Count tasks, optionally by status and/or type. O(1).
+        """
+        if status is not None and task_type is not None:
+            return self._counts.get((task_type, status), 0)
+        if status is not None:
+            return len(self._indexes["status"].get(status, ()))
+        if task_type is not None:
+            return len(self._indexes["type"].get(task_type, ()))
+        return len(self._tasks)
+
+    def count_by_status(self) -> Dict[str, int]:
+        return {status: len(members) for status, members in self._indexes["status"].items()}
+
+    def count_by_type_and_status(self) -> Dict[Tuple[str, str], int]:
+        return dict(self._counts)
+
+    def find(self, status: Optional[str] = None, task_type: Optional[str] = None,
+             assigned_to: Optional[str] = None) -> List[str]:
+        """
+        Get the IDs of the tasks matching all the given filters.
+
+        Args:
+            status: Only tasks with this status
+            task_type: Only tasks of this type
+            assigned_to: Only tasks assigned to this agent
+
+        Returns:
+            Task IDs in the order they entered the smallest matching index
+        """
+        filters = {
+            field: value
+            for field, value in (("status", status), ("type", task_type), ("assigned_to", assigned_to))
+            if value is not None
+        }
+        if not filters:
+            return list(self._tasks)
+        candidates = min(
+            (self._indexes[field].get(value, {}) for field, value in filters.items()),
+            key=len
+        )
+        return [
+            task_id for task_id in candidates
+            if all(self._tasks[task_id].get(field) == value for field, value in filters.items())
+        ]
+
+    def __getitem__(self, task_id: str) -> Task:
+        return self._tasks[task_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._tasks
@@ -1,11 +1,27 @@
 import asyncio
 import logging
-from organization.utils.base_agent import BaseAgent
-from organization.utils.base_manager import BaseManager
-from organization.utils.base_qa_agent import BaseQAAgent
-from organization.departments.marketing.agents.marketing_agent import MarketingAgent
-from organization.departments.marketing.managers.marketing_manager import MarketingManager
-from organization.departments.marketing.qa.marketing_qa_agent import MarketingQAAgent
+import json
+import os
+import queue
+import tempfile
+
+# Agent history spills to a scratch directory, never into the working tree
+os.environ["ORGANIZATION_HISTORY_DIR"] = tempfile.mkdtemp(prefix="test_organization_history_")
+
+from organization.utils.base_agent import BaseAgent  # noqa: E402
+from organization.utils.base_manager import BaseManager  # noqa: E402
+from organization.utils.base_qa_agent import BaseQAAgent  # noqa: E402
+from organization.departments.marketing.agents.marketing_agent import MarketingAgent  # noqa: E402
+from organization.departments.marketing.managers.marketing_manager import MarketingManager  # noqa: E402
+from organization.departments.marketing.qa.marketing_qa_agent import MarketingQAAgent  # noqa: E402
+from organization.utils.clock import RealClock, VirtualClock, set_clock  # noqa: E402
+from organization.utils.execution_engine import ExecutionEngine  # noqa: E402
+from organization.utils.history_buffer import HistoryBuffer  # noqa: E402
+from organization.utils.qa_dispatcher import QADispatcher  # noqa: E402
+from organization.utils.retry_scheduler import RetryScheduler, TimerWheel  # noqa: E402
+from organization.utils.logging_config import (  # noqa: E402
+    BatchRotatingFileHandler, JsonLinesFormatter, LogWriter, PreparedQueueHandler, SamplingFilter
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -100,12 +116,604 @@ async def test_marketing_qa_agent():
         })
         logger.info(f"Process result: {review_result}")
         
+        review_stats = qa_agent.get_qa_metrics()["review_stats"]
+        assert review_stats["reviews"] == 1 and len(qa_agent.review_history) == 1
+        assert review_stats["approval_rate"] == (1.0 if review_result["review"]["passed"] else 0.0)
+        assert sum(review_stats["score_distribution"].values()) == 1
+        
         logger.info("MarketingQAAgent test completed successfully")
         return True
     except Exception as e:
         logger.error(f"Error testing MarketingQAAgent: {e}")
         return False
 
+async def test_task_queue():
+    """Test the BaseManager priority task queue"""
+    logger.info("Testing task queue...")
+    try:
+        manager = MarketingManager("QueueTestManager")
+        low = manager.create_task("content_creation", {"topic": "Low"}, priority=1)
+        high = manager.create_task("content_creation", {"topic": "High"}, priority=3)
+        low_second = manager.create_task("content_creation", {"topic": "Low 2"}, priority=1)
+        assert list(manager.task_queue) == [high, low, low_second], "Tasks should be ordered by priority, then FIFO"
+        
+        # Rejected tasks wait for their retry, then go back in the queue with a higher priority
+        manager.task_queue.discard(low_second)
+        manager.update_qa_status(low_second, "rejected")
+        assert low_second not in manager.task_queue, "Rejected tasks should not be retried at once"
+        manager.clock = VirtualClock(start=manager.clock.time() + manager.RETRY_BASE_DELAY + 1)
+        assert manager.release_due_retries() == [low_second]
+        assert list(manager.task_queue) == [high, low_second, low], "Rejected tasks should be requeued ahead"
+        assert manager.task_queue.priority(low_second) == 2
+        assert manager.get_task(low_second)["status"] == "pending"
+        
+        manager.task_queue.discard(low)
+        manager.update_qa_status(low, "rejected")
+        manager.cleanup_old_tasks(days=0)
+        assert low not in manager.tasks and low not in manager.retry_scheduler, \
+            "Cleaned up tasks should lose their pending retry"
+        
+        logger.info("Task queue test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing task queue: {e}")
+        return False
+
+async def test_capability_index():
+    """Test matching tasks to agents through the capability index"""
+    logger.info("Testing capability index...")
+    try:
+        manager = MarketingManager("IndexTestManager")
+        agent = MarketingAgent("IndexTestAgent")
+        agent_id = manager.add_agent(agent)
+        research = manager.create_task("market_research", {"topic": "Research"}, priority=1)
+        unknown = manager.create_task("unknown_type", {"topic": "Unknown"}, priority=5)
+        content = manager.create_task("content_creation", {"topic": "Content"}, priority=2)
+        
+        manager.assign_tasks()
+        assert manager.tasks[content]["assigned_to"] == agent_id, "Highest priority task the agent can handle goes first"
+        assert not manager.capability_index.has_available("market_research"), "Busy agents leave the index"
+        assert list(manager.task_queue) == [unknown, research]
+        
+        agent.complete_task(content, {"content": "Done"})
+        assert manager.capability_index.find_agent("market_research") == agent_id, "Idle agents return to the index"
+        manager.assign_tasks()
+        assert manager.tasks[research]["assigned_to"] == agent_id
+        assert manager.tasks[unknown]["status"] == "pending"
+        assert manager.get_eligible_agents([research, unknown]) == {research: [agent_id], unknown: []}
+        
+        logger.info("Capability index test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing capability index: {e}")
+        return False
+
+async def test_task_store():
+    """Test task status counters and indexes"""
+    logger.info("Testing task store...")
+    try:
+        manager = MarketingManager("StoreTestManager")
+        agent_id = manager.add_agent(MarketingAgent("StoreTestAgent"))
+        content = manager.create_task("content_creation", {"topic": "Content"}, priority=2)
+        research = manager.create_task("market_research", {"topic": "Research"})
+        manager.assign_tasks()
+        
+        assert manager.tasks.count(status="pending") == 1
+        assert manager.tasks.count(status="assigned", task_type="content_creation") == 1
+        assert [task["id"] for task in manager.get_tasks(assigned_to=agent_id)] == [content]
+        
+        manager.update_task_status(content, "completed", {"content": "Done"})
+        manager.update_qa_status(content, "approved")
+        report = manager.get_team_performance_report()
+        assert report["approved_tasks"] == 1 and report["pending_tasks"] == 1 and report["completed_tasks"] == 0
+        assert manager.get_task(content).to_dict()["status"] == "approved"
+        assert isinstance(manager.get_task(content)["completed_at"], float)
+        assert [task["id"] for task in manager.get_tasks(status="pending", task_type="market_research")] == [research]
+        
+        manager.cleanup_old_tasks(days=0)
+        assert manager.tasks.count() == 1 and manager.tasks.count(status="approved") == 0
+        
+        # Timestamps and expiry follow the manager's clock
+        manager.clock = VirtualClock(start=1000.0)
+        virtual = manager.create_task("content_creation", {"topic": "Virtual"})
+        manager.update_task_status(virtual, "completed", {"content": "Done"})
+        assert manager.tasks[virtual]["created_at"] == manager.tasks[virtual]["completed_at"] == 1000.0
+        manager.clock = VirtualClock(start=1000.0 + 86400)
+        assert manager.cleanup_old_tasks(days=2) == 0, "Tasks younger than the retention period stay"
+        manager.clock = VirtualClock(start=1000.0 + 3 * 86400)
+        assert manager.cleanup_old_tasks(days=2) == 1 and virtual not in manager.tasks
+        
+        failed = manager.create_task("content_creation", {"topic": "Failed"})
+        manager.update_task_status(failed, "failed")
+        manager.clock = VirtualClock(start=1000.0 + 6 * 86400)
+        assert manager.cleanup_old_tasks(days=2) == 1 and failed not in manager.tasks, "Failed tasks expire too"
+        
+        logger.info("Task store test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing task store: {e}")
+        return False
+
+async def test_cleanup_sweeper():
+    """Test background cleanup of old terminal tasks"""
+    logger.info("Testing cleanup sweeper...")
+    try:
+        manager = MarketingManager("SweeperTestManager")
+        done = manager.create_task("content_creation", {"topic": "Done"})
+        pending = manager.create_task("content_creation", {"topic": "Pending"})
+        manager.update_task_status(done, "completed", {"content": "Done"})
+        
+        manager.start_cleanup_sweeper(interval=0.01, days=0)
+        await asyncio.sleep(0.05)
+        await manager.stop_cleanup_sweeper()
+        assert done not in manager.tasks, "Terminal tasks should be swept"
+        assert pending in manager.tasks and pending in manager.task_queue, "Pending tasks should be kept"
+        
+        # On a virtual clock the sweeper runs in simulated time
+        clock = VirtualClock(start=1000.0)
+        manager = MarketingManager("VirtualSweeperTestManager")
+        manager.clock = clock
+        done = manager.create_task("content_creation", {"topic": "Done"})
+        manager.update_task_status(done, "completed", {"content": "Done"})
+        manager.start_cleanup_sweeper(interval=3600, days=1)
+        await clock.sleep(86400 - 1)
+        assert done in manager.tasks, "Tasks are kept until they are a day old"
+        await clock.sleep(3600)
+        assert done not in manager.tasks, "The hourly sweep after a simulated day removes the task"
+        await manager.stop_cleanup_sweeper()
+        
+        logger.info("Cleanup sweeper test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing cleanup sweeper: {e}")
+        return False
+
+async def test_history_buffer():
+    """Test bounded history with disk spill"""
+    logger.info("Testing history buffer...")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            spill_path = os.path.join(directory, "history.jsonl")
+            history = HistoryBuffer(capacity=5, spill_path=spill_path, index_interval=3)
+            for i in range(20):
+                history.append({"timestamp": i, "task_id": f"task-{i}"})
+            
+            assert len(history) == 5, "Only the newest entries stay in memory"
+            assert [entry["timestamp"] for entry in history.recent(2)] == [18, 19]
+            assert [entry["timestamp"] for entry in history.query(since=7, until=10)] == [7, 8, 9, 10]
+            assert [entry["timestamp"] for entry in history.query(since=13, limit=4)] == [13, 14, 15, 16]
+            history.close()
+            
+            reopened = HistoryBuffer(capacity=5, spill_path=spill_path, index_interval=3)
+            assert [entry["timestamp"] for entry in reopened.query(since=2, until=4)] == [2, 3, 4]
+            
+            # Agents sharing a name spill to separate logs and never read each other's
+            saved = BaseAgent.HISTORY_DIR, BaseAgent.TASK_HISTORY_SIZE
+            BaseAgent.HISTORY_DIR, BaseAgent.TASK_HISTORY_SIZE = directory, 1
+            try:
+                first, second = MarketingAgent("HistoryAgent"), MarketingAgent("HistoryAgent")
+            finally:
+                BaseAgent.HISTORY_DIR, BaseAgent.TASK_HISTORY_SIZE = saved
+            for i in range(3):
+                first.task_history.append({"timestamp": f"2024-01-0{i + 1}", "task_id": f"task-{i}"})
+            assert first.task_history.spill_path != second.task_history.spill_path
+            assert len(list(first.iter_task_history())) == 3
+            assert list(second.iter_task_history()) == []
+            first.close()
+            second.close()
+            
+            qa_agents = [MarketingQAAgent("HistoryQA"), MarketingQAAgent("HistoryQA")]
+            review_paths = {qa.review_history.spill_path for qa in qa_agents}
+            assert len(review_paths) == 2, "QA agents sharing a name archive reviews separately"
+            assert all(os.path.dirname(path) == BaseAgent.HISTORY_DIR for path in review_paths)
+            for qa in qa_agents:
+                qa.close()
+        
+        logger.info("History buffer test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing history buffer: {e}")
+        return False
+
+async def test_async_logging():
+    """Test the queued logging pipeline with sampling and JSONL output"""
+    logger.info("Testing async logging...")
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            log_file = os.path.join(directory, "test.log")
+            file_handler = BatchRotatingFileHandler(log_file, maxBytes=0)
+            file_handler.setFormatter(JsonLinesFormatter())
+            log_queue = queue.Queue()
+            writer = LogWriter(log_queue, [file_handler], batch_size=16)
+            writer.start()
+            
+            queue_handler = PreparedQueueHandler(log_queue)
+            queue_handler.addFilter(SamplingFilter({"AsyncLogTest.hot": 0.5}))
+            test_logger = logging.getLogger("AsyncLogTest")
+            test_logger.propagate = False
+            test_logger.addHandler(queue_handler)
+            
+            metrics = {"tasks": 0}
+            for i in range(10):
+                metrics["tasks"] = i
+                test_logger.getChild("hot").info("Metrics: %s", metrics)
+            test_logger.warning("Never sampled")
+            writer.stop()
+            test_logger.removeHandler(queue_handler)
+            
+            with open(log_file) as f:
+                entries = [json.loads(line) for line in f]
+            assert len(entries) == 6, "Half of the hot records plus the warning should be written"
+            assert entries[0]["message"] == "Metrics: {'tasks': 1}", "Arguments are captured when logged"
+            assert entries[-1]["level"] == "WARNING"
+        
+        logger.info("Async logging test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing async logging: {e}")
+        return False
+
+async def test_virtual_clock():
+    """Test simulated time on a virtual clock"""
+    logger.info("Testing virtual clock...")
+    try:
+        clock = VirtualClock(start=0.0)
+        woke = []
+        
+        async def sleeper(name, seconds):
+            await clock.sleep(seconds)
+            woke.append((name, clock.time()))
+        
+        await asyncio.gather(sleeper("late", 3600), sleeper("early", 60), sleeper("middle", 600))
+        assert woke == [("early", 60), ("middle", 600), ("late", 3600)], "Sleepers wake in virtual time order"
+        
+        agent = MarketingAgent("ClockTestAgent")
+        agent.clock = clock
+        await agent.simulate_thinking(100, 200)
+        assert 3700 <= clock.time() <= 3800, "Thinking time passes on the agent's clock"
+        
+        logger.info("Virtual clock test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing virtual clock: {e}")
+        return False
+
+async def test_execution_engine():
+    """Test running tasks through the execution engine"""
+    logger.info("Testing execution engine...")
+    set_clock(VirtualClock())
+    try:
+        manager = MarketingManager("EngineTestManager")
+        for i in range(3):
+            manager.add_agent(MarketingAgent(f"EngineTestAgent{i}"))
+        manager.add_qa_agent(MarketingQAAgent("EngineTestQAAgent"))
+        
+        engine = ExecutionEngine(manager, max_pending=4)
+        await engine.start()
+        assert manager.engine is engine, "Engine attaches to the manager"
+        peak = 0
+        task_ids = []
+        for i in range(10):
+            task_ids.append(await engine.submit("content_creation", {"topic": f"Engine test {i}"}))
+            peak = max(peak, engine.get_stats()["unfinished"])
+        assert peak <= 4, "Submitting waits while max_pending tasks are unfinished"
+        
+        await engine.join()
+        stats = engine.get_stats()
+        assert stats["finished"] == 10 and stats["unfinished"] == 0, "Every task finishes"
+        assert stats["approved"] + stats["dead_lettered"] == 10, "Every task is approved or runs out of attempts"
+        assert stats["rejected"] == stats["dead_lettered"] * manager.MAX_ATTEMPTS, "Rejected tasks are retried"
+        for task_id in task_ids:
+            task = manager.get_task(task_id)
+            assert task["result"] is not None, "Results are reported to the manager"
+            assert task["qa_status"] in ("approved", "rejected") and task["qa_result"], "The review sets the QA status"
+        assert all(agent.is_available() for agent in manager.agents.values()), "Agents are free again"
+        
+        await engine.stop()
+        assert manager.engine is None, "Engine detaches from the manager"
+        
+        logger.info("Execution engine test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing execution engine: {e}")
+        return False
+    finally:
+        set_clock(RealClock())
+
+async def test_agent_slots():
+    """Test agents that hold several tasks at once"""
+    logger.info("Testing agent slots...")
+    try:
+        agent = MarketingAgent("SlotTestAgent", capacity=2)
+        assert agent.assign_task("slot1", {}) and agent.assign_task("slot2", {}), "Both slots are filled"
+        assert agent.is_busy and not agent.is_available(), "A full agent is busy"
+        assert not agent.assign_task("slot3", {}), "A full agent rejects more work"
+        assert agent.current_task["task_id"] == "slot1", "The oldest task is the current task"
+        agent.complete_task("slot2", {"done": True})
+        assert agent.is_available() and list(agent.active_tasks) == ["slot1"], "Completing frees one slot"
+        agent.complete_task("slot1", {"done": True})
+        assert agent.current_task is None and agent.free_slots == 2, "The agent is idle again"
+        
+        manager = MarketingManager("SlotTestManager")
+        packed = MarketingAgent("PackedAgent", capacity=3)
+        spare = MarketingAgent("SpareAgent", capacity=3)
+        packed_id = manager.add_agent(packed)
+        spare_id = manager.add_agent(spare)
+        for i in range(4):
+            manager.create_task("content_creation", {"topic": f"Slot test {i}"})
+        assigned = [agent_id for _, agent_id in manager.assign_tasks()]
+        assert assigned == [packed_id] * 3 + [spare_id], "Work is packed onto agents up to their capacity"
+        
+        set_clock(VirtualClock())
+        try:
+            manager = MarketingManager("SlotEngineTestManager")
+            worker = MarketingAgent("SlotEngineTestAgent", capacity=4)
+            manager.add_agent(worker)
+            peak = []
+            worker.add_listener(lambda changed, event: peak.append(len(changed.active_tasks)))
+            engine = ExecutionEngine(manager)
+            await engine.start()
+            for i in range(8):
+                await engine.submit("market_research", {"topic": f"Slot engine test {i}"})
+            await engine.join()
+            await engine.stop()
+            assert max(peak) == 4, "A multi-slot agent runs tasks concurrently up to its capacity"
+            assert engine.stats["finished"] == 8, "Every task finishes"
+        finally:
+            set_clock(RealClock())
+        
+        logger.info("Agent slots test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing agent slots: {e}")
+        return False
+
+async def test_qa_dispatcher():
+    """Test routing reviews to the least-loaded QA agent"""
+    logger.info("Testing QA dispatcher...")
+    try:
+        manager = MarketingManager("QADispatchTestManager")
+        first = MarketingQAAgent("QADispatchTestAgent1")
+        second = MarketingQAAgent("QADispatchTestAgent2", capacity=2)
+        first_id = manager.add_qa_agent(first)
+        second_id = manager.add_qa_agent(second)
+        
+        task_ids = []
+        for i in range(5):
+            task_id = manager.create_task("content_creation", {"topic": f"QA dispatch test {i}"})
+            manager.update_task_status(task_id, "completed", {"id": task_id})
+            task_ids.append(task_id)
+        
+        stats = manager.qa_dispatcher.get_stats()
+        assert len(first.active_tasks) == 1 and len(second.active_tasks) == 2, "Every free slot is used"
+        assert stats[first_id]["queued"] == 1 and stats[second_id]["queued"] == 1, "The rest are spread by load"
+        assert stats[first_id]["load"] == 2 and stats[second_id]["load"] == 1.5, "Load counts per slot"
+        assert manager.get_task(task_ids[0])["qa_status"] == "assigned", "Started reviews are assigned"
+        assert manager.get_task(task_ids[3])["qa_status"] == "pending", "Queued reviews are pending"
+        
+        first.complete_task(task_ids[0], {"success": True})
+        assert list(first.active_tasks) == [task_ids[3]], "A reviewer that frees a slot takes its next review"
+        assert manager.get_task(task_ids[3])["qa_status"] == "assigned"
+        
+        manager.remove_qa_agent(second_id)
+        assert manager.qa_dispatcher.queued(first_id) == 1, "A leaving reviewer hands its queue to the others"
+        manager.remove_qa_agent(first_id)
+        assert manager.qa_dispatcher.queued() == 1, "Reviews without a reviewer wait"
+        late = MarketingQAAgent("QADispatchTestAgent3")
+        manager.add_qa_agent(late)
+        assert list(late.active_tasks) == [task_ids[4]], "Waiting reviews go to the next reviewer added"
+        
+        # Cleaning up a task drops its queued review, so no reviewer slot is lost
+        queued = manager.create_task("content_creation", {"topic": "QA dispatch cleanup"})
+        manager.update_task_status(queued, "completed", {"id": queued})
+        assert manager.qa_dispatcher.queued() == 1
+        manager.cleanup_old_tasks(days=0)
+        assert manager.qa_dispatcher.queued() == 0, "Cleaned up tasks leave the review queues"
+        late.complete_task(task_ids[4], {"success": True})
+        assert late.is_available(), "The freed slot stays free"
+        
+        # A review assigned after its task disappeared releases the slot
+        manager.qa_dispatcher.submit("missing-task", {"task_data": {}, "result": {}})
+        assert late.is_available() and "missing-task" not in late.active_tasks
+        
+        try:
+            QADispatcher(lambda task_id, qa_agent_id: None, strategy="random")
+            assert False, "Unknown strategies are rejected"
+        except ValueError:
+            pass
+        
+        logger.info("QA dispatcher test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing QA dispatcher: {e}")
+        return False
+
+async def test_retry_scheduler():
+    """Test delayed retries of rejected tasks"""
+    logger.info("Testing retry scheduler...")
+    try:
+        wheel = TimerWheel(tick=1.0, slots=8, start=0.0)
+        wheel.schedule("soon", 2.5)
+        wheel.schedule("later", 20.0)  # more than a turn of the wheel away
+        wheel.schedule("cancelled", 3.0)
+        assert wheel.cancel("cancelled") and not wheel.cancel("cancelled")
+        assert wheel.advance(2.0) == [], "Timers never fire early"
+        assert wheel.advance(3.0) == ["soon"]
+        assert wheel.advance(19.0) == [] and "later" in wheel, "Far timers wait for their turn"
+        assert wheel.advance(100.0) == ["later"] and len(wheel) == 0, "A long jump fires every due timer"
+        
+        scheduler = RetryScheduler(base_delay=10.0, max_delay=25.0, max_attempts=4, start=0.0)
+        assert [scheduler.delay(attempt) for attempt in (1, 2, 3)] == [10.0, 20.0, 25.0], "Backoff is capped"
+        assert scheduler.schedule("task", 1, now=0.0) == 10.0
+        assert scheduler.due(9.0) == [] and scheduler.due(10.0) == ["task"]
+        assert scheduler.schedule("task", 4, now=10.0, reason="Still wrong") is None, "Out of attempts"
+        assert scheduler.dead_letters["task"]["reason"] == "Still wrong"
+        
+        manager = MarketingManager("RetryTestManager")
+        task_id = manager.create_task("content_creation", {"topic": "Retry test"})
+        manager.task_queue.discard(task_id)
+        start = manager.clock.time()
+        for attempt in range(1, manager.MAX_ATTEMPTS + 1):
+            manager.update_qa_status(task_id, "rejected", {"attempt": attempt})
+            if attempt < manager.MAX_ATTEMPTS:
+                manager.clock = VirtualClock(start=start + manager.retry_scheduler.delay(attempt) * 2)
+                start = manager.clock.time()
+                assert manager.release_due_retries() == [task_id]
+                manager.task_queue.discard(task_id)
+        assert manager.get_task(task_id)["attempts"] == manager.MAX_ATTEMPTS
+        assert [letter["task_id"] for letter in manager.get_dead_letters()] == [task_id], "The task is dead-lettered"
+        assert manager.retry_dead_letter(task_id) and task_id in manager.task_queue, "Dead letters can be retried"
+        assert manager.get_dead_letters() == [] and manager.get_task(task_id)["attempts"] == 0
+        
+        logger.info("Retry scheduler test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing retry scheduler: {e}")
+        return False
+
+async def test_checklist_rules():
+    """Test the compiled QA checklist rules"""
+    logger.info("Testing checklist rules...")
+    try:
+        qa_agent = MarketingQAAgent("RulesTestQAAgent")
+        rules = qa_agent.get_checklist_rules("content")
+        assert [rule.item for rule in rules] == qa_agent.qa_checklist["content"], "Rules follow the checklist order"
+        
+        task_data = {"type": "content_creation", "brand_voice": {"allowed_tones": ["friendly"]},
+                     "target_audience": ["Developers"]}
+        result = {"content": {"tone": "friendly", "call_to_action": "Try it", "text": "TODO",
+                              "target_audience": ["Developers"], "keywords": ["api"]}}
+        review = qa_agent.review_task(task_data, result)
+        assert review["passed"] and not review["issues"], "Every item is checked against the task result"
+        
+        version = qa_agent.checklist_version
+        qa_agent.register_checklist_rule(
+            "content", "No placeholders",
+            lambda task_data, result: "TODO" not in result.get("content", {}).get("text", ""),
+            "high", "Content must not contain placeholders"
+        )
+        assert qa_agent.checklist_version > version, "Registering a rule changes the checklist version"
+        review = qa_agent.review_task(task_data, result)
+        assert [issue["item"] for issue in review["issues"]] == ["No placeholders"], "Custom rules run in reviews"
+        
+        qa_agent.update_qa_checklist("content", ["Call-to-action presence"])
+        assert [rule.item for rule in qa_agent.get_checklist_rules("content")] == ["Call-to-action presence"]
+        assert qa_agent.review_task(task_data, result)["passed"], "Only the items on the checklist are checked"
+        
+        try:
+            qa_agent.register_checklist_rule("content", "Bad severity", lambda task_data, result: True, "urgent")
+            assert False, "Unknown severities are rejected"
+        except ValueError:
+            pass
+        
+        logger.info("Checklist rules test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing checklist rules: {e}")
+        return False
+
+async def test_review_batch():
+    """Test that batch reviews match single reviews"""
+    logger.info("Testing batch reviews...")
+    try:
+        qa_agent = MarketingQAAgent("BatchTestQAAgent")
+        single_agent = MarketingQAAgent("SingleTestQAAgent")
+        good_content = {"tone": "friendly", "call_to_action": "Try it",
+                        "target_audience": ["Developers"], "keywords": ["api"]}
+        task_data = {"brand_voice": {"allowed_tones": ["friendly"]}, "target_audience": ["Developers"]}
+        reviews = [
+            (dict(task_data, type="content_creation"), {"id": "1", "content": good_content}),
+            (dict(task_data, type="content_creation"), {"id": "2", "content": dict(good_content, keywords=[])}),
+            (dict(task_data, type="campaign_creation"), {"id": "3", "campaign": {"objective": "Short"}}),
+            (dict(task_data, type="market_research"), {"id": "4", "research": {}})
+        ]
+        batch = qa_agent.review_batch(reviews)
+        
+        assert batch["passed"] == [True, False, False, False], "Each task passes only if all rules pass"
+        assert batch["failed_items"][1] == ("SEO optimization",), "Failed items are reported per task"
+        assert batch["failed_items"][3] == ("Unknown task type",), "Unknown task types fail"
+        for i, (data, result) in enumerate(reviews):
+            review = await single_agent.process({"task_data": data, "result": result})
+            assert review["review"]["passed"] == batch["passed"][i]
+            assert abs(review["quality_score"] - batch["quality_score"][i]) < 1e-9, "Scores match single reviews"
+        assert qa_agent.get_qa_metrics()["review_stats"] == single_agent.get_qa_metrics()["review_stats"]
+        
+        empty = qa_agent.review_batch([])
+        assert len(empty["passed"]) == 0 and empty["failed_items"] == []
+        
+        # A rule that raises is skipped, and both paths approve by the same threshold
+        lenient_agents = [MarketingQAAgent("LenientBatchQAAgent"), MarketingQAAgent("LenientSingleQAAgent")]
+        for agent in lenient_agents:
+            agent.APPROVAL_THRESHOLD = 0.0
+            agent.register_checklist_rule("content", "Word count",
+                                          lambda task_data, result: result["content"]["words"] > 50)
+        batch = lenient_agents[0].review_batch(reviews)
+        assert batch["passed"] == [True] * len(reviews), "Every score clears a zero threshold"
+        assert "Word count" not in batch["failed_items"][0], "A rule that raises is skipped"
+        for i, (data, result) in enumerate(reviews):
+            single = lenient_agents[1].review_task(data, result)
+            assert single["passed"] == batch["passed"][i]
+            assert len(single["issues"]) + len(single["suggestions"]) == len(batch["failed_items"][i])
+        
+        logger.info("Batch review test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing batch reviews: {e}")
+        return False
+
+async def test_review_cache():
+    """Test that unchanged submissions reuse the cached review"""
+    logger.info("Testing review cache...")
+    try:
+        qa_agent = MarketingQAAgent("CacheTestQAAgent")
+        task_data = {"type": "content_creation", "brand_voice": {"allowed_tones": ["friendly"]},
+                     "target_audience": ["Developers"], "topic": "Launch"}
+        content = {"id": "content_1", "created_at": "2024-01-01T00:00:00", "tone": "friendly",
+                   "call_to_action": "", "target_audience": ["Developers"], "keywords": ["api"]}
+        result = {"success": True, "content": content, "message": "First draft"}
+        
+        first = await qa_agent.process({"task_data": task_data, "result": result})
+        assert not first["review"]["passed"], "The missing call-to-action is an issue"
+        
+        rework = {"success": True, "message": "Second draft",
+                  "content": dict(content, id="content_2", created_at="2024-01-02T00:00:00")}
+        second = await qa_agent.process({"task_data": dict(task_data, topic="Relaunch"), "result": rework})
+        assert second["review"] == first["review"], "Changes to unreviewed fields reuse the verdict"
+        assert second["review"] is not first["review"], "Cache hits return a copy of the verdict"
+        assert qa_agent.review_cache_stats == {"hits": 1, "misses": 1}
+        assert qa_agent.get_qa_metrics()["review_stats"]["reviews"] == 2, "Cache hits still count as reviews"
+        
+        fixed = {"success": True, "content": dict(content, call_to_action="Try it")}
+        third = await qa_agent.process({"task_data": task_data, "result": fixed})
+        assert third["review"]["passed"], "Changes to reviewed fields are reviewed again"
+        
+        qa_agent.update_qa_checklist("content", ["Call-to-action presence", "Brand voice consistency"])
+        assert len(qa_agent.review_cache) == 0, "Changing the checklist clears the cache"
+        again = await qa_agent.process({"task_data": task_data, "result": result})
+        assert again["review"] is not first["review"] and qa_agent.review_cache_stats["misses"] == 3
+        
+        # Custom rules may read any field, so the whole result is part of the key
+        approved = {"success": True, "content": dict(content, call_to_action="Try it"), "summary": "Launch post"}
+        await qa_agent.process({"task_data": task_data, "result": approved})
+        qa_agent.register_checklist_rule("content", "Summary", lambda task_data, result: bool(result.get("summary")),
+                                         description="A summary is required")
+        assert len(qa_agent.review_cache) == 0, "Registering a rule clears the cache"
+        summarized = await qa_agent.process({"task_data": task_data, "result": approved})
+        assert summarized["review"]["passed"] and summarized["quality_score"] == 1.0
+        unsummarized = await qa_agent.process({"task_data": task_data, "result": dict(approved, summary="")})
+        assert not unsummarized["review"]["passed"], "A field only the custom rule reads is reviewed"
+        assert unsummarized["quality_score"] < 1.0
+        
+        summarized["review"]["issues"].append({"description": "Edited by the caller"})
+        cached = await qa_agent.process({"task_data": task_data, "result": approved})
+        assert cached["review"]["issues"] == [], "Callers cannot change cached verdicts"
+        
+        logger.info("Review cache test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing review cache: {e}")
+        return False
+
 async def main():
     """Run all tests"""
     logger.info("Starting organization tests...")
@@ -129,8 +737,25 @@ async def main():
     agent_success = await test_marketing_agent()
     manager_success = await test_marketing_manager()
     qa_agent_success = await test_marketing_qa_agent()
+    queue_success = await test_task_queue()
+    index_success = await test_capability_index()
+    store_success = await test_task_store()
+    sweeper_success = await test_cleanup_sweeper()
+    history_success = await test_history_buffer()
+    logging_success = await test_async_logging()
+    clock_success = await test_virtual_clock()
+    engine_success = await test_execution_engine()
+    slots_success = await test_agent_slots()
+    dispatcher_success = await test_qa_dispatcher()
+    retry_success = await test_retry_scheduler()
+    rules_success = await test_checklist_rules()
+    batch_success = await test_review_batch()
+    cache_success = await test_review_cache()
     
-    if agent_success and manager_success and qa_agent_success:
+    if (agent_success and manager_success and qa_agent_success and queue_success and index_success
+            and store_success and sweeper_success and history_success and logging_success
+            and clock_success and engine_success and slots_success and dispatcher_success
+            and retry_success and rules_success and batch_success and cache_success):
         logger.info("All tests completed successfully!")
     else:
         logger.error("Some tests failed!")
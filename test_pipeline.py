@@ -0,0 +1,509 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from benchmarks.import_time import LAZY_MODULES
+from benchmarks.fake_services import DEFAULT_COMPLETION, make_server, parse_latency
+from utils.batch import BatchContext
+from utils.checkpoint import CheckpointStore, JobInProgressError
+from utils.deadline import DeadlineExceeded, deadline_scope, remaining_time
+from utils.scheduler import FairScheduler
+from utils.prompt_builder import PromptBuilder, compact_context, count_tokens
+from utils.model_client import CircuitBreaker, CircuitOpenError, ModelClient
+from utils.tracing import escape_label_value, span, tracer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("test_pipeline")
+
+# Keep sampled traces out of the working tree
+tracer.trace_file = os.path.join(tempfile.mkdtemp(prefix="test_pipeline_"), "traces.jsonl")
+
+class FakeChatClient:
+    """
+    Stand-in for openai.AsyncOpenAI that posts to the fake OpenAI service.
+    Setting `fail` sends requests to an endpoint the service does not have,
+    so they fail the way a provider error would.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.fail = False
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _post(self, path: str, body: bytes) -> dict:
+        request = urllib.request.Request(f"{self.base_url}{path}", data=body,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.loads(response.read())
+
+    async def create(self, model: str, messages: list, max_tokens: int):
+        self.requests += 1
+        path = "/v1/broken" if self.fail else "/v1/chat/completions"
+        body = json.dumps({"model": model, "messages": messages}).encode("utf-8")
+        response = await asyncio.to_thread(self._post, path, body)
+        message = SimpleNamespace(content=response["choices"][0]["message"]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+class FakeServices:
+    """
+    The benchmark's fake OpenAI/Pexels services on a free local port
+    """
+
+    def __init__(self, openai_latency: str = "fixed:0.01"):
+        self.server = make_server(0, openai_latency=openai_latency, pexels_latency="fixed:0.01",
+                                  download_latency="fixed:0.01", clip_kb=1)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def set_latency(self, service: str, spec: str):
+        self.server.RequestHandlerClass.latencies[service] = parse_latency(spec)
+
+    def model_client(self, **kwargs) -> ModelClient:
+        client = ModelClient(**kwargs)
+        client._client = FakeChatClient(self.url)
+        return client
+
+    def __enter__(self) -> "FakeServices":
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
+
+MESSAGES = [{"role": "user", "content": "Write a content strategy"}]
+
+async def test_circuit_breaker():
+    """Test that the breaker opens, probes and recovers"""
+    logger.info("Testing circuit breaker...")
+    try:
+        with FakeServices() as services:
+            client = services.model_client(breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.2))
+            assert await client.complete(MESSAGES), "Calls go through while closed"
+
+            client._client.fail = True
+            for _ in range(2):
+                try:
+                    await client.complete(MESSAGES)
+                    assert False, "Provider errors propagate"
+                except urllib.error.HTTPError:
+                    pass
+            assert client.breaker.state == "open", "Consecutive failures open the circuit"
+            requests = client._client.requests
+            try:
+                await client.complete(MESSAGES)
+                assert False, "An open circuit fails fast"
+            except CircuitOpenError:
+                pass
+            assert client._client.requests == requests, "No request reaches the provider while open"
+
+            # A failed probe opens the circuit again
+            await asyncio.sleep(0.25)
+            try:
+                await client.complete(MESSAGES)
+                assert False, "The probe reaches the failing provider"
+            except urllib.error.HTTPError:
+                pass
+            assert client.breaker.state == "open"
+
+            # While the probe is in flight other calls fail fast; its success closes the circuit
+            client._client.fail = False
+            services.set_latency("openai", "fixed:0.1")
+            await asyncio.sleep(0.25)
+            probe = asyncio.create_task(client.complete(MESSAGES))
+            await asyncio.sleep(0.02)
+            assert client.breaker.state == "half_open"
+            try:
+                await client.complete(MESSAGES)
+                assert False, "Only one probe is let through"
+            except CircuitOpenError:
+                pass
+            assert await probe
+            assert client.breaker.state == "closed" and client.breaker.failures == 0, "The circuit recovers"
+
+            # A cancelled probe hands the probe to the next call
+            client.breaker.record_failure()
+            client.breaker.record_failure()
+            await asyncio.sleep(0.25)
+            probe = asyncio.create_task(client.complete(MESSAGES))
+            await asyncio.sleep(0.02)
+            probe.cancel()
+            try:
+                await probe
+            except asyncio.CancelledError:
+                pass
+            assert await client.complete(MESSAGES), "The breaker is not stuck half-open"
+            assert client.breaker.state == "closed"
+
+        logger.info("Circuit breaker test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing circuit breaker: {e!r}")
+        return False
+
+async def test_deadline_mid_hedge():
+    """Test that a deadline expiring mid-hedge cancels both requests and spares the breaker"""
+    logger.info("Testing deadline during a hedged request...")
+    try:
+        with FakeServices(openai_latency="fixed:0.5") as services:
+            client = services.model_client(hedge_percentile=0.5, hedge_min_delay=0.05, hedge_min_samples=5,
+                                           breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60))
+            client.latencies.extend([0.05] * 5)
+
+            start = time.monotonic()
+            try:
+                with deadline_scope(0.2):
+                    await client.complete(MESSAGES)
+                assert False, "The request outlives its deadline"
+            except DeadlineExceeded:
+                pass
+            assert time.monotonic() - start < 0.4, "The call gives up at the deadline"
+            assert client.hedges_sent == 1 and client._client.requests == 2, "A hedge was sent before the deadline"
+            assert client.breaker.state == "closed" and client.breaker.failures == 0, \
+                "The caller's deadline does not count against the provider"
+
+            # An expired budget fails before any blocking call is made
+            with deadline_scope(0.01):
+                await asyncio.sleep(0.02)
+                try:
+                    remaining_time(30)
+                    assert False, "A spent budget is not a zero timeout"
+                except DeadlineExceeded:
+                    pass
+
+        logger.info("Deadline during hedge test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing deadline during hedge: {e!r}")
+        return False
+
+async def test_single_flight():
+    """Test that a batch shares results and provider errors but not per-job deadline errors"""
+    logger.info("Testing single-flight batching...")
+    try:
+        with FakeServices(openai_latency="fixed:0.2") as services:
+            client = services.model_client()
+            batch = BatchContext(max_concurrency=8)
+
+            async def job(seconds: float, key: str = "strategy"):
+                with deadline_scope(seconds):
+                    return await batch.shared("completions", key, lambda: client.complete(MESSAGES))
+
+            results = await asyncio.gather(*[job(5) for _ in range(5)])
+            assert len(set(results)) == 1 and results[0], "Every job gets the same result"
+            assert batch.calls["completions"] == 1 and batch.deduplicated["completions"] == 4, \
+                "Identical calls run once per batch"
+
+            # The first job's short deadline is its own: the others retry under theirs
+            short = asyncio.create_task(job(0.05, "retry"))
+            await asyncio.sleep(0.01)
+            long_jobs = [asyncio.create_task(job(5, "retry")) for _ in range(3)]
+            try:
+                await short
+                assert False, "The short job runs out of time"
+            except DeadlineExceeded:
+                pass
+            results = await asyncio.gather(*long_jobs)
+            assert all(results), "Jobs with longer deadlines still get the result"
+            assert batch.calls["completions"] == 3, "One retry replaced the abandoned call"
+
+            # A waiter gives up at its own deadline even if the producer has more time
+            producer = asyncio.create_task(job(5, "waiter"))
+            await asyncio.sleep(0.01)
+            try:
+                await job(0.05, "waiter")
+                assert False, "The waiter runs out of time"
+            except DeadlineExceeded:
+                pass
+            assert await producer
+
+            # Real provider errors are shared
+            client._client.fail = True
+            requests = client._client.requests
+            results = await asyncio.gather(*[job(5, "broken") for _ in range(3)], return_exceptions=True)
+            assert all(isinstance(result, urllib.error.HTTPError) for result in results), "Every job gets the error"
+            assert client._client.requests == requests + 1, "The failing call is not repeated per job"
+
+        logger.info("Single-flight test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing single-flight batching: {e!r}")
+        return False
+
+async def test_checkpoint_resume():
+    """Test that a job resumes after a failed stage and that job IDs are not shared"""
+    logger.info("Testing checkpoint resume...")
+    try:
+        with FakeServices() as services:
+            client = services.model_client()
+            store = CheckpointStore(tempfile.mkdtemp(prefix="test_checkpoints_"))
+
+            async def run_job(job_id: str, fail_at: str = None):
+                # The stage loop of main.create_video, without the agents
+                with store.claim(job_id):
+                    for stage in ("content", "script", "seo"):
+                        if store.load_stage(job_id, stage) is not None:
+                            continue
+                        if stage == fail_at:
+                            raise RuntimeError(f"{stage} failed")
+                        content = await client.complete([{"role": "user", "content": f"Write the {stage}"}])
+                        store.save_stage(job_id, stage, {"status": "success", "content": content})
+                    store.clear(job_id)
+
+            job_id = CheckpointStore.new_job_id()
+            try:
+                await run_job(job_id, fail_at="script")
+                assert False, "The script stage fails"
+            except RuntimeError:
+                pass
+            assert list(store.load(job_id)) == ["content"], "Completed stages are checkpointed"
+
+            requests = client._client.requests
+            await run_job(job_id)
+            assert client._client.requests == requests + 2, "The retry skips the completed stage"
+            assert store.load(job_id) == {}, "The checkpoint is cleared once the job succeeds"
+
+            assert CheckpointStore.new_job_id() != CheckpointStore.new_job_id(), "Identical requests get their own jobs"
+            first = asyncio.create_task(run_job(job_id))
+            await asyncio.sleep(0)
+            try:
+                await run_job(job_id)
+                assert False, "A running job ID cannot be claimed twice"
+            except JobInProgressError:
+                pass
+            await first
+            await run_job(job_id)
+
+            abandoned = CheckpointStore.new_job_id()
+            store.save_stage(abandoned, "content", {"status": "success"})
+            with store.claim(job_id):
+                store.save_stage(job_id, "content", {"status": "success"})
+                assert store.expire(time.time() + store.ttl) == 1, "Only the abandoned checkpoint expires"
+            assert store.load(abandoned) == {} and list(store.load(job_id)) == ["content"]
+            assert store.expire() == 0, "Recent checkpoints are kept"
+
+        logger.info("Checkpoint resume test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing checkpoint resume: {e!r}")
+        return False
+
+async def test_prompt_budget():
+    """Test that prompts are compacted and kept within their token budget"""
+    logger.info("Testing prompt token budgets...")
+    try:
+        concept = f"Here is the concept you asked for:\n```json\n{DEFAULT_COMPLETION}\n```"
+        compact = compact_context(concept, fields=["key_points", "target_audience"])
+        assert compact == '{"target_audience":"curious beginners","key_points":["what it is","how it works",' \
+            '"where it is going"]}', "Only the requested fields are kept, without whitespace"
+
+        script = " ".join(f"Scene {i}: the narrator explains how the model learns." for i in range(200))
+        template = "Write a voiceover for this script: {script}\nConcept: {concept}\nStyle: {style}"
+        prompt = PromptBuilder(300).add_context("concept", concept, fields=["key_points"]) \
+            .add_context("script", script).render(template, style="friendly")
+        assert count_tokens(prompt) <= 300, "The prompt fits the budget"
+        assert '"key_points":["what it is","how it works","where it is going"]' in prompt, \
+            "Small contexts are kept whole"
+        assert prompt.count("...[truncated]") == 1 and "Style: friendly" in prompt, \
+            "The large context is truncated, the template is kept"
+
+        short = PromptBuilder(300).add_context("script", "Hello").add_context("concept", "World")
+        assert short.render(template, style="calm") == template.format(script="Hello", concept="World", style="calm")
+
+        logger.info("Prompt budget test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing prompt budgets: {e!r}")
+        return False
+
+async def test_tracing():
+    """Test that hedge losers stay out of the latency histograms and traces reach the file"""
+    logger.info("Testing tracing...")
+    try:
+        with FakeServices(openai_latency="fixed:0.2") as services:
+            client = services.model_client(hedge_percentile=0.5, hedge_min_delay=0.05, hedge_min_samples=5)
+            client.latencies.extend([0.05] * 5)
+            trace_file = os.path.join(tempfile.mkdtemp(prefix="test_tracing_"), "traces.jsonl")
+            sample_rate, tracer.sample_rate = tracer.sample_rate, 1.0
+            tracer.histograms.clear()
+            try:
+                with span("create_video", "request", job_id="trace-test"):
+                    assert await client.complete(MESSAGES)
+                    # Let the cancelled loser unwind inside the trace
+                    await asyncio.sleep(0.05)
+                    # Traces sampled by earlier tests stay in the shared file
+                    tracer.flush()
+                    tracer.trace_file = trace_file
+            finally:
+                tracer.sample_rate = sample_rate
+            assert client.hedges_sent == 1
+
+            snapshot = tracer.histogram("http", "openai.chat_completion").snapshot()
+            assert snapshot["count"] == 1, "Only the winning request is in the histogram"
+            assert snapshot["sum"] >= 0.2, "The winner's latency is recorded"
+            assert tracer.histogram("request", "create_video").snapshot()["count"] == 1
+
+            assert tracer.flush(), "The writer thread catches up"
+            with open(tracer.trace_file, "r", encoding="utf-8") as f:
+                spans = [json.loads(line) for line in f]
+            calls = [record for record in spans if record["name"] == "openai.chat_completion"]
+            assert len(calls) == 2 and sum(1 for record in calls if record["attributes"].get("cancelled")) == 1, \
+                "The loser is in the trace, tagged as cancelled"
+            assert len({record["trace_id"] for record in spans}) == 1
+
+        logger.info("Tracing test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing tracing: {e!r}")
+        return False
+
+async def test_fake_services():
+    """Test that the fake services answer like OpenAI and Pexels, deterministically"""
+    logger.info("Testing fake services...")
+    try:
+        assert parse_latency("fixed:0.25")() == 0.25
+        assert 0.1 <= parse_latency("uniform:0.1,0.2")() <= 0.2
+        try:
+            parse_latency("gaussian:1")
+            assert False, "Unknown latency specs are rejected"
+        except ValueError:
+            pass
+
+        with FakeServices() as services:
+            client = services.model_client()
+            strategy = await client.complete([{"role": "user", "content": "Build a content strategy"}])
+            assert "content_structure" in json.loads(strategy), "Prompts get the matching canned answer"
+
+            def get(path: str) -> bytes:
+                with urllib.request.urlopen(f"{services.url}{path}", timeout=10) as response:
+                    return response.read()
+
+            first = json.loads(await asyncio.to_thread(get, "/videos/search?query=ocean&per_page=2"))["videos"]
+            again = json.loads(await asyncio.to_thread(get, "/videos/search?query=Ocean&per_page=2"))["videos"]
+            assert len(first) == 2 and first == again, "The same query returns the same clips"
+            link = max(first[0]["video_files"], key=lambda file: file["height"])["link"]
+            assert link.startswith(services.url) and await asyncio.to_thread(get, link[len(services.url):]), \
+                "Clip links download from the fake service"
+
+        logger.info("Fake services test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing fake services: {e!r}")
+        return False
+
+async def test_tenant_fairness():
+    """Test weighted fair sharing of stage slots between tenants"""
+    logger.info("Testing tenant fairness...")
+    try:
+        with FakeServices() as services:
+            client = services.model_client()
+            scheduler = FairScheduler(max_concurrency=1, default_tenant_concurrency=None)
+            scheduler.configure_tenant("acme", weight=2)
+            grants = []
+
+            async def stage(tenant: str):
+                async with scheduler.slot(tenant):
+                    grants.append(tenant)
+                    await client.complete(MESSAGES)
+
+            # Occupy the only slot so both tenants queue up before anything is granted
+            async with scheduler.slot("acme"):
+                stages = [asyncio.create_task(stage(tenant)) for tenant in ["acme"] * 12 + ["beta"] * 12]
+                await asyncio.sleep(0)
+                assert scheduler.get_stats()["tenants"]["beta"]["queued"] == 12
+            await asyncio.gather(*stages)
+            assert grants[:12].count("acme") == 8, "A tenant with weight 2 gets twice the slots while both wait"
+            assert grants[-4:] == ["beta"] * 4, "The other tenant gets the rest once the first runs out"
+            assert set(scheduler.tenants) == {"acme"}, "Idle tenants are dropped unless configured"
+
+            # Per-tenant caps hold even when nobody else is waiting
+            scheduler = FairScheduler(max_concurrency=4, default_tenant_concurrency=2)
+            peak = 0
+
+            async def capped_stage():
+                nonlocal peak
+                async with scheduler.slot("bulk"):
+                    peak = max(peak, scheduler.tenants["bulk"].running)
+                    await client.complete(MESSAGES)
+
+            await asyncio.gather(*[capped_stage() for _ in range(6)])
+            assert peak == 2, "A tenant never holds more than its cap"
+
+            # A deadline while queued gives up without leaking the tenant
+            async with scheduler.slot("bulk"), scheduler.slot("bulk"):
+                try:
+                    with deadline_scope(0.05):
+                        await scheduler.acquire("bulk")
+                    assert False, "The queued stage runs out of time"
+                except DeadlineExceeded:
+                    pass
+            assert scheduler.tenants == {} and scheduler.running == 0
+
+            for name in ['acme",state="running"} 1\nevil 1', "", "x" * 65]:
+                try:
+                    await scheduler.acquire(name)
+                    assert False, "Tenant names that are not plain identifiers are rejected"
+                except ValueError:
+                    pass
+            assert scheduler.tenants == {}
+            assert escape_label_value('a"b\\c\nd') == 'a\\"b\\\\c\\nd', "Metric labels are escaped"
+
+        logger.info("Tenant fairness test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing tenant fairness: {e!r}")
+        return False
+
+async def test_lazy_imports():
+    """Test that the pipeline modules import without loading heavy dependencies"""
+    logger.info("Testing lazy imports...")
+    try:
+        modules = ["agents.content_strategist", "agents.script_writer", "agents.seo_metadata",
+                   "agents.video_editor", "agents.video_searcher", "utils.batch", "utils.checkpoint",
+                   "utils.model_client", "utils.scheduler", "utils.tracing"]
+        script = (f"import sys\nimport {', '.join(modules)}\n"
+                  f"print(','.join(name for name in {LAZY_MODULES!r} if name in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "", f"Imported eagerly: {result.stdout.strip()}"
+
+        logger.info("Lazy imports test completed successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error testing lazy imports: {e!r}")
+        return False
+
+async def main():
+    """Run all tests"""
+    logger.info("Starting pipeline tests...")
+
+    breaker_success = await test_circuit_breaker()
+    hedge_success = await test_deadline_mid_hedge()
+    batch_success = await test_single_flight()
+    checkpoint_success = await test_checkpoint_resume()
+    prompt_success = await test_prompt_budget()
+    tracing_success = await test_tracing()
+    fake_services_success = await test_fake_services()
+    fairness_success = await test_tenant_fairness()
+    imports_success = await test_lazy_imports()
+
+    if (breaker_success and hedge_success and batch_success and checkpoint_success and prompt_success
+            and tracing_success and fake_services_success and fairness_success and imports_success):
+        logger.info("All tests completed successfully!")
+    else:
+        logger.error("Some tests failed!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.model_client import CircuitOpenError
+
+# Errors that follow from the producing job's own deadline or circuit state
+# rather than from the work itself; other jobs retry instead of sharing them
+JOB_LOCAL_ERRORS = (DeadlineExceeded, CircuitOpenError, asyncio.TimeoutError)
+
+class BatchContext:
+    """
+    Work shared by all jobs of one batch submission.
+
+    Identical model prompts, Pexels searches and clip downloads are run
+    once per batch: the first job starts the call and every other job
+    awaits the same result (single flight). Empty results are treated as
+    failures and are not shared, so a later job can retry them. Neither are
+    JOB_LOCAL_ERRORS: when the producing job runs out of its deadline, the
+    waiting jobs start the call again under their own.
+    """
+
+    def __init__(self, max_concurrency: int):
+        if max_concurrency < 1:
+            raise ValueError("Max concurrency must be at least 1")
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self._caches: Dict[str, Dict[Hashable, asyncio.Future]] = {
+            "completions": {},
+            "searches": {},
+            "downloads": {}
+        }
+        self.calls = {name: 0 for name in self._caches}
+        self.deduplicated = {name: 0 for name in self._caches}
+
+    async def shared(self, cache: str, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the batch-wide result for `key`, running `factory` only if
+        no other job has produced (or is producing) it yet
+        """
+        futures = self._caches[cache]
+        future = futures.get(key)
+        while future is not None:
+            self.deduplicated[cache] += 1
+            deadline = current_deadline()
+            try:
+                if deadline is None:
+                    return await asyncio.shield(future)
+                return await asyncio.wait_for(asyncio.shield(future), timeout=deadline.remaining())
+            except asyncio.CancelledError:
+                # The job producing the result gave up, not us: retry
+                if not future.cancelled():
+                    raise
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"Deadline exceeded waiting for shared {cache} result")
+            future = futures.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        futures[key] = future
+        self.calls[cache] += 1
+        try:
+            result = await factory()
+        except (asyncio.CancelledError, *JOB_LOCAL_ERRORS):
+            futures.pop(key, None)
+            future.cancel()
+            raise
+        except Exception as e:
+            futures.pop(key, None)
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        if not result:
+            futures.pop(key, None)
+        future.set_result(result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "deduplicated": dict(self.deduplicated)
+        }
+
+_current_batch: contextvars.ContextVar = contextvars.ContextVar("batch", default=None)
+
+def current_batch() -> Optional[BatchContext]:
+    """
+    Get the batch the current job belongs to, if any
+    """
+    return _current_batch.get()
+
+@contextmanager
+def batch_scope(batch: BatchContext):
+    token = _current_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _current_batch.reset(token)
+
+async def run_shared(cache: str, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run `factory` through the current batch's single-flight cache, or
+    directly when not running inside a batch
+    """
+    batch = current_batch()
+    if batch is None:
+        return await factory()
+    return await batch.shared(cache, key, factory)
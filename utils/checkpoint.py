@@ -0,0 +1,134 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Set
+from utils.config import Config
+
+class JobInProgressError(Exception):
+    """
+    Raised when a job ID is claimed while a job with that ID is still running
+    """
+    pass
+
+class CheckpointStore:
+    """
+    Local store of per-job stage outputs, so a retried job resumes from
+    the last completed stage instead of repeating every model call,
+    download and render.
+
+    Each job is one JSON file: {"job_id": ..., "updated_at": ..., "stages": {stage: output}}.
+    Files are written to a temporary name and renamed, so a crash never
+    leaves a half-written checkpoint behind. A job ID is claimed by one
+    running job at a time, so two jobs never share a checkpoint file.
+    Checkpoints of failed jobs that are not resumed within `ttl` seconds
+    are deleted.
+    """
+
+    # Seconds between sweeps for expired checkpoints
+    EXPIRE_INTERVAL = 3600
+
+    def __init__(self, directory: str = Config.CHECKPOINT_DIR, ttl: float = Config.CHECKPOINT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self._running: Set[str] = set()
+        self._last_expired: Optional[float] = None
+
+    @staticmethod
+    def new_job_id() -> str:
+        """
+        Unique ID for a job submitted without one
+        """
+        return uuid.uuid4().hex
+
+    @contextmanager
+    def claim(self, job_id: str):
+        """
+        Hold a job ID while its job runs, raising JobInProgressError if
+        another job already holds it
+        """
+        self._path(job_id)
+        if job_id in self._running:
+            raise JobInProgressError(f"Job {job_id} is already running")
+        self._running.add(job_id)
+        now = time.time()
+        if self._last_expired is None or now - self._last_expired >= self.EXPIRE_INTERVAL:
+            self.expire(now)
+        try:
+            yield job_id
+        finally:
+            self._running.discard(job_id)
+
+    def _path(self, job_id: str) -> str:
+        if not job_id or os.sep in job_id or job_id.startswith("."):
+            raise ValueError(f"Invalid job ID: {job_id!r}")
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def load(self, job_id: str) -> Dict[str, Any]:
+        """
+        Get every completed stage output of a job
+        """
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f).get("stages", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            # A corrupt checkpoint only costs a full rerun
+            print(f"Error loading checkpoint {job_id}: {str(e)}")
+            return {}
+
+    def load_stage(self, job_id: str, stage: str) -> Optional[Dict[str, Any]]:
+        return self.load(job_id).get(stage)
+
+    def save_stage(self, job_id: str, stage: str, output: Dict[str, Any]):
+        """
+        Persist the output of a completed stage
+        """
+        stages = self.load(job_id)
+        stages[stage] = output
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(job_id)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"job_id": job_id, "updated_at": time.time(), "stages": stages}, f)
+        os.replace(temp_path, path)
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Delete the checkpoints of jobs that have not run for `ttl` seconds,
+        along with temporary files left by a crash. Running jobs are kept.
+
+        Returns:
+            The number of files deleted
+        """
+        now = time.time() if now is None else now
+        self._last_expired = now
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for name in names:
+            job_id = name.split(".json", 1)[0]
+            if job_id in self._running or not (name.endswith(".json") or name.endswith(".tmp")):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) >= self.ttl:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def clear(self, job_id: str):
+        """
+        Drop a job's checkpoint once the job has finished
+        """
+        try:
+            os.remove(self._path(job_id))
+        except FileNotFoundError:
+            pass
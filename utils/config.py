@@ -1,23 +1,80 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
-
-class Config:
+# Settings read from the environment (and .env), with their defaults
+ENV_SETTINGS = {
     # API Keys
-    PEXELS_API_KEY = os.getenv("PEXELS_API_KEY")
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    "PEXELS_API_KEY": None,
+    "OPENAI_API_KEY": None,
+    # API Endpoints (overridable to point at local stand-ins, see benchmarks/)
+    "OPENAI_API_BASE": None,  # None uses the OpenAI default
+    "PEXELS_API_BASE": "https://api.pexels.com"
+}
+
+class _EnvSettings(type):
+    """
+    Resolve environment settings on first access, so .env is only read
+    (and python-dotenv only imported) when a setting is actually needed
+    """
+    _env_loaded = False
     
+    def __getattr__(cls, name):
+        if name not in ENV_SETTINGS:
+            raise AttributeError(name)
+        if not _EnvSettings._env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _EnvSettings._env_loaded = True
+        value = os.getenv(name, ENV_SETTINGS[name])
+        setattr(cls, name, value)
+        return value
+
+class Config(metaclass=_EnvSettings):
     # Video Settings
     MAX_VIDEO_DURATION = 600  # 10 minutes
     DEFAULT_VIDEO_QUALITY = "1080p"
     OUTPUT_DIR = "output"
     TEMP_DIR = "temp"
+    CHECKPOINT_DIR = "checkpoints"
+    CHECKPOINT_TTL = 7 * 24 * 3600  # seconds a failed job's checkpoint is kept for a resume
+    
+    # Tracing Settings
+    TRACE_FILE = "traces/traces.jsonl"  # sampled traces, one span per line
+    TRACE_SAMPLE_RATE = 0.05  # fraction of requests whose spans are written
     
     # API Settings
     API_HOST = "0.0.0.0"
     API_PORT = 8000
     
+    # Model Client Settings
+    OPENAI_MODEL = "gpt-4"
+    REQUEST_DEADLINE = 900  # seconds allowed for one /create-video request
+    HTTP_TIMEOUT = 30  # upper bound for a single Pexels request
+    HEDGE_PERCENTILE = 0.95  # send a duplicate request after this latency percentile
+    HEDGE_MIN_DELAY = 1.0  # never hedge earlier than this (seconds)
+    HEDGE_MIN_SAMPLES = 20  # latency samples needed before hedging starts
+    HEDGE_LATENCY_WINDOW = 200
+    CIRCUIT_FAILURE_THRESHOLD = 5  # consecutive failures before failing fast
+    CIRCUIT_RESET_TIMEOUT = 30.0  # seconds before a probe call is allowed
+    
+    # Prompt token budgets (template plus upstream context)
+    PROMPT_TOKEN_BUDGETS = {
+        "script": 1200,
+        "voiceover": 2000,
+        "description": 1200,
+        "seo_titles": 900,
+        "seo_tags": 900
+    }
+    
+    # Scheduling Settings (pipeline stages running at once, shared fairly by tenant)
+    SCHEDULER_MAX_CONCURRENCY = 16
+    TENANT_MAX_CONCURRENCY = 8  # default cap per tenant, None for no cap
+    TENANT_WEIGHTS = {}  # tenant -> weight, default 1.0
+    TENANT_CONCURRENCY_LIMITS = {}  # tenant -> cap, overrides TENANT_MAX_CONCURRENCY
+    
+    # Batch Settings
+    BATCH_MAX_CONCURRENCY = 8  # videos rendered at once per batch
+    BATCH_MAX_SIZE = 1000
+    
     @classmethod
     def validate(cls):
         """
@@ -0,0 +1,71 @@
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+class DeadlineExceeded(Exception):
+    """
+    Raised when a request runs out of its time budget
+    """
+    pass
+
+class Deadline:
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Deadline must be positive")
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """
+        Seconds left before the deadline (never negative)
+        """
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, operation: str = "request"):
+        """
+        Raise DeadlineExceeded if the budget is already spent
+        """
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline exceeded before {operation}")
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar("deadline", default=None)
+
+def current_deadline() -> Optional[Deadline]:
+    """
+    Get the deadline of the request being processed, if any
+    """
+    return _current_deadline.get()
+
+def remaining_time(default: Optional[float] = None) -> Optional[float]:
+    """
+    Time budget for the next blocking call: the remaining request budget,
+    capped by `default` when both are set. Raises DeadlineExceeded once the
+    budget is spent, since a zero timeout is rejected by requests and
+    expires subprocesses immediately.
+    """
+    deadline = current_deadline()
+    if deadline is None:
+        return default
+    deadline.check("blocking call")
+    if default is None:
+        return deadline.remaining()
+    return min(default, deadline.remaining())
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """
+    Run the enclosed block under a deadline. Nested scopes can only
+    shorten the budget inherited from the enclosing request.
+    """
+    deadline = Deadline(seconds)
+    parent = current_deadline()
+    if parent is not None and parent.expires_at < deadline.expires_at:
+        deadline = parent
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
@@ -0,0 +1,204 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from utils.config import Config
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.tracing import span
+
+class CircuitOpenError(Exception):
+    """
+    Raised when the model provider is considered degraded and calls fail fast
+    """
+    pass
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    closed    -> calls go through, failures are counted
+    open      -> calls fail immediately until `reset_timeout` has passed
+    half_open -> a single probe call is let through; success closes the
+                 circuit, failure opens it again
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> bool:
+        """
+        Check whether a call may proceed, raising CircuitOpenError if not.
+        Returns True if the call is the half-open probe, which must then be
+        resolved by record_success, record_failure or release_probe.
+        """
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError("Model provider circuit is open")
+            self.state = "half_open"
+            self._probe_in_flight = False
+
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                raise CircuitOpenError("Model provider circuit is half-open, probe in flight")
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self):
+        """
+        Let another call probe the provider after a probe ended without a
+        verdict, e.g. because it was cancelled or ran out of its deadline
+        """
+        self._probe_in_flight = False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+class ModelClient:
+    """
+    Chat completion client with deadline propagation, hedged requests and
+    a circuit breaker.
+
+    A request is sent once; if it has not answered after the configured
+    latency percentile of recent calls, a duplicate is sent and whichever
+    answers first wins while the other is cancelled.
+    """
+
+    def __init__(self,
+                 model: str = Config.OPENAI_MODEL,
+                 hedge_percentile: float = Config.HEDGE_PERCENTILE,
+                 hedge_min_delay: float = Config.HEDGE_MIN_DELAY,
+                 hedge_min_samples: int = Config.HEDGE_MIN_SAMPLES,
+                 latency_window: int = Config.HEDGE_LATENCY_WINDOW,
+                 breaker: Optional[CircuitBreaker] = None):
+        if not 0 < hedge_percentile <= 1:
+            raise ValueError("Hedge percentile must be between 0 and 1")
+        self.model = model
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = deque(maxlen=latency_window)
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=Config.CIRCUIT_RESET_TIMEOUT
+        )
+        self.hedges_sent = 0
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Imported on first use: openai is by far the slowest module to import
+            import openai
+            self._client = openai.AsyncOpenAI(api_key=Config.OPENAI_API_KEY, base_url=Config.OPENAI_API_BASE)
+        return self._client
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Delay after which a duplicate request is sent, or None to disable
+        hedging until enough latency samples have been collected
+        """
+        if len(self.latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(self.hedge_percentile * len(ordered)))
+        return max(self.hedge_min_delay, ordered[index])
+
+    async def _request(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        start_time = time.monotonic()
+        with span("openai.chat_completion", "http", model=self.model):
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens
+            )
+        self.latencies.append(time.monotonic() - start_time)
+        return response.choices[0].message.content
+
+    async def _hedged_request(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        pending = {asyncio.ensure_future(self._request(messages, max_tokens))}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if done:
+                    return done.pop().result()
+                self.hedges_sent += 1
+                pending.add(asyncio.ensure_future(self._request(messages, max_tokens)))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def complete(self, messages: List[Dict[str, str]], max_tokens: int = 1000) -> str:
+        """
+        Get a chat completion within the current request deadline
+        """
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.check("model call")
+        is_probe = self.breaker.before_call()
+
+        call = asyncio.ensure_future(self._hedged_request(messages, max_tokens))
+        try:
+            if deadline is not None:
+                done, _ = await asyncio.wait({call}, timeout=deadline.remaining())
+                if not done:
+                    # The caller's budget ran out, which says nothing about
+                    # the provider: leave the breaker alone
+                    raise DeadlineExceeded("Deadline exceeded during model call")
+            try:
+                content = await call
+            except Exception:
+                # Provider errors, including provider-side timeouts
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            return content
+        finally:
+            if not call.done():
+                call.cancel()
+            if is_probe:
+                self.breaker.release_probe()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "breaker_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "hedge_delay": self.hedge_delay(),
+            "hedges_sent": self.hedges_sent,
+            "latency_samples": len(self.latencies)
+        }
+
+_client: Optional[ModelClient] = None
+
+def get_model_client() -> ModelClient:
+    """
+    Shared client, so latency history and breaker state span all agents
+    """
+    global _client
+    if _client is None:
+        _client = ModelClient()
+    return _client
@@ -0,0 +1,135 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# Word runs and single punctuation marks, roughly how BPE tokenizers split text
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_CHARS_PER_TOKEN = 5  # long words are split into several tokens
+_TRUNCATION_MARKER = " ...[truncated]"
+
+def _piece_tokens(piece: str) -> int:
+    if piece[0].isalnum() or piece[0] == "_":
+        return -(-len(piece) // _CHARS_PER_TOKEN)
+    return 1
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of model tokens in `text` without a tokenizer.
+    Errs on the high side, so prompts built under a budget stay under it.
+    """
+    return sum(_piece_tokens(match.group()) for match in _TOKEN_PATTERN.finditer(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut `text` after the last whole token that fits in `max_tokens`
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Leave room for the marker so the result still fits the budget
+    limit = max_tokens - count_tokens(_TRUNCATION_MARKER)
+    if limit <= 0:
+        return ""
+    used = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > limit:
+            return text[:match.start()].rstrip() + _TRUNCATION_MARKER
+    return text
+
+def extract_json(text: str) -> Optional[Any]:
+    """
+    Parse the first JSON object or array in a model response, which may be
+    wrapped in prose or a code fence
+    """
+    if not isinstance(text, str):
+        return None
+    decoder = json.JSONDecoder()
+    for index, char in enumerate(text):
+        if char in "{[":
+            try:
+                return decoder.raw_decode(text, index)[0]
+            except ValueError:
+                continue
+    return None
+
+def _normalize_key(key: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(key).lower()).strip("_")
+
+def compact_context(value: Any, fields: Optional[List[str]] = None) -> str:
+    """
+    Reduce an upstream blob (model response or dict) to the parts a prompt
+    needs: only the requested top-level JSON fields, serialized without
+    whitespace. Falls back to whitespace-collapsed text when the blob is
+    not JSON or none of the fields are present.
+
+    Field names match loosely, so "key_points" matches "Key Points to Cover".
+    """
+    data = value if isinstance(value, (dict, list)) else extract_json(value)
+
+    if isinstance(data, dict) and fields:
+        wanted = [_normalize_key(field) for field in fields]
+        selected = {
+            key: item for key, item in data.items()
+            if any(field in _normalize_key(key) for field in wanted)
+        }
+        if selected:
+            data = selected
+
+    if data is not None:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return " ".join(str(value).split())
+
+class PromptBuilder:
+    """
+    Build a prompt from a template and upstream context under a token budget.
+
+    The template text is always kept whole; the contexts share what is left
+    of the budget. Contexts that fit are kept in full and the rest is split
+    evenly among the larger ones, which are truncated to their share.
+
+    Example:
+        builder = PromptBuilder(1500)
+        builder.add_context("concept", concept, fields=["key_points"])
+        prompt = builder.render("Write a script about: {concept}")
+    """
+
+    def __init__(self, max_tokens: int):
+        if max_tokens <= 0:
+            raise ValueError("Token budget must be positive")
+        self.max_tokens = max_tokens
+        self.contexts: Dict[str, str] = {}
+
+    def add_context(self, name: str, value: Any, fields: Optional[List[str]] = None) -> "PromptBuilder":
+        """
+        Add compacted upstream context, inserted into the template as {name}
+        """
+        if not name:
+            raise ValueError("Context name is required")
+        self.contexts[name] = compact_context(value, fields)
+        return self
+
+    def _allocate(self, available: int) -> Dict[str, int]:
+        sizes = {name: count_tokens(text) for name, text in self.contexts.items()}
+        allocation = {}
+        remaining = max(0, available)
+        # Smallest first, so small contexts keep their full size and
+        # their unused share goes to the larger ones
+        pending = sorted(sizes, key=lambda name: (sizes[name], name))
+        while pending:
+            share = remaining // len(pending)
+            name = pending.pop(0)
+            allocation[name] = min(sizes[name], share)
+            remaining -= allocation[name]
+        return allocation
+
+    def render(self, template: str, **values: Any) -> str:
+        """
+        Fill the template with the budgeted contexts and any extra values
+        """
+        fixed = template.format(**values, **{name: "" for name in self.contexts})
+        allocation = self._allocate(self.max_tokens - count_tokens(fixed))
+        contexts = {
+            name: truncate_to_tokens(text, allocation[name])
+            for name, text in self.contexts.items()
+        }
+        return template.format(**values, **contexts)
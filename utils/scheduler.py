@@ -0,0 +1,180 @@
+import asyncio
+import re
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional, Set
+from utils.config import Config
+from utils.deadline import DeadlineExceeded, current_deadline
+
+# Tenant names end up in metric labels, so only plain identifiers are accepted
+TENANT_NAME_PATTERN = r"^[A-Za-z0-9_.-]{1,64}$"
+_TENANT_NAME = re.compile(TENANT_NAME_PATTERN)
+
+class _Tenant:
+    __slots__ = ("name", "weight", "max_concurrency", "queue", "running", "virtual_time")
+
+    def __init__(self, name: str, weight: float, max_concurrency: Optional[int]):
+        self.name = name
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.queue: Deque[asyncio.Future] = deque()
+        self.running = 0
+        self.virtual_time = 0.0
+
+    def eligible(self) -> bool:
+        return bool(self.queue) and (self.max_concurrency is None or self.running < self.max_concurrency)
+
+    def idle(self) -> bool:
+        return self.running == 0 and all(future.done() for future in self.queue)
+
+class FairScheduler:
+    """
+    Weighted fair scheduler for pipeline stages.
+
+    Each tenant has its own FIFO queue. When a slot frees up it goes to the
+    eligible tenant with the lowest virtual time, and that tenant's virtual
+    time then advances by 1 / weight. A tenant with weight 2 therefore gets
+    twice the slots of a tenant with weight 1 while both are busy. A tenant
+    that was idle re-enters at the current virtual time, so it cannot bank
+    credit while away. Per-tenant concurrency caps bound how much of the
+    pool one tenant can hold even when nobody else is waiting.
+
+    Tenants are created on first use and dropped again once idle, unless
+    they were set up with configure_tenant, so arbitrary tenant names do
+    not accumulate.
+
+    Usage:
+        async with scheduler.slot("acme"):
+            await run_stage()
+    """
+
+    def __init__(self,
+                 max_concurrency: int = Config.SCHEDULER_MAX_CONCURRENCY,
+                 default_weight: float = 1.0,
+                 default_tenant_concurrency: Optional[int] = Config.TENANT_MAX_CONCURRENCY):
+        if max_concurrency < 1:
+            raise ValueError("Max concurrency must be at least 1")
+        if default_weight <= 0:
+            raise ValueError("Weight must be positive")
+        self.max_concurrency = max_concurrency
+        self.default_weight = default_weight
+        self.default_tenant_concurrency = default_tenant_concurrency
+        self.running = 0
+        self.virtual_time = 0.0
+        self.tenants: Dict[str, _Tenant] = {}
+        self.configured: Set[str] = set()
+
+    def configure_tenant(self, tenant: str, weight: Optional[float] = None, max_concurrency: Optional[int] = None):
+        """
+        Set a tenant's weight and/or concurrency cap
+        """
+        if weight is not None and weight <= 0:
+            raise ValueError("Weight must be positive")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("Tenant max concurrency must be at least 1")
+        state = self._tenant(tenant)
+        self.configured.add(tenant)
+        if weight is not None:
+            state.weight = weight
+        if max_concurrency is not None:
+            state.max_concurrency = max_concurrency
+        self._dispatch()
+
+    def _tenant(self, tenant: str) -> _Tenant:
+        state = self.tenants.get(tenant)
+        if state is None:
+            if not isinstance(tenant, str) or not _TENANT_NAME.match(tenant):
+                raise ValueError(f"Invalid tenant name: {tenant!r}")
+            state = _Tenant(
+                tenant,
+                Config.TENANT_WEIGHTS.get(tenant, self.default_weight),
+                Config.TENANT_CONCURRENCY_LIMITS.get(tenant, self.default_tenant_concurrency)
+            )
+            self.tenants[tenant] = state
+        return state
+
+    def _evict_if_idle(self, state: _Tenant):
+        # An evicted tenant comes back at the current virtual time
+        if state.idle() and state.name not in self.configured and self.tenants.get(state.name) is state:
+            del self.tenants[state.name]
+
+    def _dispatch(self):
+        while self.running < self.max_concurrency:
+            eligible = [state for state in self.tenants.values() if state.eligible()]
+            if not eligible:
+                return
+            state = min(eligible, key=lambda tenant: tenant.virtual_time)
+            future = state.queue.popleft()
+            if future.done():
+                # Waiter was cancelled while queued
+                continue
+            self.virtual_time = state.virtual_time
+            state.virtual_time += 1.0 / state.weight
+            state.running += 1
+            self.running += 1
+            future.set_result(None)
+
+    async def acquire(self, tenant: str):
+        """
+        Wait for a slot on behalf of `tenant`, no longer than the current
+        request deadline allows
+        """
+        state = self._tenant(tenant)
+        if not state.queue and state.running == 0:
+            # Returning from idle: start at the current virtual time
+            state.virtual_time = max(state.virtual_time, self.virtual_time)
+
+        future = asyncio.get_running_loop().create_future()
+        state.queue.append(future)
+        self._dispatch()
+        deadline = current_deadline()
+        try:
+            if deadline is None:
+                await future
+            else:
+                await asyncio.wait_for(asyncio.shield(future), timeout=deadline.remaining())
+        except asyncio.TimeoutError:
+            if future.done():
+                self.release(tenant)
+            future.cancel()
+            self._evict_if_idle(state)
+            raise DeadlineExceeded(f"Deadline exceeded waiting for a {tenant} stage slot")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as we were cancelled: hand it back
+                self.release(tenant)
+            future.cancel()
+            self._evict_if_idle(state)
+            raise
+
+    def release(self, tenant: str):
+        state = self.tenants[tenant]
+        state.running -= 1
+        self.running -= 1
+        self._dispatch()
+        self._evict_if_idle(state)
+
+    @asynccontextmanager
+    async def slot(self, tenant: str):
+        await self.acquire(tenant)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "tenants": {
+                name: {
+                    "queued": sum(1 for future in state.queue if not future.done()),
+                    "running": state.running,
+                    "weight": state.weight,
+                    "max_concurrency": state.max_concurrency
+                }
+                for name, state in self.tenants.items()
+            }
+        }
+
+scheduler = FairScheduler()
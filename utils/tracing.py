@@ -0,0 +1,275 @@
+import asyncio
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+import contextvars
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+from utils.config import Config
+
+# Upper bounds of the latency buckets in seconds: 1ms doubling up to ~17min
+BUCKET_BOUNDS = tuple(0.001 * 2 ** i for i in range(21))
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram.
+
+    Writers never take a lock: each thread records into its own shard
+    (event loop and worker threads alike) and readers merge the shards.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+
+    def _shard(self) -> List[float]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            # bucket counts, then +Inf count, total count and sum
+            shard = [0] * (len(BUCKET_BOUNDS) + 3)
+            self._local.shard = shard
+            self._shards.append(shard)
+        return shard
+
+    def record(self, seconds: float):
+        shard = self._shard()
+        shard[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        shard[-2] += 1
+        shard[-1] += seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Merged counts: per-bucket (not cumulative) counts, total count and sum
+        """
+        merged = [0] * (len(BUCKET_BOUNDS) + 3)
+        for shard in list(self._shards):
+            for i, value in enumerate(shard):
+                merged[i] += value
+        return {
+            "buckets": merged[:-2],
+            "count": merged[-2],
+            "sum": merged[-1]
+        }
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Upper bound of the bucket holding the given percentile
+        """
+        snapshot = self.snapshot()
+        if not snapshot["count"]:
+            return 0.0
+        target = percentile * snapshot["count"]
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS + (float("inf"),), snapshot["buckets"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+class _Trace:
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = uuid.uuid4().hex
+        self.sampled = sampled
+        self.spans: List[Dict[str, Any]] = []
+
+class Span:
+    """
+    Timed section of work. Spans nest through a context variable, so they
+    follow awaits and asyncio.to_thread calls without passing anything around.
+    """
+
+    __slots__ = ("tracer", "name", "kind", "attributes", "span_id", "parent", "trace",
+                 "start_time", "start_counter", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.parent = _current_span.get()
+        if self.parent is not None:
+            self.trace = self.parent.trace
+        else:
+            self.trace = _Trace(random.random() < self.tracer.sample_rate)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start_time = time.time()
+        self.start_counter = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start_counter
+        _current_span.reset(self._token)
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            # Abandoned work, e.g. the losing request of a hedge: keep it in
+            # the trace but out of the latency histograms
+            self.attributes["cancelled"] = True
+        else:
+            if exc_type is not None:
+                self.attributes["error"] = exc_type.__name__
+            self.tracer.histogram(self.kind, self.name).record(duration)
+
+        if self.trace.sampled:
+            self.trace.spans.append({
+                "trace_id": self.trace.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent.span_id if self.parent is not None else None,
+                "name": self.name,
+                "kind": self.kind,
+                "start": self.start_time,
+                "duration": duration,
+                "attributes": self.attributes
+            })
+            if self.parent is None:
+                self.tracer.write_trace(list(self.trace.spans))
+        return False
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("span", default=None)
+
+def escape_label_value(value: Any) -> str:
+    """
+    Escape a Prometheus label value: backslash, double quote and newline
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class TraceWriter(threading.Thread):
+    """
+    Background thread that appends queued traces to the tracer's file.
+
+    It blocks for the first trace, then takes every trace already queued
+    and writes them with a single open and write, so the event loop never
+    waits on the file.
+    """
+
+    def __init__(self, tracer: "Tracer", trace_queue: queue.Queue):
+        super().__init__(name="trace-writer", daemon=True)
+        self.tracer = tracer
+        self.queue = trace_queue
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            traces = [item for item in batch if not isinstance(item, threading.Event)]
+            if traces:
+                self._write(traces)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, traces: List[List[Dict[str, Any]]]):
+        trace_file = self.tracer.trace_file
+        if not trace_file:
+            return
+        lines = "".join(json.dumps(span, default=str) + "\n" for spans in traces for span in spans)
+        try:
+            directory = os.path.dirname(trace_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(trace_file, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"Error writing trace: {str(e)}")
+
+class Tracer:
+    """
+    Records every span in a latency histogram keyed by (kind, name) and
+    writes a sample of whole traces to a JSONL file, one span per line,
+    for offline flame-graph analysis. Cancelled spans are tagged in the
+    trace and left out of the histograms. Traces are written by a
+    background thread.
+    """
+
+    def __init__(self, trace_file: Optional[str] = Config.TRACE_FILE,
+                 sample_rate: float = Config.TRACE_SAMPLE_RATE):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Sample rate must be between 0 and 1")
+        self.trace_file = trace_file
+        self.sample_rate = sample_rate
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[TraceWriter] = None
+        self._writer_lock = threading.Lock()
+
+    def span(self, name: str, kind: str, **attributes: Any) -> Span:
+        return Span(self, name, kind, attributes)
+
+    def histogram(self, kind: str, name: str) -> LatencyHistogram:
+        key = (kind, name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def write_trace(self, spans: List[Dict[str, Any]]):
+        """
+        Queue a finished trace for the writer thread
+        """
+        if not self.trace_file:
+            return
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = TraceWriter(self, self._queue)
+                    self._writer.start()
+                    atexit.register(self.flush)
+        self._queue.put(spans)
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until every trace queued so far is written.
+
+        Returns:
+            False if the writer did not catch up within `timeout`
+        """
+        if self._writer is None:
+            return True
+        written = threading.Event()
+        self._queue.put(written)
+        return written.wait(timeout)
+
+    def render_metrics(self) -> str:
+        """
+        Histograms in the Prometheus text exposition format
+        """
+        metric = "pipeline_span_duration_seconds"
+        lines = [
+            f"# HELP {metric} Duration of pipeline spans by kind and name.",
+            f"# TYPE {metric} histogram"
+        ]
+        for (kind, name), histogram in sorted(self.histograms.items()):
+            snapshot = histogram.snapshot()
+            labels = f'kind="{escape_label_value(kind)}",name="{escape_label_value(name)}"'
+            cumulative = 0
+            for bound, count in zip(BUCKET_BOUNDS, snapshot["buckets"]):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {snapshot["count"]}')
+            lines.append(f"{metric}_sum{{{labels}}} {snapshot['sum']:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+tracer = Tracer()
+
+def span(name: str, kind: str, **attributes: Any) -> Span:
+    """
+    Open a span on the shared tracer: `with span("search", "http"): ...`
+    """
+    return tracer.span(name, kind, **attributes)